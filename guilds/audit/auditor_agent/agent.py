@@ -7,6 +7,7 @@ from google.adk.agents.invocation_context import InvocationContext
 from google.adk.events import Event
 from google.genai import types
 
+from guilds.common.llm_cache import cached_llm_run
 from .trade_audit import TradeAudit
 
 logging.basicConfig(level=logging.INFO)
@@ -34,6 +35,8 @@ auditor_llm = LlmAgent(
     5. Respond ONLY with a valid JSON object conforming to the `TradeAudit` schema.
     """,
     output_schema=TradeAudit,
+    # Judges only the proposal and critique in the template, not the session history.
+    include_contents="none",
 )
 
 class AuditorAgent(BaseAgent):
@@ -64,7 +67,7 @@ class AuditorAgent(BaseAgent):
             ctx.session.state["critique_content"] = critique_content
             
             final_response_text = ""
-            async for event in self.auditor_llm.run_async(ctx):
+            async for event in cached_llm_run(self.auditor_llm, ctx):
                 if event.is_final_response() and event.content:
                     final_response_text = event.content.parts[0].text
                 yield event
@@ -1,6 +1,6 @@
 import json
 import logging
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Dict, List
 
 from google.adk.agents import BaseAgent
 from google.adk.agents.invocation_context import InvocationContext
@@ -8,7 +8,10 @@ from google.adk.events import Event
 from google.adk.tools import FunctionTool
 from google.genai import types
 
-from .tools import run_causal_discovery
+from guilds.intelligence.news_fanout import normalize_tickers, ticker_state_key
+from .state import CausalState, causal_state_filename
+from .parallel import DiscoveryCancelled
+from .tools import run_causal_discovery_async
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -16,12 +19,28 @@ logger = logging.getLogger(__name__)
 class CausalAnalyst(BaseAgent):
     """
     Analyzes structured insights to build a causal graph of market drivers.
+
+    The graph comes from Granger tests between news-sentiment and return
+    series (see `tools.run_causal_discovery`). When the session holds a
+    `tickers` basket, the per-ticker insights written by `NewsFanOut`
+    (`last_insight_file:<TICKER>`) are tested alongside the subject's.
+
+    The test statistics persist per subject in a user-scoped state artifact
+    (see `state.py`), so each run only folds in the new insights. Every run
+    stores a versioned snapshot of the full graph in `*_causal_graph.json`
+    and the links added, removed or changed since the previous version in
+    `*_causal_diff.json`.
+
+    The tests run in a shared process pool (see `parallel.py`), so the event
+    loop stays free while many graphs compute at once. Setting
+    `ctx.end_invocation`, or cancelling the invocation, abandons the run
+    without touching the persisted state.
     """
     _causal_tool: FunctionTool
 
     def __init__(self, name: str):
         super().__init__(name=name)
-        self._causal_tool = FunctionTool(func=run_causal_discovery)
+        self._causal_tool = FunctionTool(func=run_causal_discovery_async)
 
     async def _run_async_impl(
         self, ctx: InvocationContext
@@ -42,24 +61,45 @@ class CausalAnalyst(BaseAgent):
                 raise ValueError(f"Failed to load artifact: {insights_filename}")
 
             insights_data = json.loads(insights_artifact.inline_data.data.decode('utf-8'))
-            
-            causal_result = self._causal_tool.func(insights_data=insights_data.get("insights", []))
-            
-            graph_json = json.dumps(causal_result, indent=2)
-            artifact_part = types.Part.from_bytes(
-                data=graph_json.encode("utf-8"), mime_type="application/json")
-            
+            subject = ctx.session.state.get("subject") or insights_filename.split("_")[0]
+
+            state = self._load_state(ctx, subject)
+
+            causal_result = await self._causal_tool.func(
+                insights_data=insights_data.get("insights", []),
+                subject=subject,
+                peer_insights=self._load_peer_insights(ctx, subject),
+                state=state,
+                should_cancel=lambda: ctx.end_invocation,
+            )
+            diff = causal_result.pop("diff")
+
             graph_filename = insights_filename.replace("_insights.json", "_causal_graph.json")
-            
-            version = ctx.artifact_service.save_artifact(
+            diff_filename = insights_filename.replace("_insights.json", "_causal_diff.json")
+            for filename, content in ((graph_filename, causal_result), (diff_filename, diff)):
+                ctx.artifact_service.save_artifact(
+                    app_name=ctx.app_name, user_id=ctx.user_id, session_id=ctx.session.id,
+                    filename=filename, artifact=types.Part.from_bytes(
+                        data=json.dumps(content, indent=2).encode("utf-8"), mime_type="application/json"))
+            ctx.artifact_service.save_artifact(
                 app_name=ctx.app_name, user_id=ctx.user_id, session_id=ctx.session.id,
-                filename=graph_filename, artifact=artifact_part)
-            
+                filename=causal_state_filename(subject), artifact=types.Part.from_bytes(
+                    data=state.to_bytes(), mime_type="application/octet-stream"))
+
             ctx.session.state["last_causal_graph_file"] = graph_filename
-            
-            final_text = f"Causal-Analyst successfully generated and stored '{graph_filename}' (v{version})."
+            ctx.session.state["last_causal_diff_file"] = diff_filename
+            ctx.session.state["causal_graph_version"] = causal_result["version"]
+
+            final_text = (
+                f"Causal-Analyst stored graph v{causal_result['version']} in '{graph_filename}': "
+                f"{len(diff['added'])} link(s) added, {len(diff['removed'])} removed, "
+                f"{len(diff['changed'])} changed over {diff['bins_closed']} new bin(s)."
+            )
             logger.info(f"[{self.name}] {final_text}")
             
+        except DiscoveryCancelled:
+            final_text = "Causal-Analyst cancelled; the causal state is unchanged."
+            logger.info(f"[{self.name}] {final_text}")
         except Exception as e:
             final_text = f"Causal-Analyst failed. Error: {e}"
             logger.error(f"[{self.name}] {final_text}", exc_info=True)
@@ -67,4 +107,33 @@ class CausalAnalyst(BaseAgent):
         # Use the direct Part constructor.
         yield Event(author=self.name, content=types.Content(parts=[types.Part(text=final_text)]))
 
+    def _load_state(self, ctx: InvocationContext, subject: str) -> CausalState:
+        """The subject's persisted causal state, or an empty one on first use."""
+        artifact = ctx.artifact_service.load_artifact(
+            app_name=ctx.app_name, user_id=ctx.user_id,
+            session_id=ctx.session.id, filename=causal_state_filename(subject)
+        )
+        if not artifact:
+            return CausalState()
+        try:
+            return CausalState.from_bytes(artifact.inline_data.data)
+        except (KeyError, ValueError) as e:
+            logger.warning(f"[{self.name}] Discarding unreadable causal state for {subject}: {e}")
+            return CausalState()
+
+    def _load_peer_insights(self, ctx: InvocationContext, subject: str) -> Dict[str, List[Dict[str, Any]]]:
+        """Insights for the other tickers in the session's basket that have an insights artifact."""
+        peers: Dict[str, List[Dict[str, Any]]] = {}
+        for ticker in normalize_tickers(ctx.session.state.get("tickers")):
+            filename = ctx.session.state.get(ticker_state_key("last_insight_file", ticker))
+            if ticker == subject or not filename:
+                continue
+            artifact = ctx.artifact_service.load_artifact(
+                app_name=ctx.app_name, user_id=ctx.user_id,
+                session_id=ctx.session.id, filename=filename
+            )
+            if artifact:
+                peers[ticker] = json.loads(artifact.inline_data.data.decode('utf-8')).get("insights", [])
+        return peers
+
 root_agent = CausalAnalyst(name="causal_analyst")
\ No newline at end of file
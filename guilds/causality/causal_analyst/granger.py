@@ -0,0 +1,263 @@
+"""
+Vectorized pairwise Granger causality.
+
+For every ordered pair (cause x, effect y) of columns in a (T, N) panel the
+test compares
+
+    restricted:    y_t ~ 1 + y_{t-1} .. y_{t-p}
+    unrestricted:  y_t ~ 1 + y_{t-1} .. y_{t-p} + x_{t-1} .. x_{t-p}
+
+with an F test on the p added coefficients. Every such regression is a
+function of the cross-product matrix of the rows [1, v_{t-1}, .., v_{t-p},
+v_t], so `GrangerMoments` keeps only that matrix and the last p observations:
+new observations are folded in with one rank-k update, and the tests never
+revisit the history.
+
+By Frisch-Waugh-Lovell the unrestricted fit only needs the cause lags
+partialled out against the restricted design. For a chunk of effects at a
+time this is a batch of small solves against (p + 1) x (p + 1) blocks,
+applied to all N candidate causes at once: O(N^2 p^3) per test run,
+independent of the number of observations, with no per-pair Python work.
+"""
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Continued-fraction settings for the incomplete beta function.
+_BETACF_MAX_ITER = 300
+_BETACF_EPS = 1e-12
+_TINY = 1e-300
+
+# Effects processed per batch; bounds memory at about
+# EFFECT_CHUNK * N * (p + 1) * p floats.
+EFFECT_CHUNK = 128
+
+# Relative variance below which a series counts as constant.
+_CONSTANT_TOL = 1e-10
+
+
+def lag_matrix(values: np.ndarray, max_lag: int) -> np.ndarray:
+    """(T - p, N, p) array where [t, i, k] holds column i at lag k + 1 of row t + p."""
+    T = values.shape[0]
+    return np.stack(
+        [values[max_lag - k - 1:T - k - 1] for k in range(max_lag)], axis=2
+    )
+
+
+class GrangerMoments:
+    """
+    Sufficient statistics for pairwise Granger tests over `n_vars` series:
+    the cross-product matrix of the design rows [1, lag 1 .. lag p, current]
+    and the last `max_lag` observations, which seed the lags of the next row.
+    """
+
+    def __init__(
+        self,
+        n_vars: int,
+        max_lag: int,
+        cross_products: Optional[np.ndarray] = None,
+        history: Optional[np.ndarray] = None,
+        n_rows: int = 0,
+    ):
+        size = 1 + n_vars * (max_lag + 1)
+        self.n_vars = n_vars
+        self.max_lag = max_lag
+        self.cross_products = (
+            np.zeros((size, size)) if cross_products is None else np.asarray(cross_products, dtype=np.float64)
+        )
+        self.history = np.empty((0, n_vars)) if history is None else np.asarray(history, dtype=np.float64)
+        self.n_rows = n_rows
+
+    def append(self, values: np.ndarray) -> None:
+        """Folds in new observations, given as (k, n_vars) rows in time order."""
+        values = np.asarray(values, dtype=np.float64).reshape(-1, self.n_vars)
+        joined = np.vstack([self.history, values])
+        if joined.shape[0] > self.max_lag:
+            lags = lag_matrix(joined, self.max_lag)
+            design = np.hstack([
+                np.ones((lags.shape[0], 1)),
+                lags.transpose(0, 2, 1).reshape(lags.shape[0], -1),
+                joined[self.max_lag:],
+            ])
+            self.cross_products += design.T @ design
+            self.n_rows += design.shape[0]
+        self.history = joined[-self.max_lag:]
+
+    def f_tests(self) -> Tuple[np.ndarray, np.ndarray, int, int]:
+        return f_tests_from_moments(self.cross_products, self.n_rows, self.n_vars, self.max_lag)
+
+
+def granger_f_tests(values: np.ndarray, max_lag: int) -> Tuple[np.ndarray, np.ndarray, int, int]:
+    """
+    F statistics and p-values for every pair of columns in `values`.
+
+    Returns `(f_stats, p_values, df_num, df_den)`, where `[i, j]` tests
+    whether column i Granger-causes column j. The diagonal and any pair
+    involving a constant column are NaN.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    moments = GrangerMoments(values.shape[1], max_lag)
+    moments.append(values)
+    return moments.f_tests()
+
+
+def f_tests_from_moments(
+    cross_products: np.ndarray, n_rows: int, n_vars: int, max_lag: int
+) -> Tuple[np.ndarray, np.ndarray, int, int]:
+    """`granger_f_tests` computed from a `GrangerMoments` cross-product matrix."""
+    effects = varying_effects(cross_products, n_rows, n_vars, max_lag)
+    f_stats = f_statistics(cross_products, n_rows, n_vars, max_lag, effects)
+    return finish_f_tests(f_stats, max_lag, n_rows)
+
+
+def degrees_of_freedom(n_rows: int, max_lag: int) -> Tuple[int, int]:
+    df_den = n_rows - 2 * max_lag - 1
+    if max_lag < 1 or df_den < 1:
+        raise ValueError(
+            f"{n_rows} usable observations are too few for a lag-{max_lag} Granger test."
+        )
+    return max_lag, df_den
+
+
+def varying_effects(cross_products: np.ndarray, n_rows: int, n_vars: int, max_lag: int) -> np.ndarray:
+    """Indices of the series that are not constant; only these can be effects or causes."""
+    current = 1 + max_lag * n_vars + np.arange(n_vars)
+    second_moment = np.diag(cross_products)[current] / n_rows
+    variance = second_moment - (cross_products[0, current] / n_rows) ** 2
+    return np.flatnonzero(variance > _CONSTANT_TOL * np.maximum(second_moment, _TINY))
+
+
+def finish_f_tests(f_stats: np.ndarray, max_lag: int, n_rows: int) -> Tuple[np.ndarray, np.ndarray, int, int]:
+    """Blanks the diagonal and constant causes, then adds p-values, for assembled `f_statistics` columns."""
+    df_num, df_den = degrees_of_freedom(n_rows, max_lag)
+    f_stats = f_stats.copy()
+    f_stats[np.isnan(f_stats).all(axis=0), :] = np.nan
+    np.fill_diagonal(f_stats, np.nan)
+    return f_stats, f_sf(f_stats, df_num, df_den), df_num, df_den
+
+
+def f_statistics(
+    cross_products: np.ndarray, n_rows: int, n_vars: int, max_lag: int, effects: np.ndarray
+) -> np.ndarray:
+    """
+    (N, N) F statistics filled in for the columns (effects) listed in
+    `effects` and NaN elsewhere. Blocks of effects can be computed
+    independently, e.g. in separate processes, and combined with
+    `finish_f_tests`.
+    """
+    N, p = n_vars, max_lag
+    df_num, df_den = degrees_of_freedom(n_rows, p)
+    current = 1 + p * N + np.arange(N)
+
+    # Rescaling columns leaves every F statistic unchanged and keeps the
+    # ridges below meaningful whatever the units.
+    diag = np.diag(cross_products)
+    scale = 1.0 / np.sqrt(np.where(diag > 0, diag, 1.0))
+    S = cross_products * scale[:, None] * scale[None, :]
+
+    # lag_index[i, k] is the design column of series i at lag k + 1.
+    lag_index = 1 + np.arange(p)[None, :] * N + np.arange(N)[:, None]
+    lag_gram = S[lag_index[:, :, None], lag_index[:, None, :]]
+    ridge_restricted = 1e-9 * np.eye(p + 1)
+    ridge = 1e-9 * np.eye(p)
+
+    f_stats = np.full((N, N), np.nan)
+    effects = np.asarray(effects, dtype=np.int64)
+    for start in range(0, effects.size, EFFECT_CHUNK):
+        chunk = effects[start:start + EFFECT_CHUNK]
+        y = current[chunk]
+        # Restricted design columns per effect: intercept and own lags.
+        restricted = np.hstack([np.zeros((chunk.size, 1), dtype=int), lag_index[chunk]])
+        gram_restricted = S[restricted[:, :, None], restricted[:, None, :]] + ridge_restricted
+        s_ry = S[restricted, y[:, None]]
+        solved_ry = np.linalg.solve(gram_restricted, s_ry[..., None])[..., 0]
+        rss_restricted = S[y, y] - np.einsum("jk,jk->j", s_ry, solved_ry)
+
+        s_lr = S[lag_index[None, :, :, None], restricted[:, None, None, :]]
+        solved_rl = np.linalg.solve(
+            np.broadcast_to(gram_restricted[:, None], (chunk.size, N, p + 1, p + 1)),
+            s_lr.transpose(0, 1, 3, 2),
+        )
+        gram = lag_gram[None] - s_lr @ solved_rl
+        cross = S[lag_index[None], y[:, None, None]] - np.einsum("jnpk,jk->jnp", s_lr, solved_ry)
+        coef = np.linalg.solve(gram + ridge, cross[..., None])[..., 0]
+        explained = np.einsum("jnp,jnp->jn", cross, coef)
+        rss_unrestricted = np.maximum(rss_restricted[:, None] - explained, _TINY)
+        f_stats[:, chunk] = ((explained / df_num) / (rss_unrestricted / df_den)).T
+    return f_stats
+
+
+def f_sf(f: np.ndarray, d1: float, d2: float) -> np.ndarray:
+    """Survival function of the F(d1, d2) distribution; NaN in, NaN out."""
+    f = np.asarray(f, dtype=np.float64)
+    x = d2 / (d2 + d1 * np.clip(f, 0.0, None))
+    return regularized_beta(d2 / 2.0, d1 / 2.0, x)
+
+
+def regularized_beta(a: float, b: float, x: np.ndarray) -> np.ndarray:
+    """
+    Regularized incomplete beta I_x(a, b), vectorized over `x`, by Lentz's
+    continued fraction (Numerical Recipes `betai`).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(x.shape, np.nan)
+    valid = ~np.isnan(x)
+    out[valid & (x <= 0)] = 0.0
+    out[valid & (x >= 1)] = 1.0
+    inner = valid & (x > 0) & (x < 1)
+    if not inner.any():
+        return out
+
+    xs = x[inner]
+    # The fraction converges fast only below the mean; use symmetry above it.
+    swap = xs > (a + 1.0) / (a + b + 2.0)
+    aa = np.where(swap, b, a)
+    bb = np.where(swap, a, b)
+    xx = np.where(swap, 1.0 - xs, xs)
+    log_beta = math.lgamma(a) + math.lgamma(b) - math.lgamma(a + b)
+    front = np.exp(aa * np.log(xx) + bb * np.log1p(-xx) - log_beta) / aa
+    fraction = front * _beta_continued_fraction(aa, bb, xx)
+    out[inner] = np.where(swap, 1.0 - fraction, fraction)
+    return out
+
+
+def _beta_continued_fraction(a: np.ndarray, b: np.ndarray, x: np.ndarray) -> np.ndarray:
+    def guard(v):
+        return np.where(np.abs(v) < _TINY, _TINY, v)
+
+    qab, qap, qam = a + b, a + 1.0, a - 1.0
+    c = np.ones_like(x)
+    d = 1.0 / guard(1.0 - qab * x / qap)
+    h = d.copy()
+    for m in range(1, _BETACF_MAX_ITER + 1):
+        m2 = 2 * m
+        step = m * (b - m) * x / ((qam + m2) * (a + m2))
+        d = 1.0 / guard(1.0 + step * d)
+        c = guard(1.0 + step / c)
+        h *= d * c
+        step = -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))
+        d = 1.0 / guard(1.0 + step * d)
+        c = guard(1.0 + step / c)
+        delta = d * c
+        h *= delta
+        if np.all(np.abs(delta - 1.0) < _BETACF_EPS):
+            break
+    return h
+
+
+def benjamini_hochberg(p_values: np.ndarray) -> np.ndarray:
+    """False-discovery-rate adjusted q-values for the non-NaN entries of `p_values`."""
+    p_values = np.asarray(p_values, dtype=np.float64)
+    q_values = np.full(p_values.shape, np.nan)
+    mask = ~np.isnan(p_values)
+    flat = p_values[mask]
+    if flat.size == 0:
+        return q_values
+    order = np.argsort(flat)
+    ranked = flat[order] * flat.size / np.arange(1, flat.size + 1)
+    ranked = np.minimum.accumulate(ranked[::-1])[::-1]
+    adjusted = np.empty_like(flat)
+    adjusted[order] = np.minimum(ranked, 1.0)
+    q_values[mask] = adjusted
+    return q_values
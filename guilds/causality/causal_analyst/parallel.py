@@ -0,0 +1,136 @@
+"""
+Process-pool execution of Granger tests.
+
+The cross-product matrix of a `GrangerMoments` is copied once into a
+`multiprocessing.shared_memory` block; each worker maps it read-only and
+computes the F statistics for one block of effects (see
+`granger.f_statistics`), so no job pickles the matrix. All analyses in the
+process share one pool, sized from the environment:
+
+    AGORA_CAUSAL_WORKERS          worker processes (default: CPU count)
+    AGORA_CAUSAL_PARALLEL_MIN_VARS  smaller problems run in a thread instead (default 64)
+
+Cancelling the awaiting task, or `should_cancel()` turning true, cancels
+every block that has not started; blocks already running finish in the
+background and their results are dropped.
+"""
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from .granger import (
+    GrangerMoments, degrees_of_freedom, f_statistics, finish_f_tests, varying_effects,
+)
+
+logger = logging.getLogger(__name__)
+
+# How often a pending computation checks `should_cancel`.
+CANCEL_POLL_S = 0.05
+
+
+class DiscoveryCancelled(Exception):
+    """Raised when a causal discovery run is cancelled through `should_cancel`."""
+
+
+def _f_statistics_block(
+    shm_name: str, shape: Tuple[int, int], n_rows: int, n_vars: int, max_lag: int, effects: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Worker entry point: F statistics for `effects`, read from shared memory."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        f_stats = f_statistics(
+            np.ndarray(shape, dtype=np.float64, buffer=shm.buf), n_rows, n_vars, max_lag, effects
+        )
+    finally:
+        shm.close()
+    return effects, f_stats[:, effects]
+
+
+def _block_effects(effects: np.ndarray, workers: int) -> List[np.ndarray]:
+    """Splits effects into about two blocks per worker so stragglers even out."""
+    blocks = max(1, min(effects.size, 2 * workers))
+    return [block for block in np.array_split(effects, blocks) if block.size]
+
+
+async def pooled_f_tests(
+    moments: GrangerMoments,
+    should_cancel: Optional[Callable[[], bool]] = None,
+    pool: Optional[ProcessPoolExecutor] = None,
+) -> Tuple[np.ndarray, np.ndarray, int, int]:
+    """
+    `moments.f_tests()` without blocking the event loop. Large problems are
+    split into effect blocks that run in the discovery process pool.
+    """
+    degrees_of_freedom(moments.n_rows, moments.max_lag)
+    min_vars = int(os.getenv("AGORA_CAUSAL_PARALLEL_MIN_VARS", 64))
+    if moments.n_vars < min_vars:
+        thread_job = asyncio.ensure_future(asyncio.to_thread(moments.f_tests))
+        results = [result async for result in _cancellable([thread_job], should_cancel)]
+        return results[0]
+
+    pool = pool or get_discovery_pool()
+    cross_products = moments.cross_products
+    effects = varying_effects(cross_products, moments.n_rows, moments.n_vars, moments.max_lag)
+    f_stats = np.full((moments.n_vars, moments.n_vars), np.nan)
+    if effects.size == 0:
+        return finish_f_tests(f_stats, moments.max_lag, moments.n_rows)
+
+    shm = shared_memory.SharedMemory(create=True, size=cross_products.nbytes)
+    try:
+        np.ndarray(cross_products.shape, dtype=np.float64, buffer=shm.buf)[:] = cross_products
+        loop = asyncio.get_running_loop()
+        futures = [
+            loop.run_in_executor(
+                pool, _f_statistics_block, shm.name, cross_products.shape,
+                moments.n_rows, moments.n_vars, moments.max_lag, block,
+            )
+            for block in _block_effects(effects, discovery_workers())
+        ]
+        async for block, columns in _cancellable(futures, should_cancel):
+            f_stats[:, block] = columns
+    finally:
+        shm.close()
+        shm.unlink()
+    return finish_f_tests(f_stats, moments.max_lag, moments.n_rows)
+
+
+async def _cancellable(futures: List[asyncio.Future], should_cancel: Optional[Callable[[], bool]]):
+    """Yields results as `futures` complete, cancelling the rest on cancellation or error."""
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, timeout=CANCEL_POLL_S, return_when=asyncio.FIRST_COMPLETED
+            )
+            for future in done:
+                yield future.result()
+            if pending and should_cancel is not None and should_cancel():
+                raise DiscoveryCancelled("Causal discovery cancelled.")
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def discovery_workers() -> int:
+    return int(os.getenv("AGORA_CAUSAL_WORKERS", 0)) or os.cpu_count() or 1
+
+
+def get_discovery_pool() -> ProcessPoolExecutor:
+    """The process-wide pool for causal discovery, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = discovery_workers()
+            _pool = ProcessPoolExecutor(max_workers=workers)
+            logger.info(f"Started causal discovery pool with {workers} worker(s).")
+        return _pool
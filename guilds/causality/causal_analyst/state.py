@@ -0,0 +1,188 @@
+"""
+Persistent causal-discovery state for one subject.
+
+`CausalState` keeps the sufficient statistics of the Granger tests (a
+`GrangerMoments` over each ticker's sentiment and return series) together
+with the sentiment accumulated for the still-open time bin. New insights only
+touch the open bin, and closing k bins is a single rank-k update, so an
+update costs O(new data) however much history the state has absorbed.
+
+Bins close when an insight arrives past their end. An insight whose bin has
+already closed counts toward the open bin, i.e. toward the time it became
+known. The state is stored as a user-scoped `.npz` artifact per subject, so
+it carries over between sessions.
+"""
+import datetime
+import hashlib
+import io
+import json
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .granger import GrangerMoments
+
+DEFAULT_MAX_LAG = 2
+# One week of hourly bins.
+DEFAULT_BINS = 168
+DEFAULT_BIN_SECONDS = 3600
+# Insight keys remembered to skip re-delivered insights.
+MAX_SEEN_INSIGHTS = 5000
+
+SENTIMENT_SCORES = {"Positive": 1.0, "Negative": -1.0}
+
+
+def causal_state_filename(subject: str) -> str:
+    """User-scoped artifact holding the causal state for `subject`."""
+    return f"user:{subject}_causal_state.npz"
+
+
+def parse_timestamp(value: str) -> float:
+    """Epoch seconds for an ISO-8601 timestamp; naive timestamps are taken as UTC."""
+    parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed.timestamp()
+
+
+def insight_key(insight: Dict[str, Any]) -> str:
+    if insight.get("content_hash"):
+        return insight["content_hash"]
+    material = f"{insight.get('headline', '')}|{insight.get('timestamp_utc', '')}"
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:16]
+
+
+class CausalState:
+    """Sentiment/return Granger statistics for a fixed list of tickers."""
+
+    def __init__(
+        self,
+        tickers: Sequence[str] = (),
+        max_lag: int = DEFAULT_MAX_LAG,
+        bin_seconds: int = DEFAULT_BIN_SECONDS,
+    ):
+        self.reset(tickers, max_lag, bin_seconds)
+        self.version = 0
+        self.links: List[Dict[str, Any]] = []
+
+    def reset(self, tickers: Sequence[str], max_lag: int, bin_seconds: int) -> None:
+        """Drops the statistics; the snapshot version and links are kept for diffing."""
+        self.tickers = list(tickers)
+        self.max_lag = max_lag
+        self.bin_seconds = bin_seconds
+        self.open_bin: Optional[float] = None
+        self.open_sums = np.zeros(len(self.tickers))
+        self.open_counts = np.zeros(len(self.tickers))
+        self.seen: List[str] = []
+        self._seen_set = set()
+        self.moments = GrangerMoments(2 * len(self.tickers), max_lag)
+
+    @property
+    def variables(self) -> List[str]:
+        return [name for ticker in self.tickers for name in (f"{ticker} news sentiment", f"{ticker} returns")]
+
+    def matches(self, tickers: Sequence[str], max_lag: int, bin_seconds: int) -> bool:
+        return (
+            self.tickers == list(tickers) and self.max_lag == max_lag
+            and self.bin_seconds == bin_seconds and self.open_bin is not None
+        )
+
+    def ingest(
+        self,
+        insights_by_ticker: Dict[str, List[Dict[str, Any]]],
+        price_returns: Callable[[str, np.ndarray], np.ndarray],
+        bins: int = DEFAULT_BINS,
+    ) -> int:
+        """
+        Folds in insights not seen before and closes every bin that ended
+        before the newest of them. `price_returns(ticker, bin_starts)` supplies
+        the log return over each closed bin. A fresh state, or one idle for
+        longer than `bins` bins, starts over with a window of `bins` bins.
+        Returns the number of bins closed.
+        """
+        bs = self.bin_seconds
+        columns, times, scores = [], [], []
+        for column, ticker in enumerate(self.tickers):
+            for insight in insights_by_ticker.get(ticker, []):
+                key = insight_key(insight)
+                if key in self._seen_set or not insight.get("timestamp_utc"):
+                    continue
+                self._remember(key)
+                columns.append(column)
+                times.append(parse_timestamp(insight["timestamp_utc"]))
+                scores.append(SENTIMENT_SCORES.get(insight.get("sentiment"), 0.0))
+
+        newest = max(times) if times else datetime.datetime.now(datetime.timezone.utc).timestamp()
+        if self.open_bin is not None:
+            newest = max(newest, self.open_bin)
+        target = np.floor(newest / bs) * bs
+        if self.open_bin is None or (target - self.open_bin) / bs >= bins:
+            self.moments = GrangerMoments(2 * len(self.tickers), self.max_lag)
+            self.open_sums[:] = 0.0
+            self.open_counts[:] = 0.0
+            self.open_bin = target - bs * (bins - 1)
+
+        closing = int(round((target - self.open_bin) / bs))
+        sums = np.zeros((closing + 1, len(self.tickers)))
+        counts = np.zeros((closing + 1, len(self.tickers)))
+        sums[0] += self.open_sums
+        counts[0] += self.open_counts
+        if times:
+            index = np.clip(np.floor((np.array(times) - self.open_bin) / bs), 0, closing).astype(np.int64)
+            np.add.at(sums, (index, np.array(columns)), np.array(scores))
+            np.add.at(counts, (index, np.array(columns)), 1.0)
+
+        if closing:
+            closed = self.open_bin + bs * np.arange(closing, dtype=np.float64)
+            rows = np.empty((closing, 2 * len(self.tickers)))
+            rows[:, 0::2] = sums[:-1] / np.maximum(counts[:-1], 1.0)
+            for column, ticker in enumerate(self.tickers):
+                rows[:, 2 * column + 1] = price_returns(ticker, closed)
+            self.moments.append(rows)
+
+        self.open_bin = self.open_bin + bs * closing
+        self.open_sums = sums[-1]
+        self.open_counts = counts[-1]
+        return closing
+
+    def _remember(self, key: str) -> None:
+        self.seen.append(key)
+        self._seen_set.add(key)
+        if len(self.seen) > MAX_SEEN_INSIGHTS:
+            self._seen_set.discard(self.seen.pop(0))
+
+    def to_bytes(self) -> bytes:
+        meta = {
+            "tickers": self.tickers, "max_lag": self.max_lag, "bin_seconds": self.bin_seconds,
+            "open_bin": self.open_bin, "version": self.version, "links": self.links,
+            "seen": self.seen, "n_rows": self.moments.n_rows,
+        }
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            meta=np.array(json.dumps(meta)),
+            cross_products=self.moments.cross_products,
+            history=self.moments.history,
+            open_sums=self.open_sums,
+            open_counts=self.open_counts,
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CausalState":
+        with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+            meta = json.loads(str(arrays["meta"]))
+            state = cls(meta["tickers"], meta["max_lag"], meta["bin_seconds"])
+            state.open_bin = meta["open_bin"]
+            state.version = meta["version"]
+            state.links = meta["links"]
+            for key in meta["seen"]:
+                state._remember(key)
+            state.moments = GrangerMoments(
+                2 * len(state.tickers), state.max_lag,
+                cross_products=arrays["cross_products"], history=arrays["history"],
+                n_rows=meta["n_rows"],
+            )
+            state.open_sums = arrays["open_sums"]
+            state.open_counts = arrays["open_counts"]
+        return state
@@ -1,40 +1,210 @@
-from typing import Any, Dict, List
+import asyncio
+import datetime
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-def run_causal_discovery(insights_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+import numpy as np
+
+from .granger import benjamini_hochberg
+from .parallel import pooled_f_tests
+from .state import DEFAULT_BIN_SECONDS, DEFAULT_BINS, DEFAULT_MAX_LAG, CausalState
+
+DEFAULT_ALPHA = 0.05
+# Confidence moves smaller than this are not reported as changed links.
+CONFIDENCE_TOLERANCE = 0.01
+
+
+def _hashed_normals(seed: int, keys: np.ndarray) -> np.ndarray:
+    """Standard normals that depend only on (seed, key), via splitmix64 and Box-Muller."""
+    def splitmix(x):
+        x = (x + np.uint64(0x9E3779B97F4A7C15)) & np.uint64(0xFFFFFFFFFFFFFFFF)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+    with np.errstate(over="ignore"):
+        base = keys.astype(np.uint64) ^ (np.uint64(seed) << np.uint64(32))
+        u1 = (splitmix(base) >> np.uint64(11)).astype(np.float64) / 2.0 ** 53
+        u2 = (splitmix(base ^ np.uint64(0xA5A5A5A5)) >> np.uint64(11)).astype(np.float64) / 2.0 ** 53
+    return np.sqrt(-2.0 * np.log1p(-u1)) * np.cos(2.0 * np.pi * u2)
+
+
+def fetch_price_history(ticker: str, grid: np.ndarray) -> np.ndarray:
     """
-    Simulates a causal discovery process on a list of news insights.
+    Mocks fetching closing prices for `ticker` at the end of each bin in `grid`.
+
+    Each bin's log return is a deterministic function of the ticker and the
+    bin's start time, so overlapping requests agree on every shared bin.
+    """
+    print(f"TOOL EXECUTING: fetch_price_history(ticker='{ticker}', bins={grid.size})")
+    log_returns = 0.004 * _hashed_normals(zlib.crc32(ticker.encode("utf-8")), np.asarray(grid, dtype=np.int64))
+    return 100.0 * np.exp(np.cumsum(log_returns))
+
+
+def bin_returns(ticker: str, grid: np.ndarray, bin_seconds: int = DEFAULT_BIN_SECONDS) -> np.ndarray:
+    """Log return of `ticker` over each bin in `grid`."""
+    closes = fetch_price_history(ticker, np.concatenate([[grid[0] - bin_seconds], grid]))
+    return np.diff(np.log(closes))
+
+
+def diff_links(previous: List[Dict[str, Any]], current: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Links added, removed, or whose confidence moved by at least CONFIDENCE_TOLERANCE."""
+    before = {(link["cause"], link["effect"]): link for link in previous}
+    after = {(link["cause"], link["effect"]): link for link in current}
+    return {
+        "added": [link for pair, link in after.items() if pair not in before],
+        "removed": [
+            {"cause": cause, "effect": effect, "confidence": link["confidence"]}
+            for (cause, effect), link in before.items() if (cause, effect) not in after
+        ],
+        "changed": [
+            {"cause": cause, "effect": effect,
+             "previous_confidence": before[(cause, effect)]["confidence"],
+             "confidence": link["confidence"]}
+            for (cause, effect), link in after.items()
+            if (cause, effect) in before
+            and abs(link["confidence"] - before[(cause, effect)]["confidence"]) >= CONFIDENCE_TOLERANCE
+        ],
+    }
 
-    In a real system, this would involve complex statistical algorithms.
-    Here, we mock the process by creating simple causal links based on sentiment.
+
+def run_causal_discovery(
+    insights_data: List[Dict[str, Any]],
+    subject: str = "",
+    peer_insights: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+    state: Optional[CausalState] = None,
+    max_lag: int = DEFAULT_MAX_LAG,
+    alpha: float = DEFAULT_ALPHA,
+    bins: int = DEFAULT_BINS,
+    bin_seconds: int = DEFAULT_BIN_SECONDS,
+) -> Dict[str, Any]:
+    """
+    Runs pairwise Granger causality tests over news-sentiment and price-return
+    series for `subject` and any peer tickers.
+
+    Insights are binned into a sentiment series per ticker and aligned with
+    that ticker's log returns. The series are folded into `state` (see
+    `state.py`), which already holds everything seen in earlier runs, so
+    only the new insights and newly closed bins are processed. Every ordered
+    pair of series is then tested (see `granger.py`), p-values are adjusted
+    for the false discovery rate across all pairs, and each pair with a
+    q-value below `alpha` becomes a link whose confidence is one minus its
+    q-value. Without a `state`, or when the tickers or lag settings changed,
+    the statistics are rebuilt over the last `bins` bins.
 
     Args:
         insights_data: A list of insight dictionaries from the Insight-Miner.
+        subject: Ticker the insights are about.
+        peer_insights: Optional insights for further tickers, keyed by ticker.
+        state: Causal state from the previous run; updated in place.
+        max_lag: Number of lagged bins each test uses.
+        alpha: False-discovery-rate threshold for reporting a link.
 
     Returns:
-        A dictionary representing a simplified causal graph.
+        A dictionary with the new versioned causal graph and its diff
+        against the previous version.
+    """
+    print(f"TOOL EXECUTING: run_causal_discovery(subject='{subject}', max_lag={max_lag})")
+    state = state if state is not None else CausalState()
+    closed = _ingest(state, insights_data, subject, peer_insights, max_lag, bins, bin_seconds)
+    try:
+        tests = state.moments.f_tests()
+    except ValueError:
+        tests = None
+    return _graph_result(state, tests, closed, alpha)
+
+
+async def run_causal_discovery_async(
+    insights_data: List[Dict[str, Any]],
+    subject: str = "",
+    peer_insights: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+    state: Optional[CausalState] = None,
+    max_lag: int = DEFAULT_MAX_LAG,
+    alpha: float = DEFAULT_ALPHA,
+    bins: int = DEFAULT_BINS,
+    bin_seconds: int = DEFAULT_BIN_SECONDS,
+    should_cancel: Optional[Callable[[], bool]] = None,
+) -> Dict[str, Any]:
     """
-    print(f"TOOL EXECUTING: run_causal_discovery()")
-    causal_links = []
-    
-    for insight in insights_data:
-        headline = insight.get("headline", "Unknown Headline")
-        sentiment = insight.get("sentiment", "Neutral")
-        
-        if "outlook" in headline.lower() and sentiment == "Positive":
-            link = {
-                "cause": f"Positive Sentiment in '{headline}'",
-                "effect": "Increased Positive Price Expectation",
-                "confidence": 0.75,
-                "explanation": "Positive forward-looking statements often lead to bullish sentiment."
-            }
-            causal_links.append(link)
-        elif "volatility" in headline.lower() and sentiment == "Negative":
-            link = {
-                "cause": f"Negative Sentiment in '{headline}'",
-                "effect": "Increased Market Uncertainty",
-                "confidence": 0.80,
-                "explanation": "Reports on volatility directly contribute to market uncertainty."
-            }
-            causal_links.append(link)
-
-    return {"status": "success", "causal_graph": {"links": causal_links}}
\ No newline at end of file
+    `run_causal_discovery` without blocking the event loop: ingestion runs in
+    a thread and the tests in the shared discovery process pool (see
+    `parallel.py`). Raises `DiscoveryCancelled` once `should_cancel()` turns
+    true; `state` may then hold ingested data and should be discarded.
+    """
+    print(f"TOOL EXECUTING: run_causal_discovery_async(subject='{subject}', max_lag={max_lag})")
+    state = state if state is not None else CausalState()
+    closed = await asyncio.to_thread(
+        _ingest, state, insights_data, subject, peer_insights, max_lag, bins, bin_seconds
+    )
+    try:
+        tests = await pooled_f_tests(state.moments, should_cancel)
+    except ValueError:
+        tests = None
+    return _graph_result(state, tests, closed, alpha)
+
+
+def _ingest(
+    state: CausalState,
+    insights_data: List[Dict[str, Any]],
+    subject: str,
+    peer_insights: Optional[Dict[str, List[Dict[str, Any]]]],
+    max_lag: int,
+    bins: int,
+    bin_seconds: int,
+) -> int:
+    by_ticker = {subject or "subject": insights_data, **(peer_insights or {})}
+    if not state.matches(list(by_ticker), max_lag, bin_seconds):
+        state.reset(list(by_ticker), max_lag, bin_seconds)
+    return state.ingest(
+        by_ticker, lambda ticker, grid: bin_returns(ticker, grid, bin_seconds), bins
+    )
+
+
+def _graph_result(state: CausalState, tests: Optional[Tuple], closed: int, alpha: float) -> Dict[str, Any]:
+    """Links from `tests` (the output of `f_tests`, or None with too little data), versioned and diffed."""
+    max_lag = state.max_lag
+    names = state.variables
+    links: List[Dict[str, Any]] = []
+    tested: List[str] = []
+    status = "insufficient_data"
+    if tests is not None:
+        f_stats, p_values, df_num, df_den = tests
+        tested = [name for k, name in enumerate(names) if not np.isnan(f_stats[k]).all()]
+    if len(tested) >= 2:
+        status = "success"
+        q_values = benjamini_hochberg(p_values)
+        causes, effects = np.nonzero(q_values < alpha)
+        order = np.argsort(q_values[causes, effects], kind="stable")
+        for i, j in zip(causes[order], effects[order]):
+            links.append({
+                "cause": names[i],
+                "effect": names[j],
+                "confidence": round(float(1.0 - q_values[i, j]), 4),
+                "p_value": float(p_values[i, j]),
+                "q_value": float(q_values[i, j]),
+                "f_stat": round(float(f_stats[i, j]), 4),
+                "lag": max_lag,
+                "explanation": (
+                    f"The last {max_lag} bins of {names[i]} improve the forecast of "
+                    f"{names[j]} beyond its own history (F({df_num}, {df_den}) = "
+                    f"{f_stats[i, j]:.2f}, FDR-adjusted p = {q_values[i, j]:.3g})."
+                ),
+            })
+
+    diff = diff_links(state.links, links)
+    diff.update({"from_version": state.version, "to_version": state.version + 1, "bins_closed": closed})
+    state.version += 1
+    state.links = links
+    return {
+        "status": status,
+        "version": state.version,
+        "causal_graph": {
+            "links": links, "method": "granger", "max_lag": max_lag,
+            "observations": state.moments.n_rows, "bin_seconds": state.bin_seconds,
+            "as_of_utc": datetime.datetime.fromtimestamp(
+                state.open_bin, datetime.timezone.utc
+            ).isoformat(),
+            "variables": tested,
+        },
+        "diff": diff,
+    }
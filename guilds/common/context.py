@@ -0,0 +1,26 @@
+from typing import Any, Dict, Iterable, Optional
+
+from google.adk.agents.invocation_context import InvocationContext
+
+
+def isolated_context(
+    ctx: InvocationContext,
+    state: Optional[Dict[str, Any]] = None,
+    drop_keys: Iterable[str] = (),
+) -> InvocationContext:
+    """
+    A copy of `ctx` whose session state and event history are private, for
+    running agents concurrently against one session.
+
+    The copy keeps the session id, so artifacts still land in the caller's
+    session. `state` is layered over a copy of the session state after
+    removing `drop_keys`. Nothing written to the copy reaches the real
+    session unless the caller forwards it.
+    """
+    drop = set(drop_keys)
+    private_state = {key: value for key, value in ctx.session.state.items() if key not in drop}
+    private_state.update(state or {})
+    session = ctx.session.model_copy(
+        update={"state": private_state, "events": list(ctx.session.events)}
+    )
+    return ctx.model_copy(update={"session": session})
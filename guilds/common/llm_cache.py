@@ -0,0 +1,226 @@
+"""
+Content-addressed cache for structured LLM responses.
+
+Agents that call an `LlmAgent` with an `output_schema` run it through
+`cached_llm_run()` instead of `run_async()`. The cache key is a hash of the
+model, the instruction exactly as it will be rendered from session state and
+the output schema, so re-analyzing byte-identical inputs skips the model call
+and replays the previously validated JSON.
+
+That key is only sound when the instruction is the whole prompt, so agents
+whose template carries all their inputs (`analyst_llm`, `critic_llm`,
+`auditor_llm`) set `include_contents='none'` and the model never sees the
+session history. For an agent that does depend on its history, the key also
+covers the conversation contents it would send; in a pipeline those change
+every run, so such an agent will rarely hit.
+
+Entries live in a local SQLite file with a TTL and LRU eviction. The shared
+cache returned by `get_llm_cache()` is configured from the environment:
+
+    AGORA_LLM_CACHE_PATH         SQLite file (default .agora_cache/llm_cache.sqlite)
+    AGORA_LLM_CACHE_TTL_S        entry lifetime in seconds (default one day)
+    AGORA_LLM_CACHE_MAX_ENTRIES  LRU capacity (default 10000)
+    AGORA_LLM_CACHE_DISABLED     set to 1 to always call the model
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import AsyncGenerator, Dict, Optional
+
+from google.adk.agents import LlmAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.events import Event
+# The same renderer the LLM flow uses, so the key matches the prompt actually sent.
+from google.adk.flows.llm_flows.instructions import _populate_values
+from google.genai import types
+from pydantic import ValidationError
+
+logger = logging.getLogger(__name__)
+
+# Bump to invalidate every existing entry when the key or value format changes.
+CACHE_FORMAT_VERSION = 1
+
+DEFAULT_CACHE_PATH = os.path.join(".agora_cache", "llm_cache.sqlite")
+DEFAULT_TTL_S = 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 10_000
+
+
+class LlmResponseCache:
+    """A thread-safe SQLite key/value store with TTL expiry, LRU eviction and hit/miss counters."""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        ttl_s: float = DEFAULT_TTL_S,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.metrics: Dict[str, int] = {"hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0}
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            " key TEXT PRIMARY KEY, agent TEXT, response TEXT NOT NULL,"
+            " created_at REAL NOT NULL, last_used_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS llm_responses_lru ON llm_responses (last_used_at)"
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.metrics["misses"] += 1
+                return None
+            response, created_at = row
+            if now - created_at > self.ttl_s:
+                self._db.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                self.metrics["expired"] += 1
+                self.metrics["misses"] += 1
+                return None
+            self._db.execute("UPDATE llm_responses SET last_used_at = ? WHERE key = ?", (now, key))
+            self.metrics["hits"] += 1
+            return response
+
+    def put(self, key: str, response: str, agent: str = "") -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, agent, response, created_at, last_used_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, agent, response, now, now),
+            )
+            self.metrics["stores"] += 1
+            (count,) = self._db.execute("SELECT COUNT(*) FROM llm_responses").fetchone()
+            if count > self.max_entries:
+                evicted = self._db.execute(
+                    "DELETE FROM llm_responses WHERE key IN ("
+                    " SELECT key FROM llm_responses ORDER BY last_used_at ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                ).rowcount
+                self.metrics["evictions"] += evicted
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            return self._db.execute(
+                "DELETE FROM llm_responses WHERE created_at < ?", (time.time() - self.ttl_s,)
+            ).rowcount
+
+    def stats(self) -> Dict[str, float]:
+        """Counters since start-up plus the current size and hit rate."""
+        with self._lock:
+            (size,) = self._db.execute("SELECT COUNT(*) FROM llm_responses").fetchone()
+        lookups = self.metrics["hits"] + self.metrics["misses"]
+        return {
+            **self.metrics,
+            "entries": size,
+            "hit_rate": self.metrics["hits"] / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def llm_cache_key(llm_agent: LlmAgent, ctx: InvocationContext) -> str:
+    """
+    Hash of (model, rendered instruction, output schema) for `llm_agent` in
+    `ctx`, plus the request contents unless it sets `include_contents='none'`.
+    """
+    instruction = _populate_values(
+        llm_agent.canonical_instruction(ReadonlyContext(ctx)), ctx
+    )
+    model = llm_agent.model if isinstance(llm_agent.model, str) else llm_agent.canonical_model.model
+    schema = llm_agent.output_schema.model_json_schema() if llm_agent.output_schema else None
+    key_parts = [CACHE_FORMAT_VERSION, model, instruction, schema]
+    if llm_agent.include_contents != "none":
+        # Only agents that really send their history need the flow's (private) contents builder.
+        from google.adk.flows.llm_flows.contents import _get_contents
+        key_parts.append([
+            content.model_dump(mode="json", exclude_none=True)
+            for content in _get_contents(ctx.branch, ctx.session.events, llm_agent.name)
+        ])
+    material = json.dumps(key_parts, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+async def cached_llm_run(
+    llm_agent: LlmAgent,
+    ctx: InvocationContext,
+    cache: Optional[LlmResponseCache] = None,
+) -> AsyncGenerator[Event, None]:
+    """
+    Runs `llm_agent` like `llm_agent.run_async(ctx)`, answering from the cache
+    when the same prompt was already answered.
+
+    A hit yields a single final response event carrying the cached JSON. On a
+    miss the agent runs normally, and its final response is stored once it
+    validates against `output_schema`; invalid responses are never cached.
+    """
+    if cache is None:
+        cache = get_llm_cache()
+    if cache is None:
+        async for event in llm_agent.run_async(ctx):
+            yield event
+        return
+
+    key = llm_cache_key(llm_agent, ctx)
+    cached = cache.get(key)
+    if cached is not None:
+        logger.info(f"[{llm_agent.name}] LLM cache hit ({key[:12]}); skipping model call.")
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=llm_agent.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=cached)]),
+        )
+        return
+
+    final_response_text = ""
+    async for event in llm_agent.run_async(ctx):
+        if event.is_final_response() and event.content and event.content.parts:
+            final_response_text = event.content.parts[0].text or ""
+        yield event
+
+    if not final_response_text:
+        return
+    try:
+        if llm_agent.output_schema is not None:
+            validated = llm_agent.output_schema.model_validate_json(final_response_text)
+            final_response_text = validated.model_dump_json()
+        cache.put(key, final_response_text, agent=llm_agent.name)
+    except ValidationError as e:
+        logger.warning(f"[{llm_agent.name}] Not caching response that fails its schema: {e}")
+
+
+_shared_cache: Optional[LlmResponseCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LlmResponseCache]:
+    """The process-wide cache configured from the environment, or None when disabled."""
+    global _shared_cache
+    if os.getenv("AGORA_LLM_CACHE_DISABLED", "").lower() in ("1", "true", "yes"):
+        return None
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = LlmResponseCache(
+                path=os.getenv("AGORA_LLM_CACHE_PATH", DEFAULT_CACHE_PATH),
+                ttl_s=float(os.getenv("AGORA_LLM_CACHE_TTL_S", DEFAULT_TTL_S)),
+                max_entries=int(os.getenv("AGORA_LLM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+            )
+        return _shared_cache
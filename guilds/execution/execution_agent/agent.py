@@ -1,22 +1,67 @@
 import asyncio
+import datetime
 import json
 import logging
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Dict, List, Optional
 
 from google.adk.agents import BaseAgent
 from google.adk.agents.invocation_context import InvocationContext
 from google.adk.events import Event
 from google.genai import types
 
+from guilds.risk_management.risk_guardian.tools import get_current_price
 from .broker_api import submit_order
+from .execution_log import get_execution_log
+from .slicing import (
+    ALGO_VWAP, ALGORITHMS, DEFAULT_HORIZON_S, DEFAULT_INTERVAL_S, DEFAULT_POV_RATE,
+    SliceScheduler, book_fills, get_slice_scheduler,
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class ExecutionAgent(BaseAgent):
+    """
+    Submits the latest risk-checked `TradeOrder` to the broker, saves the
+    confirmation, and records each fill in the durable portfolio store (whose
+    writes are batched across concurrent executions) and the live risk engine.
+
+    When `RiskGuardian` produced a basket (`order_files` in state), every
+    order is submitted at once; the broker gateway keeps a window of them in
+    flight, so the basket takes about one round trip per window instead of
+    one per order. Each order's confirmation is saved under its order file's
+    name (`{ticker}_trade_order_001.json` -> `{ticker}_trade_confirmation_001.json`)
+    and their names are stored under `confirmation_files`.
+
+    Large orders are sliced instead of sent whole: an order whose
+    `order_type` names an algorithm (TWAP, VWAP or POV), or a MARKET order
+    worth at least `slice_threshold_usd`, runs as a parent schedule on the
+    shared `SliceScheduler` (see `slicing.py`), over `slice_horizon_s` in
+    child orders every `slice_interval_s`. Schedules are persisted, and any
+    left unfinished by an earlier process are resumed at the start of the
+    next run; their confirmations are saved alongside this run's, as
+    `{ticker}_trade_confirmation_{parent_id}.json`.
+
+    Every confirmation is stamped with the order's arrival price and decision
+    time (from `RiskGuardian`, or taken on receipt for older orders) and the
+    mark when it completed, and is recorded with its fills and latencies in
+    the columnar execution log under `tca_tag`, for the analysis in `tca.py`.
+    """
+    slicing_algo: str = ALGO_VWAP
+    slice_threshold_usd: float = 250_000.0
+    slice_horizon_s: float = DEFAULT_HORIZON_S
+    slice_interval_s: float = DEFAULT_INTERVAL_S
+    pov_rate: float = DEFAULT_POV_RATE
+    tca_tag: str = "default"
+
     async def _run_async_impl(
         self, ctx: InvocationContext
     ) -> AsyncGenerator[Event, None]:
+        if ctx.session.state.get("order_files") is not None:
+            async for event in self._run_basket(ctx):
+                yield event
+            return
+
         logger.info(f"[{self.name}] Commencing trade execution.")
         try:
             order_filename = ctx.session.state.get("last_order_file")
@@ -25,30 +70,159 @@ class ExecutionAgent(BaseAgent):
             order_artifact = ctx.artifact_service.load_artifact(
                 app_name=ctx.app_name, user_id=ctx.user_id,
                 session_id=ctx.session.id, filename=order_filename)
-            trade_order = json.loads(order_artifact.inline_data.data.decode('utf-8'))
-
-            # Call the external (mocked) broker API
-            confirmation = await submit_order(trade_order)
-            
-            # Create the final confirmation artifact
-            confirmation_json = json.dumps(confirmation, indent=2)
-            subject = trade_order['ticker']
-            confirmation_filename = f"{subject}_trade_confirmation.json"
-            
-            artifact_part = types.Part.from_bytes(
-                data=confirmation_json.encode("utf-8"), mime_type="application/json")
-            version = ctx.artifact_service.save_artifact(
-                app_name=ctx.app_name, user_id=ctx.user_id, session_id=ctx.session.id,
-                filename=confirmation_filename, artifact=artifact_part)
-            
-            final_text = f"Execution successful. Confirmation artifact '{confirmation_filename}' (v{version}) created."
+            trade_order = self._stamp_decision(json.loads(order_artifact.inline_data.data.decode('utf-8')))
+
+            # Send the order through the pooled gateway, sliced when it is large.
+            scheduler = get_slice_scheduler()
+            resumed = scheduler.resume()
+            confirmation, *resumed_results = await asyncio.gather(
+                self._execute(scheduler, trade_order), *resumed, return_exceptions=True
+            )
+            resumed_confirmations = self._completed(resumed_results, "resumed schedule")
+            if isinstance(confirmation, BaseException):
+                raise confirmation
+            self._capture_tca([confirmation] + resumed_confirmations)
+            confirmation_filename, version = self._save_confirmation(ctx, confirmation)
+            for resumed_confirmation in resumed_confirmations:
+                self._save_confirmation(ctx, resumed_confirmation, self._resumed_filename(resumed_confirmation))
+
+            final_text = (
+                f"Execution {confirmation['status']}. Confirmation artifact "
+                f"'{confirmation_filename}' (v{version}) created."
+            )
+            if resumed_confirmations:
+                final_text += f" Completed {len(resumed_confirmations)} schedule(s) resumed from an earlier run."
             logger.info(f"[{self.name}] {final_text}")
-                
+
         except Exception as e:
             final_text = f"Execution-Agent failed. Error: {e}"
             logger.error(f"[{self.name}] {final_text}", exc_info=True)
-        
+
         yield Event(author=self.name, content=types.Content(parts=[types.Part(text=final_text)]))
 
+    async def _run_basket(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        order_files: List[str] = list(ctx.session.state.get("order_files"))
+        logger.info(f"[{self.name}] Commencing basket execution of {len(order_files)} order(s).")
+        try:
+            trade_orders = []
+            for order_filename in order_files:
+                order_artifact = ctx.artifact_service.load_artifact(
+                    app_name=ctx.app_name, user_id=ctx.user_id,
+                    session_id=ctx.session.id, filename=order_filename)
+                trade_orders.append(self._stamp_decision(json.loads(order_artifact.inline_data.data.decode('utf-8'))))
+
+            scheduler = get_slice_scheduler()
+            resumed = scheduler.resume()
+            # Each order books its own fills as soon as it completes, so one failure cannot strand the others.
+            results = await asyncio.gather(
+                *(self._execute(scheduler, order) for order in trade_orders), *resumed, return_exceptions=True
+            )
+            # Confirmations keep their order file's name, so same-ticker orders never overwrite each other.
+            confirmation_names = [name.replace("_trade_order", "_trade_confirmation") for name in order_files]
+            completed = [
+                (name, result) for name, result in zip(confirmation_names, results)
+                if not isinstance(result, BaseException)
+            ]
+            confirmations = self._completed(results[:len(trade_orders)], "order")
+            resumed_confirmations = self._completed(results[len(trade_orders):], "resumed schedule")
+            failed = len(trade_orders) - len(confirmations)
+            self._capture_tca(confirmations + resumed_confirmations)
+
+            confirmation_files = [
+                self._save_confirmation(ctx, confirmation, name)[0] for name, confirmation in completed
+            ] + [
+                self._save_confirmation(ctx, confirmation, self._resumed_filename(confirmation))[0]
+                for confirmation in resumed_confirmations
+            ]
+            ctx.session.state["confirmation_files"] = confirmation_files
+
+            statuses: Dict[str, int] = {}
+            for confirmation in confirmations:
+                statuses[confirmation["status"]] = statuses.get(confirmation["status"], 0) + 1
+            if failed:
+                statuses["FAILED"] = failed
+            summary = ", ".join(f"{count} {status}" for status, count in sorted(statuses.items()))
+            final_text = (
+                f"Basket execution complete: {len(trade_orders)} order(s) ({summary or 'none'}). "
+                f"Created {len(confirmation_files)} confirmation artifact(s)."
+            )
+            if resumed_confirmations:
+                final_text += f" Completed {len(resumed_confirmations)} schedule(s) resumed from an earlier run."
+            logger.info(f"[{self.name}] {final_text}")
+
+        except Exception as e:
+            final_text = f"Execution-Agent failed. Error: {e}"
+            logger.error(f"[{self.name}] {final_text}", exc_info=True)
+
+        yield Event(author=self.name, content=types.Content(parts=[types.Part(text=final_text)]))
+
+    async def _execute(self, scheduler: SliceScheduler, trade_order: Dict) -> Dict:
+        """Executes one order, sliced or whole, and books its fills."""
+        algo = self._algo_for(trade_order)
+        if algo is not None:
+            # The scheduler books each child's fills as it completes.
+            return await scheduler.execute(self._new_schedule(scheduler, trade_order, algo))
+        confirmation = await submit_order(trade_order)
+        # Book the fills so positions survive restarts and risk checks see them.
+        await book_fills(trade_order["ticker"], trade_order["action"], confirmation)
+        confirmation.update(arrival_price=trade_order["arrival_price"], decision_utc=trade_order["decision_utc"])
+        return confirmation
+
+    def _completed(self, results: List[Any], kind: str) -> List[Dict]:
+        """The confirmations among gathered results; failures are logged and left out."""
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.error(f"[{self.name}] {kind.capitalize()} failed: {result}", exc_info=result)
+        return [result for result in results if not isinstance(result, BaseException)]
+
+    def _algo_for(self, trade_order: Dict) -> Optional[str]:
+        """The slicing algorithm for an order, or None to send it whole."""
+        order_type = str(trade_order.get("order_type", "MARKET")).upper()
+        if order_type in ALGORITHMS:
+            return order_type
+        if order_type == "MARKET" and trade_order.get("notional_value_usd", 0.0) >= self.slice_threshold_usd:
+            return self.slicing_algo
+        return None
+
+    def _new_schedule(self, scheduler: SliceScheduler, trade_order: Dict, algo: str):
+        return scheduler.new_schedule(
+            trade_order["ticker"], trade_order["action"], trade_order["quantity"], algo,
+            horizon_s=self.slice_horizon_s, interval_s=self.slice_interval_s, participation_rate=self.pov_rate,
+            arrival_price=trade_order["arrival_price"], decision_utc=trade_order["decision_utc"],
+        )
+
+    @staticmethod
+    def _stamp_decision(trade_order: Dict) -> Dict:
+        """Fills in the arrival price and decision time of an order that was created without them."""
+        if trade_order.get("arrival_price") is None:
+            trade_order["arrival_price"] = get_current_price(trade_order["ticker"])
+        if not trade_order.get("decision_utc"):
+            trade_order["decision_utc"] = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None).isoformat()
+        return trade_order
+
+    def _capture_tca(self, confirmations: List[Dict[str, Any]]) -> None:
+        """Stamps each confirmation with the completion mark and records it in the execution log."""
+        execution_log = get_execution_log()
+        for confirmation in confirmations:
+            confirmation["completion_price"] = get_current_price(confirmation["ticker"])
+            execution_log.record(confirmation, self.tca_tag)
+        execution_log.flush()
+
+    @staticmethod
+    def _resumed_filename(confirmation: Dict[str, Any]) -> str:
+        return f"{confirmation['ticker']}_trade_confirmation_{confirmation['execution_id']}.json"
+
+    @staticmethod
+    def _save_confirmation(
+        ctx: InvocationContext, confirmation: Dict[str, Any], confirmation_filename: Optional[str] = None,
+    ):
+        confirmation_filename = confirmation_filename or f"{confirmation['ticker']}_trade_confirmation.json"
+        artifact_part = types.Part.from_bytes(
+            data=json.dumps(confirmation, indent=2).encode("utf-8"), mime_type="application/json")
+        version = ctx.artifact_service.save_artifact(
+            app_name=ctx.app_name, user_id=ctx.user_id, session_id=ctx.session.id,
+            filename=confirmation_filename, artifact=artifact_part)
+        return confirmation_filename, version
+
 # This line is crucial for the agent to be discoverable.
-root_agent = ExecutionAgent(name="execution_agent")
\ No newline at end of file
+root_agent = ExecutionAgent(name="execution_agent")
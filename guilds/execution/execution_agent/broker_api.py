@@ -1,30 +1,32 @@
-import asyncio
-import datetime
-import uuid
-from typing import Dict
+from typing import Dict, List
+
+from .gateway import get_broker_gateway
 
 async def submit_order(trade_order: Dict) -> Dict:
     """
-    Mocks the submission of a trade order to a brokerage API.
-    
-    In a real system, this would involve network requests, authentication,
-    and error handling with a real broker like Interactive Brokers or Alpaca.
+    Submits a trade order to the broker through the shared `BrokerGateway`.
+
+    The gateway reuses pooled venue sessions and batches concurrent orders,
+    so many calls in flight at once cost about one round trip per window
+    rather than one each. Returns the confirmation once the order is filled,
+    done with a partial fill, or rejected; it lists every fill with its price.
     """
     ticker = trade_order.get('ticker')
     action = trade_order.get('action')
     quantity = trade_order.get('quantity')
-    
+
     print(f"BROKER API: Submitting order to market -> {action} {quantity} shares of {ticker}.")
-    
-    # Simulate a successful execution.
-    await asyncio.sleep(0.5) # Mock network latency
-    
-    confirmation = {
-        "status": "FILLED",
-        "execution_id": str(uuid.uuid4()),
-        "timestamp_utc": datetime.datetime.utcnow().isoformat(),
-        "filled_quantity": quantity,
-        "notes": "Order successfully executed via mock broker API."
-    }
-    print(f"BROKER API: Received confirmation ID {confirmation['execution_id']}.")
-    return confirmation
\ No newline at end of file
+    confirmation = await get_broker_gateway().submit(trade_order)
+    print(
+        f"BROKER API: Received {confirmation['status']} confirmation ID {confirmation['execution_id']} "
+        f"({confirmation['filled_quantity']}/{quantity} shares)."
+    )
+    return confirmation
+
+async def submit_orders(trade_orders: List[Dict]) -> List[Dict]:
+    """Submits a basket of trade orders concurrently; confirmations come back in input order."""
+    print(f"BROKER API: Submitting basket of {len(trade_orders)} orders to market.")
+    confirmations = await get_broker_gateway().submit_many(trade_orders)
+    filled = sum(1 for c in confirmations if c["filled_quantity"])
+    print(f"BROKER API: Basket complete, {filled}/{len(trade_orders)} orders with fills.")
+    return confirmations
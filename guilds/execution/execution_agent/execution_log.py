@@ -0,0 +1,203 @@
+"""
+Columnar execution log for transaction cost analysis.
+
+`ExecutionLog` records every executed order as one row of an orders table
+and each of its fills as one row of a fills table. Rows are buffered in
+memory and written as numbered segments, one `.npz` file per table per
+segment (`orders-000001.npz`, `fills-000001.npz`), each holding one NumPy
+array per column. A segment is written once `segment_rows` fills are
+buffered, or on `flush()`; a segment is first written under a temporary name
+and then renamed, so a reader never sees a torn file. `load()` concatenates
+the segments column by column, which is all the vectorized analysis in
+`tca.py` needs, and `compact()` merges small segments into one. A directory
+has one writing process; any number may read it.
+
+Timestamps are int64 nanoseconds since the epoch (0 when unknown) and
+prices are float64 (NaN when unknown). Orders columns:
+
+    order_id, ticker, side (+1 BUY / -1 SELL), algo, status, tag,
+    order_quantity, filled_quantity, average_price, arrival_price,
+    completion_price, decision_ns, sent_ns, completed_ns
+
+Fills columns:
+
+    fill_id, order_id, ticker, side, algo, tag, quantity, price,
+    arrival_price, decision_ns, sent_ns, fill_ns
+
+The shared log is configured from the environment:
+
+    AGORA_TCA_DIR            segment directory (default .agora_cache/tca)
+    AGORA_TCA_SEGMENT_ROWS   fills buffered before a segment is written (default 4096)
+"""
+import glob
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from guilds.microstructure.market_microstructure_analyst.wire_format import parse_timestamp_ns
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIR = os.path.join(".agora_cache", "tca")
+DEFAULT_SEGMENT_ROWS = 4096
+
+ORDER_COLUMNS: Dict[str, str] = {
+    "order_id": "U48", "ticker": "U16", "side": "i1", "algo": "U8", "status": "U20", "tag": "U32",
+    "order_quantity": "f8", "filled_quantity": "f8", "average_price": "f8", "arrival_price": "f8",
+    "completion_price": "f8", "decision_ns": "i8", "sent_ns": "i8", "completed_ns": "i8",
+}
+FILL_COLUMNS: Dict[str, str] = {
+    "fill_id": "U48", "order_id": "U48", "ticker": "U16", "side": "i1", "algo": "U8", "tag": "U32",
+    "quantity": "f8", "price": "f8", "arrival_price": "f8", "decision_ns": "i8", "sent_ns": "i8", "fill_ns": "i8",
+}
+
+Table = Dict[str, np.ndarray]
+
+
+def _ns(timestamp_utc: Optional[str]) -> int:
+    return parse_timestamp_ns(timestamp_utc) if timestamp_utc else 0
+
+
+def _price(value: Optional[float]) -> float:
+    return float(value) if value is not None else float("nan")
+
+
+def _table(rows: List[tuple], columns: Dict[str, str]) -> Table:
+    if not rows:
+        return {name: np.empty(0, dtype=dtype) for name, dtype in columns.items()}
+    return {
+        name: np.array(values, dtype=dtype)
+        for (name, dtype), values in zip(columns.items(), zip(*rows))
+    }
+
+
+def _concat(tables: List[Table], columns: Dict[str, str]) -> Table:
+    if not tables:
+        return _table([], columns)
+    # Fixed-width strings may differ in width between segments; the result takes the declared dtype.
+    return {name: np.concatenate([t[name] for t in tables]).astype(dtype, copy=False) for name, dtype in columns.items()}
+
+
+class ExecutionLog:
+    """An append-only columnar log of orders and fills; see the module docstring."""
+
+    def __init__(self, directory: str = DEFAULT_DIR, segment_rows: int = DEFAULT_SEGMENT_ROWS):
+        self.directory = directory
+        self.segment_rows = segment_rows
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._orders: List[tuple] = []
+        self._fills: List[tuple] = []
+        existing = self._segments("orders")
+        self._next_index = self._index(existing[-1]) + 1 if existing else 1
+
+    def record(self, confirmation: Dict[str, Any], tag: str = "") -> None:
+        """
+        Buffers one order and its fills from an execution confirmation. Beyond
+        the gateway's fields, the confirmation should carry `arrival_price`,
+        `decision_utc` and `completion_price` (the mark when it finished).
+        """
+        side = 1 if str(confirmation.get("action", "BUY")).upper() == "BUY" else -1
+        order_id = confirmation["execution_id"]
+        algo = confirmation.get("algo") or "MARKET"
+        arrival = _price(confirmation.get("arrival_price"))
+        decision_ns = _ns(confirmation.get("decision_utc"))
+        order_sent_ns = _ns(confirmation.get("sent_utc"))
+        order = (
+            order_id, confirmation.get("ticker", ""), side, algo, confirmation.get("status", ""), tag,
+            float(confirmation.get("order_quantity") or 0), float(confirmation.get("filled_quantity") or 0),
+            _price(confirmation.get("average_price")), arrival, _price(confirmation.get("completion_price")),
+            decision_ns, order_sent_ns, _ns(confirmation.get("timestamp_utc")),
+        )
+        fills = [
+            (
+                fill["fill_id"], order_id, confirmation.get("ticker", ""), side, algo, tag,
+                float(fill["quantity"]), float(fill["price"]), arrival, decision_ns,
+                _ns(fill.get("sent_utc")) or order_sent_ns, _ns(fill.get("timestamp_utc")),
+            )
+            for fill in confirmation.get("fills", [])
+        ]
+        with self._lock:
+            self._orders.append(order)
+            self._fills.extend(fills)
+            if len(self._fills) >= self.segment_rows:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        """Writes the buffered rows as a new segment."""
+        with self._lock:
+            self._flush_locked()
+
+    def load(self) -> Tuple[Table, Table]:
+        """Every recorded order and fill, flushed or not, as `(orders, fills)` column dicts."""
+        with self._lock:
+            orders, fills = self._read_segments()
+            orders.append(_table(self._orders, ORDER_COLUMNS))
+            fills.append(_table(self._fills, FILL_COLUMNS))
+        return _concat(orders, ORDER_COLUMNS), _concat(fills, FILL_COLUMNS)
+
+    def compact(self) -> None:
+        """Merges all segments, and the buffer, into a single segment."""
+        with self._lock:
+            self._flush_locked()
+            stale = self._segments("orders") + self._segments("fills")
+            if len(stale) <= 2:
+                return
+            orders, fills = self._read_segments()
+            self._write_segment(_concat(orders, ORDER_COLUMNS), _concat(fills, FILL_COLUMNS))
+            for path in stale:
+                os.remove(path)
+
+    # ---- segments --------------------------------------------------------
+
+    def _flush_locked(self) -> None:
+        if not self._orders:
+            return
+        self._write_segment(_table(self._orders, ORDER_COLUMNS), _table(self._fills, FILL_COLUMNS))
+        self._orders, self._fills = [], []
+
+    def _write_segment(self, orders: Table, fills: Table) -> None:
+        index = self._next_index
+        self._next_index += 1
+        # Fills first: a reader lists segments by their orders file, so a segment appears complete or not at all.
+        for table, data in (("fills", fills), ("orders", orders)):
+            path = os.path.join(self.directory, f"{table}-{index:06d}.npz")
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                np.savez(f, **data)
+            os.replace(tmp, path)
+
+    def _read_segments(self) -> Tuple[List[Table], List[Table]]:
+        orders, fills = [], []
+        for path in self._segments("orders"):
+            fills_path = path.replace(f"{os.sep}orders-", f"{os.sep}fills-")
+            with np.load(path, allow_pickle=False) as o, np.load(fills_path, allow_pickle=False) as f:
+                orders.append({name: o[name] for name in ORDER_COLUMNS})
+                fills.append({name: f[name] for name in FILL_COLUMNS})
+        return orders, fills
+
+    def _segments(self, table: str) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.directory, f"{table}-*.npz")))
+
+    @staticmethod
+    def _index(path: str) -> int:
+        return int(os.path.basename(path).split("-")[1].split(".")[0])
+
+
+_log: Optional[ExecutionLog] = None
+_log_lock = threading.Lock()
+
+
+def get_execution_log() -> ExecutionLog:
+    """The process-wide execution log configured from the environment."""
+    global _log
+    with _log_lock:
+        if _log is None:
+            _log = ExecutionLog(
+                os.getenv("AGORA_TCA_DIR", DEFAULT_DIR),
+                segment_rows=int(os.getenv("AGORA_TCA_SEGMENT_ROWS", DEFAULT_SEGMENT_ROWS)),
+            )
+        return _log
@@ -0,0 +1,253 @@
+"""
+Asynchronous broker gateway.
+
+`BrokerGateway` keeps a pool of persistent venue sessions, opened once and
+reused by every order. Orders submitted within `linger_ms` of each other are
+sent together, up to `max_batch` per request, and at most `window` orders
+are in flight at once; the rest wait for a slot. Each session has a reader
+task that routes the venue's acks, fills and done reports to their orders by
+client order id, so `submit()` resolves when its own order reaches a final
+state, whatever order the reports arrive in. A basket of N orders therefore
+takes about ceil(N / window) round trips instead of N.
+
+The shared gateway for the running event loop is configured from the
+environment:
+
+    AGORA_BROKER_POOL_SIZE     persistent venue sessions (default 2)
+    AGORA_BROKER_WINDOW        orders in flight at once (default 32)
+    AGORA_BROKER_MAX_BATCH     orders per venue request (default 16)
+    AGORA_BROKER_LINGER_MS     wait for more orders before sending a batch (default 1)
+    AGORA_VENUE_LATENCY_MS     mock venue round trip (default 40)
+    AGORA_VENUE_REJECT_RATE    mock venue reject probability (default 0.02)
+    AGORA_VENUE_PARTIAL_RATE   mock venue partial-fill probability (default 0.1)
+"""
+import asyncio
+import datetime
+import itertools
+import logging
+import os
+import uuid
+import weakref
+from typing import Any, Dict, List, Optional
+
+from .mock_venue import (
+    DEFAULT_LATENCY_MS, DEFAULT_PARTIAL_RATE, DEFAULT_REJECT_RATE, MockVenue, VenueSession,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_WINDOW = 32
+DEFAULT_MAX_BATCH = 16
+DEFAULT_LINGER_MS = 1.0
+
+
+class _WorkingOrder:
+    """Gateway-side state of one order until its final report."""
+
+    __slots__ = ("order", "client_order_id", "done", "order_id", "fills", "sent_utc", "ack_utc")
+
+    def __init__(self, order: Dict[str, Any], client_order_id: str, done: asyncio.Future):
+        self.order = order
+        self.client_order_id = client_order_id
+        self.done = done
+        self.order_id: Optional[str] = None
+        self.fills: List[Dict[str, Any]] = []
+        self.sent_utc: Optional[str] = None
+        self.ack_utc: Optional[str] = None
+
+    def confirmation(self, status: str, timestamp_utc: str, notes: str) -> Dict[str, Any]:
+        filled = sum(f["quantity"] for f in self.fills)
+        return {
+            "status": status,
+            "execution_id": self.order_id or self.client_order_id,
+            "client_order_id": self.client_order_id,
+            "timestamp_utc": timestamp_utc,
+            "ticker": self.order.get("ticker"),
+            "action": self.order.get("action"),
+            "order_quantity": self.order.get("quantity"),
+            "filled_quantity": filled,
+            "average_price": sum(f["quantity"] * f["price"] for f in self.fills) / filled if filled else None,
+            "fills": self.fills,
+            "sent_utc": self.sent_utc,
+            "ack_utc": self.ack_utc,
+            "notes": notes,
+        }
+
+
+class BrokerGateway:
+    """Pooled, windowed, batching order gateway; see the module docstring."""
+
+    def __init__(
+        self,
+        venue: MockVenue,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        window: int = DEFAULT_WINDOW,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        linger_ms: float = DEFAULT_LINGER_MS,
+    ):
+        self.venue = venue
+        self.pool_size = max(1, pool_size)
+        self.window = max(1, window)
+        self.max_batch = max(1, min(max_batch, venue.max_batch))
+        self.linger_ms = linger_ms
+        self.metrics: Dict[str, int] = {"orders": 0, "requests": 0, "fills": 0, "rejects": 0}
+        self._slots = asyncio.Semaphore(self.window)
+        self._sessions: List[VenueSession] = []
+        self._readers: List[asyncio.Task] = []
+        self._connecting: Optional[asyncio.Task] = None
+        self._next_session = itertools.count()
+        self._working: Dict[str, _WorkingOrder] = {}
+        self._pending: List[_WorkingOrder] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def submit(self, order: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Sends one order (`ticker`, `action`, `quantity`, optional
+        `client_order_id`) and returns its confirmation once it is filled,
+        partially filled and done, or rejected.
+        """
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            client_order_id = order.get("client_order_id") or uuid.uuid4().hex
+            working = _WorkingOrder(order, client_order_id, loop.create_future())
+            self._working[client_order_id] = working
+            self.metrics["orders"] += 1
+            self._pending.append(working)
+            if len(self._pending) >= self.max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.linger_ms / 1000.0, self._flush)
+            try:
+                return await working.done
+            finally:
+                self._working.pop(client_order_id, None)
+
+    async def submit_many(self, orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Submits every order concurrently, bounded by the window; confirmations in input order."""
+        return list(await asyncio.gather(*(self.submit(order) for order in orders)))
+
+    async def close(self) -> None:
+        for reader in self._readers:
+            reader.cancel()
+        await asyncio.gather(*self._readers, return_exceptions=True)
+        for session in self._sessions:
+            session.close()
+        self._sessions, self._readers = [], []
+
+    # ---- sending ---------------------------------------------------------
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            asyncio.ensure_future(self._send(batch))
+
+    async def _send(self, batch: List[_WorkingOrder]) -> None:
+        try:
+            session = await self._session()
+            sent_utc = _now_utc()
+            for working in batch:
+                working.sent_utc = sent_utc
+            await session.send([
+                {"client_order_id": w.client_order_id, "ticker": w.order.get("ticker"),
+                 "action": w.order.get("action"), "quantity": w.order.get("quantity")}
+                for w in batch
+            ])
+            self.metrics["requests"] += 1
+        except Exception as e:
+            logger.error(f"Broker gateway failed to send {len(batch)} order(s): {e}")
+            for working in batch:
+                if not working.done.done():
+                    working.done.set_exception(e)
+
+    async def _session(self) -> VenueSession:
+        """A pooled session, round robin; the pool is opened on first use, all sessions in parallel."""
+        if len(self._sessions) < self.pool_size:
+            if self._connecting is None:
+                self._connecting = asyncio.ensure_future(self._open_pool())
+            await asyncio.shield(self._connecting)
+        return self._sessions[next(self._next_session) % len(self._sessions)]
+
+    async def _open_pool(self) -> None:
+        try:
+            sessions = await asyncio.gather(*(
+                self.venue.connect() for _ in range(self.pool_size - len(self._sessions))
+            ))
+            for session in sessions:
+                self._sessions.append(session)
+                self._readers.append(asyncio.ensure_future(self._read(session)))
+            logger.info(f"Broker gateway connected {len(self._sessions)} venue session(s).")
+        finally:
+            self._connecting = None
+
+    # ---- receiving -------------------------------------------------------
+
+    async def _read(self, session: VenueSession) -> None:
+        while True:
+            report = await session.reports.get()
+            working = self._working.get(report["client_order_id"])
+            if working is None:
+                logger.warning(f"Broker gateway dropped a report for unknown order {report['client_order_id']}.")
+                continue
+            kind = report["type"]
+            if kind == "ack":
+                working.order_id = report["order_id"]
+                working.ack_utc = report["timestamp_utc"]
+                if not report["accepted"]:
+                    self.metrics["rejects"] += 1
+                    self._finish(working, "REJECTED", report["timestamp_utc"], report.get("reason") or "Rejected.")
+            elif kind == "fill":
+                self.metrics["fills"] += 1
+                working.fills.append({
+                    "fill_id": report["fill_id"], "quantity": report["quantity"],
+                    "price": report["price"], "timestamp_utc": report["timestamp_utc"],
+                    "sent_utc": working.sent_utc,
+                })
+            elif kind == "done":
+                leaves = report["leaves_quantity"]
+                if leaves:
+                    status = "PARTIALLY_FILLED" if working.fills else "EXPIRED"
+                    notes = f"Venue finished the order with {leaves} share(s) unfilled."
+                else:
+                    status, notes = "FILLED", "Order fully executed via mock venue."
+                self._finish(working, status, report["timestamp_utc"], notes)
+
+    @staticmethod
+    def _finish(working: _WorkingOrder, status: str, timestamp_utc: str, notes: str) -> None:
+        if not working.done.done():
+            working.done.set_result(working.confirmation(status, timestamp_utc, notes))
+
+
+def _now_utc() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None).isoformat()
+
+
+_gateways: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, BrokerGateway]" = weakref.WeakKeyDictionary()
+
+
+def get_broker_gateway() -> BrokerGateway:
+    """The gateway for the running event loop, configured from the environment and created on first use."""
+    # Imported here: the risk tools pull in the portfolio store, which the venue only needs for prices.
+    from guilds.risk_management.risk_guardian.tools import get_current_price
+
+    loop = asyncio.get_running_loop()
+    gateway = _gateways.get(loop)
+    if gateway is None:
+        venue = MockVenue(
+            price_of=get_current_price,
+            latency_ms=float(os.getenv("AGORA_VENUE_LATENCY_MS", DEFAULT_LATENCY_MS)),
+            reject_rate=float(os.getenv("AGORA_VENUE_REJECT_RATE", DEFAULT_REJECT_RATE)),
+            partial_rate=float(os.getenv("AGORA_VENUE_PARTIAL_RATE", DEFAULT_PARTIAL_RATE)),
+        )
+        gateway = BrokerGateway(
+            venue,
+            pool_size=int(os.getenv("AGORA_BROKER_POOL_SIZE", DEFAULT_POOL_SIZE)),
+            window=int(os.getenv("AGORA_BROKER_WINDOW", DEFAULT_WINDOW)),
+            max_batch=int(os.getenv("AGORA_BROKER_MAX_BATCH", DEFAULT_MAX_BATCH)),
+            linger_ms=float(os.getenv("AGORA_BROKER_LINGER_MS", DEFAULT_LINGER_MS)),
+        )
+        _gateways[loop] = gateway
+    return gateway
@@ -0,0 +1,162 @@
+"""
+A local mock trading venue for the broker gateway.
+
+`MockVenue.connect()` opens a `VenueSession` after a handshake delay, the
+cost a pooled gateway pays once per connection rather than per order. A
+session takes requests of up to `max_batch` orders each. Every order is
+acknowledged (or rejected) after one round trip, then fills asynchronously
+in one or more pieces; the reports arrive on the session's `reports` queue,
+interleaved across orders, so the caller correlates them by
+`client_order_id`. Report shapes:
+
+    {"type": "ack",  "client_order_id", "order_id", "accepted": bool, "reason", "timestamp_utc"}
+    {"type": "fill", "client_order_id", "order_id", "fill_id", "quantity", "price", "timestamp_utc"}
+    {"type": "done", "client_order_id", "order_id", "leaves_quantity", "timestamp_utc"}
+
+Latency, the reject rate and the share of orders left partially filled are
+configurable; fill prices are the reference price plus a small random
+slippage against the order's side.
+"""
+import asyncio
+import datetime
+import itertools
+import random
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_LATENCY_MS = 40.0
+DEFAULT_CONNECT_MS = 150.0
+DEFAULT_MAX_BATCH = 50
+DEFAULT_REJECT_RATE = 0.02
+DEFAULT_PARTIAL_RATE = 0.1
+# Fills per order are spread over this many round trips after the ack.
+FILL_SPREAD_RTTS = 2.0
+
+
+def _now_utc() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None).isoformat()
+
+
+class VenueSession:
+    """One persistent connection to a `MockVenue`."""
+
+    def __init__(self, venue: "MockVenue", session_id: int):
+        self.venue = venue
+        self.session_id = session_id
+        self.reports: asyncio.Queue = asyncio.Queue()
+        self.requests_sent = 0
+        self.closed = False
+
+    async def send(self, orders: List[Dict[str, Any]]) -> None:
+        """
+        Sends one request with up to `max_batch` orders, each a dict with
+        `client_order_id`, `ticker`, `action` and `quantity`. Returns once
+        the request is on the wire; acks and fills follow on `reports`.
+        """
+        if self.closed:
+            raise ConnectionError(f"Venue session {self.session_id} is closed.")
+        if len(orders) > self.venue.max_batch:
+            raise ValueError(f"At most {self.venue.max_batch} orders per request, got {len(orders)}.")
+        self.requests_sent += 1
+        for order in orders:
+            self.venue._schedule(self, order)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class MockVenue:
+    """Simulated venue: latency, batching limits, rejects and partial fills; see the module docstring."""
+
+    def __init__(
+        self,
+        price_of: Callable[[str], float],
+        latency_ms: float = DEFAULT_LATENCY_MS,
+        connect_ms: float = DEFAULT_CONNECT_MS,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        reject_rate: float = DEFAULT_REJECT_RATE,
+        partial_rate: float = DEFAULT_PARTIAL_RATE,
+        slippage_bps: float = 2.0,
+        seed: Optional[int] = None,
+    ):
+        self.price_of = price_of
+        self.latency_ms = latency_ms
+        self.connect_ms = connect_ms
+        self.max_batch = max_batch
+        self.reject_rate = reject_rate
+        self.partial_rate = partial_rate
+        self.slippage_bps = slippage_bps
+        self._rng = random.Random(seed)
+        # Ids are unique across venue instances, so fills booked by earlier runs never collide.
+        self._id_prefix = uuid.uuid4().hex[:8].upper()
+        self._session_ids = itertools.count(1)
+        self._order_ids = itertools.count(1)
+        self._fill_ids = itertools.count(1)
+
+    async def connect(self) -> VenueSession:
+        await asyncio.sleep(self.connect_ms / 1000.0)
+        return VenueSession(self, next(self._session_ids))
+
+    def _round_trip_s(self) -> float:
+        # Jitter of +-25% around the configured latency.
+        return self.latency_ms / 1000.0 * self._rng.uniform(0.75, 1.25)
+
+    def _schedule(self, session: VenueSession, order: Dict[str, Any]) -> None:
+        loop = asyncio.get_running_loop()
+        client_order_id = order["client_order_id"]
+        order_id = f"V{self._id_prefix}-{next(self._order_ids):08d}"
+        quantity = int(order.get("quantity") or 0)
+        ack_at = self._round_trip_s()
+
+        reason = None
+        if quantity <= 0 or not order.get("ticker") or str(order.get("action", "")).upper() not in ("BUY", "SELL"):
+            reason = "Invalid order."
+        elif self._rng.random() < self.reject_rate:
+            reason = "Rejected by venue risk check."
+        loop.call_later(ack_at, self._report, session, {
+            "type": "ack", "client_order_id": client_order_id, "order_id": order_id,
+            "accepted": reason is None, "reason": reason,
+        })
+        if reason is not None:
+            return
+
+        # Split into 1-3 pieces; a partial order leaves part of the last piece unfilled.
+        pieces = self._rng.randint(1, min(3, quantity))
+        cuts = sorted(self._rng.sample(range(1, quantity), pieces - 1)) if pieces > 1 else []
+        sizes = [b - a for a, b in zip([0] + cuts, cuts + [quantity])]
+        if self._rng.random() < self.partial_rate:
+            sizes[-1] = self._rng.randint(0, sizes[-1] - 1)
+        side = 1.0 if order["action"].upper() == "BUY" else -1.0
+        reference = self.price_of(order["ticker"])
+        at = ack_at
+        reports = []
+        for size in sizes:
+            at += self._round_trip_s() * FILL_SPREAD_RTTS / len(sizes)
+            if size <= 0:
+                continue
+            slippage = side * abs(self._rng.gauss(0.0, self.slippage_bps)) / 10_000
+            reports.append((at, {
+                "type": "fill", "client_order_id": client_order_id, "order_id": order_id,
+                "fill_id": f"F{self._id_prefix}-{next(self._fill_ids):010d}", "quantity": size,
+                "price": round(reference * (1.0 + slippage), 4),
+            }))
+        done = {
+            "type": "done", "client_order_id": client_order_id, "order_id": order_id,
+            "leaves_quantity": quantity - sum(sizes),
+        }
+        # The done report rides with the last fill; timers due at the same instant may run in any order.
+        if reports:
+            for fill_at, fill in reports[:-1]:
+                loop.call_later(fill_at, self._report, session, fill)
+            loop.call_later(reports[-1][0], self._report, session, reports[-1][1], done)
+        else:
+            loop.call_later(at, self._report, session, done)
+
+    @staticmethod
+    def _report(session: VenueSession, *reports: Dict[str, Any]) -> None:
+        if session.closed:
+            return
+        timestamp = _now_utc()
+        for report in reports:
+            report["timestamp_utc"] = timestamp
+            session.reports.put_nowait(report)
@@ -0,0 +1,660 @@
+"""
+Parent order slicing: TWAP, VWAP and percent-of-volume schedules.
+
+A `ParentSchedule` turns one large order into child orders sent through the
+broker gateway over a horizon, instead of one market order for the full
+quantity:
+
+    TWAP  equal shares per unit of time.
+    VWAP  shares in proportion to a volume curve: relative volume per equal
+          bucket of the horizon, by default the U-shaped intraday profile of
+          a US session (suited to a horizon spanning the session).
+    POV   a fixed share (`participation_rate`) of the market's traded volume
+          since the schedule started, read live from the microstructure
+          guild's `VolumeTracker`. POV has no catch-up: whatever the market
+          did not trade by the end of the horizon stays unfilled.
+
+Every `interval_s` a parent compares its target quantity with what it has
+filled and sends the difference as one child order; TWAP and VWAP target
+the end of the coming interval, and a last sweep at the end of the horizon
+sends whatever partial fills and rejects left behind. A parent never has
+more than one child working. `SliceScheduler` runs any number of parents
+concurrently, all on one `TimerWheel`.
+
+Schedules and child orders are persisted in `ScheduleStore` (SQLite, WAL)
+before each child is sent and after it completes, so a restarted process
+resumes every unfinished parent mid-execution with `resume()`. A child
+that was sent but never confirmed is in doubt; its quantity is counted as
+executed, so a restart can under-fill a parent but never over-fill it.
+Fills are booked by `book_fills` as each child completes.
+
+Several processes may share one store. Each scheduler holds a lease on the
+parents it runs (an owner id and an expiry on the parent's row), renewed by
+a heartbeat every third of `lease_s`, and every write of a parent is
+conditional on still owning it. `resume()` only takes over parents whose
+lease is released (by `close()`) or expired, so a live scheduler's parents
+are never run twice; a scheduler that loses a lease stops that parent.
+
+The shared store and scheduler are configured from the environment:
+
+    AGORA_SCHEDULE_DB_PATH        SQLite file (default .agora_cache/schedules.sqlite)
+    AGORA_SLICE_WHEEL_TICK_MS     timer wheel resolution (default 50)
+    AGORA_SLICE_LEASE_S           parent lease before another process may resume it (default 30)
+"""
+import asyncio
+import datetime
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from guilds.microstructure.market_microstructure_analyst.volume import VolumeTracker, get_volume_tracker
+from .gateway import get_broker_gateway
+from .timer_wheel import DEFAULT_TICK_S, TimerWheel, WheelTimer
+
+logger = logging.getLogger(__name__)
+
+ALGO_TWAP = "TWAP"
+ALGO_VWAP = "VWAP"
+ALGO_POV = "POV"
+ALGORITHMS = (ALGO_TWAP, ALGO_VWAP, ALGO_POV)
+
+DEFAULT_HORIZON_S = 300.0
+DEFAULT_INTERVAL_S = 10.0
+DEFAULT_POV_RATE = 0.1
+# Relative volume per half hour of a US session, 09:30 to 16:00.
+DEFAULT_VOLUME_CURVE = [
+    0.115, 0.085, 0.072, 0.064, 0.058, 0.054, 0.053, 0.055, 0.060, 0.066, 0.075, 0.089, 0.154,
+]
+DEFAULT_DB_PATH = os.path.join(".agora_cache", "schedules.sqlite")
+DEFAULT_LEASE_S = 30.0
+
+STATUS_ACTIVE = "ACTIVE"
+CHILD_SENT = "SENT"
+CHILD_IN_DOUBT = "IN_DOUBT"
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS parents ("
+    " parent_id TEXT PRIMARY KEY, status TEXT NOT NULL, schedule TEXT NOT NULL, updated_at REAL NOT NULL,"
+    " owner TEXT, lease_until REAL NOT NULL DEFAULT 0)",
+    "CREATE INDEX IF NOT EXISTS parents_status ON parents (status)",
+    "CREATE TABLE IF NOT EXISTS children ("
+    " client_order_id TEXT PRIMARY KEY, parent_id TEXT NOT NULL, quantity INTEGER NOT NULL,"
+    " status TEXT NOT NULL, confirmation TEXT, updated_at REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS children_parent ON children (parent_id)",
+)
+
+
+def _now_utc() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None).isoformat()
+
+
+class ParentSchedule(BaseModel):
+    """The persisted state of one sliced parent order."""
+    parent_id: str = Field(default_factory=lambda: uuid.uuid4().hex)
+    ticker: str
+    action: str = Field(description="BUY or SELL")
+    quantity: int = Field(description="Parent order size in shares")
+    algo: str = Field(description="TWAP, VWAP or POV")
+    start_ts: float = Field(description="Schedule start, seconds since the epoch")
+    end_ts: float = Field(description="End of the horizon, seconds since the epoch")
+    interval_s: float = DEFAULT_INTERVAL_S
+    participation_rate: float = DEFAULT_POV_RATE
+    volume_curve: List[float] = Field(default_factory=lambda: list(DEFAULT_VOLUME_CURVE))
+    status: str = STATUS_ACTIVE
+    created_utc: str = Field(default_factory=_now_utc)
+    children_sent: int = 0
+    filled_quantity: int = 0
+    filled_notional_usd: float = 0.0
+    in_doubt_quantity: int = 0
+    # POV: market volume traded since the start, and the tracker reading it was last advanced from.
+    market_volume: float = 0.0
+    volume_mark: Optional[float] = None
+    final_sweep: bool = False
+    # Carried into the parent's confirmation for transaction cost analysis.
+    arrival_price: Optional[float] = None
+    decision_utc: Optional[str] = None
+
+    @property
+    def remaining(self) -> int:
+        return self.quantity - self.filled_quantity - self.in_doubt_quantity
+
+
+def curve_fraction(curve: List[float], x: float) -> float:
+    """Share of the curve's total volume in the first `x` (0 to 1) of the horizon, linear within a bucket."""
+    total = sum(curve)
+    if total <= 0:
+        return x
+    position = min(max(x, 0.0), 1.0) * len(curve)
+    bucket = min(int(position), len(curve) - 1)
+    return (sum(curve[:bucket]) + (position - bucket) * curve[bucket]) / total
+
+
+def target_quantity(schedule: ParentSchedule, now: float) -> int:
+    """Shares the schedule should have executed by `now`."""
+    if schedule.algo == ALGO_POV:
+        return min(schedule.quantity, math.floor(schedule.participation_rate * schedule.market_volume))
+    # Target the end of the coming interval, so each child covers the slice ahead of it.
+    horizon = max(schedule.end_ts - schedule.start_ts, 1e-9)
+    x = min((now + schedule.interval_s - schedule.start_ts) / horizon, 1.0)
+    fraction = x if schedule.algo == ALGO_TWAP else curve_fraction(schedule.volume_curve, x)
+    return min(schedule.quantity, math.floor(fraction * schedule.quantity + 1e-9))
+
+
+class ScheduleStore:
+    """Thread-safe SQLite persistence for parent schedules and their child orders."""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._db.execute(statement)
+        # Stores created before parent leases lack their columns.
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(parents)")}
+        if "owner" not in columns:
+            self._db.execute("ALTER TABLE parents ADD COLUMN owner TEXT")
+            self._db.execute("ALTER TABLE parents ADD COLUMN lease_until REAL NOT NULL DEFAULT 0")
+
+    def save(
+        self,
+        schedule: ParentSchedule,
+        child: Optional[Tuple[str, int, str, Optional[Dict[str, Any]]]] = None,
+        owner: Optional[str] = None,
+        lease_until: float = 0.0,
+    ) -> bool:
+        """
+        Writes the schedule and, optionally, one child `(client_order_id,
+        quantity, status, confirmation)` atomically, renewing `owner`'s lease
+        to `lease_until`. An existing parent is only written by its owner;
+        returns False, writing nothing, when `owner` no longer holds it.
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                written = self._db.execute(
+                    "INSERT INTO parents (parent_id, status, schedule, updated_at, owner, lease_until)"
+                    " VALUES (?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (parent_id) DO UPDATE SET status = excluded.status,"
+                    " schedule = excluded.schedule, updated_at = excluded.updated_at,"
+                    " lease_until = excluded.lease_until WHERE parents.owner IS excluded.owner",
+                    (schedule.parent_id, schedule.status, schedule.model_dump_json(), now, owner, lease_until),
+                ).rowcount
+                if not written:
+                    self._db.execute("ROLLBACK")
+                    return False
+                if child is not None:
+                    client_order_id, quantity, status, confirmation = child
+                    self._db.execute(
+                        "INSERT INTO children (client_order_id, parent_id, quantity, status, confirmation, updated_at)"
+                        " VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (client_order_id) DO UPDATE SET"
+                        " status = excluded.status, confirmation = excluded.confirmation, updated_at = excluded.updated_at",
+                        (client_order_id, schedule.parent_id, quantity, status,
+                         json.dumps(confirmation) if confirmation is not None else None, now),
+                    )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return True
+
+    def active(self) -> List[ParentSchedule]:
+        """Every schedule not yet finished, via the status index."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT schedule FROM parents WHERE status = ? ORDER BY updated_at", (STATUS_ACTIVE,)
+            ).fetchall()
+        return [ParentSchedule.model_validate_json(row[0]) for row in rows]
+
+    def get(self, parent_id: str) -> Optional[ParentSchedule]:
+        with self._lock:
+            row = self._db.execute("SELECT schedule FROM parents WHERE parent_id = ?", (parent_id,)).fetchone()
+        return ParentSchedule.model_validate_json(row[0]) if row else None
+
+    def children(self, parent_id: str) -> List[Dict[str, Any]]:
+        """The parent's child orders in the order they were sent."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT client_order_id, quantity, status, confirmation FROM children"
+                " WHERE parent_id = ? ORDER BY client_order_id", (parent_id,),
+            ).fetchall()
+        return [
+            {"client_order_id": c, "quantity": q, "status": s, "confirmation": json.loads(conf) if conf else None}
+            for c, q, s, conf in rows
+        ]
+
+    def take_over(self, parent_id: str, owner: str, lease_until: float) -> Optional[Tuple[ParentSchedule, int]]:
+        """
+        Claims an unfinished parent whose lease is released or expired for
+        `owner`, and marks its sent-but-unconfirmed children as in doubt, in
+        one transaction. Returns the schedule and the in-doubt quantity, or
+        None when the parent is finished or another owner's lease is live.
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                claimed = self._db.execute(
+                    "UPDATE parents SET owner = ?, lease_until = ? WHERE parent_id = ? AND status = ?"
+                    " AND (owner IS NULL OR owner = ? OR lease_until < ?)",
+                    (owner, lease_until, parent_id, STATUS_ACTIVE, owner, time.time()),
+                ).rowcount
+                if not claimed:
+                    self._db.execute("ROLLBACK")
+                    return None
+                schedule = ParentSchedule.model_validate_json(self._db.execute(
+                    "SELECT schedule FROM parents WHERE parent_id = ?", (parent_id,),
+                ).fetchone()[0])
+                quantity = self._mark_in_doubt(parent_id)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return schedule, quantity
+
+    def renew(self, owner: str, parent_ids: List[str], lease_until: float) -> List[str]:
+        """Extends `owner`'s lease on the given parents; returns the ones it no longer holds."""
+        if not parent_ids:
+            return []
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany(
+                    "UPDATE parents SET lease_until = ? WHERE parent_id = ? AND owner = ?",
+                    [(lease_until, parent_id, owner) for parent_id in parent_ids],
+                )
+                placeholders = ", ".join("?" * len(parent_ids))
+                held = {row[0] for row in self._db.execute(
+                    f"SELECT parent_id FROM parents WHERE owner = ? AND parent_id IN ({placeholders})",
+                    (owner, *parent_ids),
+                )}
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return [parent_id for parent_id in parent_ids if parent_id not in held]
+
+    def release(self, owner: str) -> None:
+        """Gives up every lease `owner` holds, so another process can resume its parents at once."""
+        with self._lock:
+            self._db.execute("UPDATE parents SET owner = NULL, lease_until = 0 WHERE owner = ?", (owner,))
+
+    def mark_in_doubt(self, parent_id: str) -> int:
+        """Marks the parent's sent-but-unconfirmed children as in doubt; returns their total quantity."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                quantity = self._mark_in_doubt(parent_id)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return quantity
+
+    def _mark_in_doubt(self, parent_id: str) -> int:
+        quantity = self._db.execute(
+            "SELECT COALESCE(SUM(quantity), 0) FROM children WHERE parent_id = ? AND status = ?",
+            (parent_id, CHILD_SENT),
+        ).fetchone()[0]
+        self._db.execute(
+            "UPDATE children SET status = ?, updated_at = ? WHERE parent_id = ? AND status = ?",
+            (CHILD_IN_DOUBT, time.time(), parent_id, CHILD_SENT),
+        )
+        return quantity
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+async def book_fills(ticker: str, action: str, confirmation: Dict[str, Any]) -> None:
+    """Records every fill of a confirmation under its own fill id, so a replayed confirmation books nothing twice."""
+    # Imported here: the risk tools pull in the portfolio store and risk engine.
+    from guilds.risk_management.risk_guardian.tools import record_fill
+
+    await asyncio.gather(*(
+        record_fill(ticker, action, fill["quantity"], fill["price"], fill["fill_id"], fill["timestamp_utc"])
+        for fill in confirmation.get("fills", [])
+    ))
+
+
+class _RunningParent:
+    __slots__ = ("schedule", "done", "timer", "child")
+
+    def __init__(self, schedule: ParentSchedule, done: asyncio.Future):
+        self.schedule = schedule
+        self.done = done
+        self.timer: Optional[WheelTimer] = None
+        self.child: Optional[asyncio.Task] = None
+
+
+class SliceScheduler:
+    """
+    Runs parent schedules concurrently on one timer wheel; see the module
+    docstring. `submit` sends one child order and returns its gateway
+    confirmation; `on_child(schedule, confirmation)` is awaited after each
+    child completes and before it is persisted as done. Parents are leased
+    to `owner_id` for `lease_s` at a time.
+    """
+
+    def __init__(
+        self,
+        submit: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+        store: ScheduleStore,
+        volume: Optional[VolumeTracker] = None,
+        wheel: Optional[TimerWheel] = None,
+        on_child: Optional[Callable[[ParentSchedule, Dict[str, Any]], Awaitable[None]]] = None,
+        lease_s: float = DEFAULT_LEASE_S,
+        owner_id: Optional[str] = None,
+    ):
+        self.submit = submit
+        self.store = store
+        self.volume = volume
+        self.wheel = wheel or TimerWheel()
+        self.on_child = on_child
+        self.lease_s = lease_s
+        self.owner_id = owner_id or uuid.uuid4().hex
+        self._running: Dict[str, _RunningParent] = {}
+        self._heartbeat: Optional[WheelTimer] = None
+
+    def new_schedule(
+        self,
+        ticker: str,
+        action: str,
+        quantity: int,
+        algo: str,
+        horizon_s: float = DEFAULT_HORIZON_S,
+        interval_s: float = DEFAULT_INTERVAL_S,
+        participation_rate: float = DEFAULT_POV_RATE,
+        volume_curve: Optional[List[float]] = None,
+        arrival_price: Optional[float] = None,
+        decision_utc: Optional[str] = None,
+    ) -> ParentSchedule:
+        """A schedule starting now. POV falls back to TWAP for a name with no live volume."""
+        algo = algo.upper()
+        if algo not in ALGORITHMS:
+            raise ValueError(f"Unknown slicing algorithm '{algo}'; expected one of {', '.join(ALGORITHMS)}.")
+        if algo == ALGO_POV and (self.volume is None or self.volume.cumulative_volume(ticker) is None):
+            logger.warning(f"No live volume for {ticker}; slicing with {ALGO_TWAP} instead of {ALGO_POV}.")
+            algo = ALGO_TWAP
+        start = time.time()
+        return ParentSchedule(
+            ticker=ticker, action=action.upper(), quantity=int(quantity), algo=algo,
+            start_ts=start, end_ts=start + horizon_s, interval_s=interval_s,
+            participation_rate=participation_rate,
+            volume_curve=list(volume_curve) if volume_curve else list(DEFAULT_VOLUME_CURVE),
+            arrival_price=arrival_price, decision_utc=decision_utc,
+        )
+
+    async def execute(self, schedule: ParentSchedule) -> Dict[str, Any]:
+        """Runs the schedule to completion and returns the parent's confirmation."""
+        return await self.start(schedule)
+
+    def start(self, schedule: ParentSchedule) -> asyncio.Future:
+        """Persists and starts the schedule; the future resolves to the parent's confirmation."""
+        running = _RunningParent(schedule, asyncio.get_running_loop().create_future())
+        if not self._save(schedule):
+            running.done.set_exception(RuntimeError(f"Parent {schedule.parent_id} is leased to another scheduler."))
+            return running.done
+        self._running[schedule.parent_id] = running
+        if self._heartbeat is None:
+            self._heartbeat = self.wheel.call_later(self.lease_s / 3, self._renew_leases)
+        logger.info(
+            f"Slicing {schedule.action} {schedule.quantity} {schedule.ticker} by {schedule.algo} "
+            f"over {schedule.end_ts - schedule.start_ts:,.0f}s (parent {schedule.parent_id})."
+        )
+        running.timer = self.wheel.call_later(max(schedule.start_ts - time.time(), 0.0), self._slice, schedule.parent_id)
+        return running.done
+
+    def resume(self) -> List[asyncio.Future]:
+        """
+        Takes over and restarts every persisted unfinished schedule that no
+        live scheduler holds: its lease was released or has expired.
+        """
+        resumed = []
+        for candidate in self.store.active():
+            if candidate.parent_id in self._running:
+                continue
+            claimed = self.store.take_over(candidate.parent_id, self.owner_id, time.time() + self.lease_s)
+            if claimed is None:
+                continue
+            schedule, in_doubt = claimed
+            if in_doubt:
+                schedule.in_doubt_quantity += in_doubt
+                logger.warning(
+                    f"Parent {schedule.parent_id} has {in_doubt} {schedule.ticker} share(s) sent but never "
+                    f"confirmed; counting them as executed. Reconcile with the broker."
+                )
+            # A new process starts a new volume tracker; advance POV from its first reading.
+            schedule.volume_mark = None
+            logger.info(
+                f"Resuming {schedule.algo} parent {schedule.parent_id}: {schedule.filled_quantity} of "
+                f"{schedule.quantity} {schedule.ticker} executed."
+            )
+            resumed.append(self.start(schedule))
+        return resumed
+
+    async def close(self) -> None:
+        """Stops all slicing; unfinished parents stay persisted, their leases released, for `resume()`."""
+        await self.wheel.close()
+        self._heartbeat = None
+        children = [running.child for running in self._running.values() if running.child is not None]
+        for child in children:
+            child.cancel()
+        await asyncio.gather(*children, return_exceptions=True)
+        for running in self._running.values():
+            if not running.done.done():
+                running.done.cancel()
+        self._running.clear()
+        self.store.release(self.owner_id)
+
+    # ---- leases ----------------------------------------------------------
+
+    def _save(self, schedule: ParentSchedule, child: Optional[Tuple[str, int, str, Optional[Dict[str, Any]]]] = None) -> bool:
+        return self.store.save(schedule, child, owner=self.owner_id, lease_until=time.time() + self.lease_s)
+
+    def _renew_leases(self) -> None:
+        if not self._running:
+            self._heartbeat = None
+            return
+        lost = self.store.renew(self.owner_id, list(self._running), time.time() + self.lease_s)
+        for parent_id in lost:
+            running = self._running.get(parent_id)
+            if running is not None:
+                self._abandon(running)
+        self._heartbeat = self.wheel.call_later(self.lease_s / 3, self._renew_leases)
+
+    def _abandon(self, running: _RunningParent) -> None:
+        """Stops a parent whose lease another scheduler has taken over; that scheduler finishes it."""
+        schedule = running.schedule
+        if self._running.pop(schedule.parent_id, None) is None:
+            return
+        if running.timer is not None:
+            running.timer.cancel()
+        logger.error(
+            f"Lost the lease on parent {schedule.parent_id} ({schedule.ticker}); another scheduler has "
+            f"taken it over. Stopped after {schedule.filled_quantity} of {schedule.quantity} executed here."
+        )
+        if not running.done.done():
+            running.done.set_exception(RuntimeError(f"Lost the lease on parent {schedule.parent_id}."))
+
+    # ---- slicing ---------------------------------------------------------
+
+    def _slice(self, parent_id: str) -> None:
+        running = self._running.get(parent_id)
+        if running is None:
+            return
+        schedule = running.schedule
+        now = time.time()
+        if running.child is None:
+            if schedule.algo == ALGO_POV:
+                self._advance_volume(schedule)
+            if schedule.remaining <= 0 or (
+                now >= schedule.end_ts and (schedule.final_sweep or schedule.algo == ALGO_POV)
+            ):
+                self._finish(running)
+                return
+            if now >= schedule.end_ts:
+                schedule.final_sweep = True
+                quantity = schedule.remaining
+            else:
+                quantity = min(
+                    target_quantity(schedule, now) - schedule.filled_quantity - schedule.in_doubt_quantity,
+                    schedule.remaining,
+                )
+            if quantity > 0:
+                self._send_child(running, quantity)
+                if parent_id not in self._running:
+                    return
+        delay = min(schedule.interval_s, schedule.end_ts - now) if now < schedule.end_ts else schedule.interval_s
+        running.timer = self.wheel.call_later(delay, self._slice, parent_id)
+
+    def _advance_volume(self, schedule: ParentSchedule) -> None:
+        reading = self.volume.cumulative_volume(schedule.ticker) if self.volume is not None else None
+        if reading is None:
+            return
+        if schedule.volume_mark is not None and reading >= schedule.volume_mark:
+            schedule.market_volume += reading - schedule.volume_mark
+        schedule.volume_mark = reading
+
+    def _send_child(self, running: _RunningParent, quantity: int) -> None:
+        schedule = running.schedule
+        schedule.children_sent += 1
+        client_order_id = f"{schedule.parent_id}-{schedule.children_sent:04d}"
+        # Written before the child leaves, so a crash can only leave it in doubt, never forgotten.
+        if not self._save(schedule, (client_order_id, quantity, CHILD_SENT, None)):
+            schedule.children_sent -= 1
+            self._abandon(running)
+            return
+        running.child = asyncio.ensure_future(self._run_child(running, client_order_id, quantity))
+
+    async def _run_child(self, running: _RunningParent, client_order_id: str, quantity: int) -> None:
+        schedule = running.schedule
+        order = {
+            "ticker": schedule.ticker, "action": schedule.action, "quantity": quantity,
+            "order_type": "MARKET", "client_order_id": client_order_id,
+        }
+        try:
+            confirmation = await self.submit(order)
+        except Exception as e:
+            logger.error(f"Child order {client_order_id} failed: {e}")
+            confirmation = {
+                "status": "REJECTED", "execution_id": client_order_id, "client_order_id": client_order_id,
+                "timestamp_utc": _now_utc(), "filled_quantity": 0, "fills": [], "notes": str(e),
+            }
+        schedule.filled_quantity += confirmation["filled_quantity"]
+        schedule.filled_notional_usd += sum(f["quantity"] * f["price"] for f in confirmation["fills"])
+        if self.on_child is not None:
+            try:
+                await self.on_child(schedule, confirmation)
+            except Exception as e:
+                logger.error(f"Booking the fills of child order {client_order_id} failed: {e}")
+        running.child = None
+        if not self._save(schedule, (client_order_id, quantity, confirmation["status"], confirmation)):
+            self._abandon(running)
+            return
+        if schedule.parent_id not in self._running:
+            return
+        if schedule.remaining <= 0 or schedule.final_sweep:
+            self._finish(running)
+
+    def _finish(self, running: _RunningParent) -> None:
+        schedule = running.schedule
+        if running.timer is not None:
+            running.timer.cancel()
+        if schedule.filled_quantity >= schedule.quantity:
+            schedule.status = "FILLED"
+        else:
+            schedule.status = "PARTIALLY_FILLED" if schedule.filled_quantity else "EXPIRED"
+        if not self._save(schedule):
+            schedule.status = STATUS_ACTIVE
+            self._abandon(running)
+            return
+        self._running.pop(schedule.parent_id, None)
+        confirmation = self.confirmation(schedule)
+        logger.info(
+            f"{schedule.algo} parent {schedule.parent_id} {schedule.status}: {schedule.filled_quantity} of "
+            f"{schedule.quantity} {schedule.ticker} in {schedule.children_sent} child order(s)."
+        )
+        if not running.done.done():
+            running.done.set_result(confirmation)
+
+    def confirmation(self, schedule: ParentSchedule) -> Dict[str, Any]:
+        """The parent's confirmation, in the gateway's shape, with every child fill."""
+        children = self.store.children(schedule.parent_id)
+        fills = [fill for child in children if child["confirmation"] for fill in child["confirmation"]["fills"]]
+        sent = [c["confirmation"]["sent_utc"] for c in children if c["confirmation"] and c["confirmation"].get("sent_utc")]
+        notes = f"{schedule.algo} schedule executed in {schedule.children_sent} child order(s)."
+        if schedule.in_doubt_quantity:
+            notes += f" {schedule.in_doubt_quantity} share(s) in doubt after a restart; reconcile with the broker."
+        return {
+            "status": schedule.status,
+            "execution_id": schedule.parent_id,
+            "client_order_id": schedule.parent_id,
+            "timestamp_utc": _now_utc(),
+            "ticker": schedule.ticker,
+            "action": schedule.action,
+            "order_quantity": schedule.quantity,
+            "filled_quantity": schedule.filled_quantity,
+            "average_price": (
+                schedule.filled_notional_usd / schedule.filled_quantity if schedule.filled_quantity else None
+            ),
+            "fills": fills,
+            "sent_utc": min(sent) if sent else None,
+            "arrival_price": schedule.arrival_price,
+            "decision_utc": schedule.decision_utc,
+            "algo": schedule.algo,
+            "child_orders": [
+                {"client_order_id": c["client_order_id"], "quantity": c["quantity"], "status": c["status"]}
+                for c in children
+            ],
+            "notes": notes,
+        }
+
+
+_store: Optional[ScheduleStore] = None
+_store_lock = threading.Lock()
+_schedulers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, SliceScheduler]" = weakref.WeakKeyDictionary()
+
+
+def get_schedule_store() -> ScheduleStore:
+    """The process-wide schedule store configured from the environment."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ScheduleStore(os.getenv("AGORA_SCHEDULE_DB_PATH", DEFAULT_DB_PATH))
+        return _store
+
+
+def get_slice_scheduler() -> SliceScheduler:
+    """
+    The scheduler for the running event loop, created on first use. It sends
+    children through the shared broker gateway, reads live volume from the
+    shared volume tracker and books every child's fills.
+    """
+    loop = asyncio.get_running_loop()
+    scheduler = _schedulers.get(loop)
+    if scheduler is None:
+        tick_s = float(os.getenv("AGORA_SLICE_WHEEL_TICK_MS", DEFAULT_TICK_S * 1000)) / 1000.0
+        scheduler = SliceScheduler(
+            lease_s=float(os.getenv("AGORA_SLICE_LEASE_S", DEFAULT_LEASE_S)),
+            submit=get_broker_gateway().submit,
+            store=get_schedule_store(),
+            volume=get_volume_tracker(),
+            wheel=TimerWheel(tick_s=tick_s),
+            on_child=lambda schedule, confirmation: book_fills(schedule.ticker, schedule.action, confirmation),
+        )
+        _schedulers[loop] = scheduler
+    return scheduler
@@ -0,0 +1,167 @@
+"""
+Transaction cost analysis over the columnar execution log.
+
+Every measure is computed with array operations over all recorded orders
+and fills at once, so a report over tens of thousands of executions takes
+milliseconds. Costs are signed so that a positive number is always a cost:
+
+    slippage (bps, per fill)    side * (fill price - arrival price) / arrival price
+    implementation shortfall    execution cost of the fills against the arrival
+                                price, plus the opportunity cost of the unfilled
+                                shares (side * unfilled * (completion - arrival)),
+                                in USD and in bps of the order's arrival notional
+    decision-to-send (ms)       first send to the venue minus the decision time
+    send-to-fill (ms, per fill) fill time minus the send of its (child) order
+
+`tca_report` groups these by any orders column (`algo`, `ticker`, `tag`,
+...). Tagging executions from different versions of the execution path and
+grouping by `tag` shows whether a change helped or hurt.
+"""
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+from .execution_log import Table
+
+DEFAULT_PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+_NS_PER_MS = 1_000_000.0
+
+
+def fill_slippage_bps(fills: Table) -> np.ndarray:
+    """Signed slippage of every fill against its order's arrival price; NaN without an arrival price."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return fills["side"] * (fills["price"] - fills["arrival_price"]) / fills["arrival_price"] * 1e4
+
+
+def fill_order_rows(orders: Table, fills: Table) -> np.ndarray:
+    """The orders row of each fill's order, -1 for a fill whose order is not in `orders`."""
+    if not len(orders["order_id"]):
+        return np.full(len(fills["order_id"]), -1)
+    order_sort = np.argsort(orders["order_id"])
+    sorted_ids = orders["order_id"][order_sort]
+    position = np.clip(np.searchsorted(sorted_ids, fills["order_id"]), 0, len(sorted_ids) - 1)
+    return np.where(sorted_ids[position] == fills["order_id"], order_sort[position], -1)
+
+
+def implementation_shortfall(orders: Table, fills: Table) -> Dict[str, np.ndarray]:
+    """
+    Per-order implementation shortfall: `execution_usd`, `opportunity_usd`,
+    `total_usd` and `bps` of the arrival notional. Orders without an arrival
+    price are NaN; a missing completion price counts no opportunity cost.
+    """
+    rows = fill_order_rows(orders, fills)
+    known = rows >= 0
+    arrival = orders["arrival_price"]
+    fill_cost = fills["side"][known] * fills["quantity"][known] * (fills["price"][known] - arrival[rows[known]])
+    execution = np.bincount(rows[known], weights=fill_cost, minlength=len(arrival))
+    unfilled = orders["order_quantity"] - orders["filled_quantity"]
+    drift = np.nan_to_num(orders["completion_price"] - arrival, nan=0.0)
+    opportunity = orders["side"] * unfilled * drift
+    total = execution + opportunity
+    paper = orders["order_quantity"] * arrival
+    with np.errstate(invalid="ignore", divide="ignore"):
+        bps = np.where(paper > 0, total / paper * 1e4, np.nan)
+    return {"execution_usd": execution, "opportunity_usd": opportunity, "total_usd": total, "bps": bps}
+
+
+def decision_to_send_ms(orders: Table) -> np.ndarray:
+    """Decision-to-send latency per order; NaN where either time is unknown."""
+    valid = (orders["decision_ns"] > 0) & (orders["sent_ns"] > 0)
+    return np.where(valid, (orders["sent_ns"] - orders["decision_ns"]) / _NS_PER_MS, np.nan)
+
+
+def send_to_fill_ms(fills: Table) -> np.ndarray:
+    """Send-to-fill latency per fill; NaN where either time is unknown."""
+    valid = (fills["sent_ns"] > 0) & (fills["fill_ns"] > 0)
+    return np.where(valid, (fills["fill_ns"] - fills["sent_ns"]) / _NS_PER_MS, np.nan)
+
+
+def distribution(values: np.ndarray, percentiles: Iterable[float] = DEFAULT_PERCENTILES) -> Dict[str, float]:
+    """Count, mean, percentiles and max of the finite values."""
+    values = values[np.isfinite(values)]
+    percentiles = tuple(percentiles)
+    summary: Dict[str, float] = {"count": int(values.size)}
+    if not values.size:
+        return summary
+    summary["mean"] = float(values.mean())
+    for p, value in zip(percentiles, np.percentile(values, percentiles)):
+        summary[f"p{p:g}"] = float(value)
+    summary["max"] = float(values.max())
+    return summary
+
+
+def _weighted_mean(values: np.ndarray, weights: np.ndarray, groups: np.ndarray, n: int) -> np.ndarray:
+    finite = np.isfinite(values)
+    numerator = np.bincount(groups[finite], weights=(values * weights)[finite], minlength=n)
+    denominator = np.bincount(groups[finite], weights=weights[finite], minlength=n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return numerator / denominator
+
+
+def tca_report(
+    orders: Table,
+    fills: Table,
+    by: Optional[str] = "algo",
+    percentiles: Iterable[float] = DEFAULT_PERCENTILES,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Cost and latency summary per value of the orders column `by` (one `ALL`
+    group when `by` is None). Slippage is the quantity-weighted mean over
+    fills; shortfall is total cost over total arrival notional.
+    """
+    n_orders = len(orders["order_id"])
+    if by is None:
+        keys, order_groups = np.array(["ALL"]), np.zeros(n_orders, dtype=np.intp)
+    else:
+        keys, order_groups = np.unique(orders[by], return_inverse=True)
+    n = len(keys)
+    rows = fill_order_rows(orders, fills)
+    known = rows >= 0
+    fill_groups = order_groups[rows[known]]
+    fill_table = {name: column[known] for name, column in fills.items()}
+
+    slippage = fill_slippage_bps(fill_table)
+    shortfall = implementation_shortfall(orders, fills)
+    paper = orders["order_quantity"] * orders["arrival_price"]
+    has_arrival = np.isfinite(paper) & (paper > 0)
+    shortfall_usd = np.bincount(order_groups[has_arrival], weights=shortfall["total_usd"][has_arrival], minlength=n)
+    paper_usd = np.bincount(order_groups[has_arrival], weights=paper[has_arrival], minlength=n)
+    ordered = np.bincount(order_groups, weights=orders["order_quantity"], minlength=n)
+    filled = np.bincount(order_groups, weights=orders["filled_quantity"], minlength=n)
+    slippage_mean = _weighted_mean(slippage, fill_table["quantity"], fill_groups, n)
+    decision_ms = decision_to_send_ms(orders)
+    fill_ms = send_to_fill_ms(fill_table)
+
+    report: Dict[str, Dict[str, Any]] = {}
+    for g, key in enumerate(keys):
+        in_group = order_groups == g
+        fills_in_group = fill_groups == g
+        with np.errstate(invalid="ignore", divide="ignore"):
+            report[str(key)] = {
+                "orders": int(in_group.sum()),
+                "fills": int(fills_in_group.sum()),
+                "fill_rate": float(filled[g] / ordered[g]) if ordered[g] else float("nan"),
+                "slippage_bps": float(slippage_mean[g]),
+                "slippage_bps_distribution": distribution(slippage[fills_in_group], percentiles),
+                "implementation_shortfall_usd": float(shortfall_usd[g]),
+                "implementation_shortfall_bps": float(shortfall_usd[g] / paper_usd[g] * 1e4) if paper_usd[g] else float("nan"),
+                "decision_to_send_ms": distribution(decision_ms[in_group], percentiles),
+                "send_to_fill_ms": distribution(fill_ms[fills_in_group], percentiles),
+            }
+    return report
+
+
+def compare(report: Dict[str, Dict[str, Any]], baseline: str, candidate: str) -> Dict[str, float]:
+    """
+    Candidate minus baseline for the headline measures of two groups of one
+    report (say, two `tag`s); negative numbers mean the candidate is cheaper
+    or faster.
+    """
+    base, cand = report[baseline], report[candidate]
+    return {
+        "slippage_bps": cand["slippage_bps"] - base["slippage_bps"],
+        "implementation_shortfall_bps": cand["implementation_shortfall_bps"] - base["implementation_shortfall_bps"],
+        "decision_to_send_p50_ms": cand["decision_to_send_ms"].get("p50", np.nan) - base["decision_to_send_ms"].get("p50", np.nan),
+        "send_to_fill_p50_ms": cand["send_to_fill_ms"].get("p50", np.nan) - base["send_to_fill_ms"].get("p50", np.nan),
+        "send_to_fill_p99_ms": cand["send_to_fill_ms"].get("p99", np.nan) - base["send_to_fill_ms"].get("p99", np.nan),
+    }
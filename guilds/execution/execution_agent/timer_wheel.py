@@ -0,0 +1,122 @@
+"""
+A hashed timer wheel for the slicing engine.
+
+Every active parent order keeps one pending timer for its next slice, so a
+session with thousands of parents would otherwise hold thousands of event
+loop timers. The wheel keeps them in `slots` buckets of `tick_s` each and
+one driver task wakes once per tick, firing the bucket that is due: adding
+or cancelling a timer is O(1), and the event loop sees a single timer
+however many parents are running. Deadlines are rounded up to the next
+tick, and timers further out than one revolution wait in their bucket for
+the right round. The driver sleeps while the wheel is empty.
+"""
+import asyncio
+import logging
+import math
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TICK_S = 0.05
+DEFAULT_SLOTS = 512
+
+
+class WheelTimer:
+    """A scheduled callback; `cancel()` stops it from firing."""
+
+    __slots__ = ("due_tick", "callback", "args", "cancelled")
+
+    def __init__(self, due_tick: int, callback: Callable[..., Any], args: tuple):
+        self.due_tick = due_tick
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class TimerWheel:
+    """Hashed timer wheel driven by one asyncio task; see the module docstring."""
+
+    def __init__(self, tick_s: float = DEFAULT_TICK_S, slots: int = DEFAULT_SLOTS):
+        self.tick_s = tick_s
+        self.slots = slots
+        self._buckets: List[List[WheelTimer]] = [[] for _ in range(slots)]
+        self._pending = 0
+        self._origin: Optional[float] = None
+        self._tick = 0
+        # Earliest due tick added while the driver sleeps, so waking up never skips it.
+        self._earliest_due: Optional[int] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._driver: Optional[asyncio.Task] = None
+
+    def call_later(self, delay_s: float, callback: Callable[..., Any], *args: Any) -> WheelTimer:
+        """Runs `callback(*args)` on the event loop at the first tick at least `delay_s` from now."""
+        loop = asyncio.get_running_loop()
+        if self._driver is None:
+            self._origin = loop.time()
+            self._wakeup = asyncio.Event()
+            self._driver = loop.create_task(self._run())
+        now_tick = (loop.time() - self._origin) / self.tick_s
+        due_tick = max(math.ceil(now_tick + max(delay_s, 0.0) / self.tick_s), math.floor(now_tick) + 1, self._tick + 1)
+        timer = WheelTimer(due_tick, callback, args)
+        self._buckets[due_tick % self.slots].append(timer)
+        if self._earliest_due is None or due_tick < self._earliest_due:
+            self._earliest_due = due_tick
+        self._pending += 1
+        self._wakeup.set()
+        return timer
+
+    def __len__(self) -> int:
+        """Timers added and not yet fired, including cancelled ones still in their bucket."""
+        return self._pending
+
+    async def close(self) -> None:
+        if self._driver is not None:
+            self._driver.cancel()
+            await asyncio.gather(self._driver, return_exceptions=True)
+            self._driver = None
+        self._buckets = [[] for _ in range(self.slots)]
+        self._pending = 0
+        self._earliest_due = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._pending:
+                self._earliest_due = None
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                # Skip the ticks that passed while idle, up to the first one a new timer is due in.
+                now_tick = int((loop.time() - self._origin) / self.tick_s)
+                if self._earliest_due is not None:
+                    now_tick = min(now_tick, self._earliest_due - 1)
+                self._tick = max(self._tick, now_tick)
+                self._earliest_due = None
+                continue
+            next_at = self._origin + (self._tick + 1) * self.tick_s
+            await asyncio.sleep(max(next_at - loop.time(), 0.0))
+            # Catch up on every tick that has elapsed, so a slow callback delays timers but never drops them.
+            now_tick = int((loop.time() - self._origin) / self.tick_s)
+            while self._tick < now_tick:
+                self._tick += 1
+                self._fire(self._tick)
+
+    def _fire(self, tick: int) -> None:
+        bucket = self._buckets[tick % self.slots]
+        if not bucket:
+            return
+        due = [timer for timer in bucket if timer.due_tick <= tick]
+        if len(due) < len(bucket):
+            self._buckets[tick % self.slots] = [timer for timer in bucket if timer.due_tick > tick]
+        else:
+            self._buckets[tick % self.slots] = []
+        self._pending -= len(due)
+        for timer in due:
+            if timer.cancelled:
+                continue
+            try:
+                timer.callback(*timer.args)
+            except Exception as e:
+                logger.error(f"Timer wheel callback {getattr(timer.callback, '__name__', timer.callback)} failed: {e}")
@@ -1,7 +1,7 @@
 import json
 import logging
 import re
-from typing import AsyncGenerator
+from typing import AsyncGenerator, List
 
 from google.adk.agents import BaseAgent
 from google.adk.agents.invocation_context import InvocationContext
@@ -9,31 +9,122 @@ from google.adk.events import Event, EventActions
 from google.adk.tools import FunctionTool
 from google.genai import types
 
-from .tools import fetch_news_articles
+from .news_client import dedupe_articles
+from .tools import fetch_news_articles_async
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Content hashes remembered per subject for de-duplication.
+MAX_SEEN_HASHES = 2000
+# Articles per news request, and requests per harvest when catching up on a backlog.
+NEWS_PAGE_SIZE = 10
+MAX_NEWS_PAGES = 20
+
+def news_cursor_key(subject: str) -> str:
+    """User-state key of the newest article timestamp harvested for `subject`."""
+    return f"user:news_cursor:{subject}"
+
+def news_seen_key(subject: str) -> str:
+    """User-state key of the content hashes already harvested for `subject`."""
+    return f"user:news_seen:{subject}"
+
+# Upper-case words that look like tickers in a query but are not subjects.
+NON_TICKER_WORDS = frozenset({
+    "AI", "API", "CEO", "CFO", "COO", "CTO", "CPI", "EPS", "ESG", "ETF", "EU", "EUR", "FED", "FOMC",
+    "GDP", "IPO", "PE", "SEC", "UK", "US", "USA", "USD",
+    "ALL", "AND", "FOR", "FROM", "GET", "NEWS", "OF", "ON", "THE", "TO",
+})
+
+def extract_subjects_from_query(query: str) -> List[str]:
+    """Every ticker-like token in the query that is not a known non-ticker word, in order and without duplicates."""
+    return [
+        token for token in dict.fromkeys(re.findall(r'\b[A-Z]{2,}\b', query))
+        if token not in NON_TICKER_WORDS
+    ]
+
 def _extract_subject_from_query(query: str) -> str:
     """A simple helper to extract a ticker or subject from a query."""
-    matches = re.findall(r'\b[A-Z]{2,}\b', query)
+    matches = extract_subjects_from_query(query)
     return matches[-1] if matches else "UNKNOWN_SUBJECT"
 
 class DataHarvester(BaseAgent):
+    """
+    Fetches news for a subject and stores it as a `<subject>_news_raw.json`
+    artifact.
+
+    Harvests are incremental: a per-subject cursor in user state asks the news
+    API only for articles newer than the previous harvest, and the content
+    hashes of harvested articles are remembered so that re-published stories
+    are not stored (and mined) twice. When nothing new arrives, no artifact
+    is written and the status is `harvest_no_new_articles`.
+
+    The first harvest of a subject takes its newest articles. Later harvests
+    page forward from the cursor, oldest first, until a page comes back
+    short (up to `MAX_NEWS_PAGES` pages; the cursor only passes what was
+    fetched, so the next harvest carries on), so a burst of more articles
+    than fit in one response is never skipped.
+    """
     _news_tool: FunctionTool
     def __init__(self, name: str):
         super().__init__(name=name)
-        self._news_tool = FunctionTool(func=fetch_news_articles)
+        self._news_tool = FunctionTool(func=fetch_news_articles_async)
 
     async def _run_async_impl(
         self, ctx: InvocationContext
     ) -> AsyncGenerator[Event, None]:
-        user_query = ctx.user_content.parts[0].text
-        subject = _extract_subject_from_query(user_query)
+        # A fan-out run pins the subject in state; otherwise parse it from the query.
+        subject = ctx.session.state.get("subject")
+        if not subject:
+            subject = _extract_subject_from_query(ctx.user_content.parts[0].text)
         logger.info(f"[{self.name}] Received harvest request for: '{subject}'")
 
-        tool_result = self._news_tool.func(query=subject, limit=10)
-        articles_json = json.dumps(tool_result, indent=2)
+        cursor_key = news_cursor_key(subject)
+        seen_key = news_seen_key(subject)
+        since = ctx.session.state.get(cursor_key)
+        seen_hashes = list(ctx.session.state.get(seen_key, []))
+
+        seen = set(seen_hashes)
+        cursor, fetched, articles = since, 0, []
+        for page in range(MAX_NEWS_PAGES if since else 1):
+            tool_result = await self._news_tool.func(
+                query=subject, limit=NEWS_PAGE_SIZE, since=cursor, oldest_first=bool(since),
+            )
+            if tool_result.get("status") != "success":
+                logger.error(f"[{self.name}] News fetch failed for '{subject}': {tool_result.get('error_message')}")
+                if page:
+                    # Keep the pages already fetched; the cursor has not passed the rest.
+                    break
+                yield Event(
+                    author=self.name,
+                    content=types.Content(parts=[types.Part(text="Data-Harvester failed to fetch news.")]),
+                    actions=EventActions(state_delta={"status": "harvest_failed"}),
+                )
+                return
+            batch = tool_result.get("articles", [])
+            fetched += len(batch)
+            articles.extend(dedupe_articles(batch, seen))
+            cursor = max([cursor or ""] + [article.get("timestamp_utc", "") for article in batch]) or None
+            if len(batch) < NEWS_PAGE_SIZE:
+                break
+
+        seen_hashes = (seen_hashes + [article["content_hash"] for article in articles])[-MAX_SEEN_HASHES:]
+        logger.info(
+            f"[{self.name}] Fetched {fetched} articles for '{subject}', {len(articles)} new."
+        )
+        if not articles:
+            yield Event(
+                author=self.name,
+                content=types.Content(parts=[types.Part(
+                    text=f"Data-Harvester found no new articles for '{subject}'."
+                )]),
+                actions=EventActions(state_delta={
+                    "status": "harvest_no_new_articles", cursor_key: cursor,
+                }),
+            )
+            return
+
+        articles_json = json.dumps({"status": "success", "articles": articles}, indent=2)
         artifact_part = types.Part.from_bytes(
             data=articles_json.encode("utf-8"), mime_type="application/json"
         )
@@ -50,7 +141,13 @@ class DataHarvester(BaseAgent):
                     artifact=artifact_part,
                 )
                 final_text = f"Data-Harvester successfully stored '{artifact_filename}' (v{version})."
-                state_delta = { "status": "harvest_success", "last_harvested_file": artifact_filename }
+                # The cursor and seen hashes only advance once the articles are safely stored.
+                state_delta = {
+                    "status": "harvest_success",
+                    "last_harvested_file": artifact_filename,
+                    cursor_key: cursor,
+                    seen_key: seen_hashes,
+                }
             else:
                 raise ValueError("ArtifactService is not configured in the Runner.")
                 
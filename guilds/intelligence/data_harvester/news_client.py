@@ -0,0 +1,192 @@
+"""
+Async news API client used by the DataHarvester.
+
+One `httpx.AsyncClient` connection pool is shared by every harvest on an
+event loop. Each configured news source gets its own concurrency limit, and
+failed requests (transport errors, 429 and 5xx responses) are retried with
+exponential backoff and full jitter. A source that still fails is skipped,
+so one bad source cannot fail a whole harvest.
+
+The API contract is a single endpoint per source:
+
+    GET {base_url}/articles?q=<subject>&limit=<n>[&since=<iso timestamp>][&order=asc]
+    -> {"status": "success", "articles": [{timestamp_utc, source, headline, summary}, ...]}
+
+`since` asks for articles strictly newer than the harvest cursor. Articles
+come newest first, so a truncated response holds the newest `limit`;
+`order=asc` returns the oldest `limit` instead, oldest first, which lets a
+harvest page forward from its cursor without skipping any.
+`stub_news_server.py` implements the same contract locally.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import weakref
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Comma-separated base URLs of the news sources; unset means the mock tool is used.
+NEWS_API_URL_ENV = "AGORA_NEWS_API_URL"
+NEWS_SOURCE_CONCURRENCY_ENV = "AGORA_NEWS_SOURCE_CONCURRENCY"
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def content_hash(article: Dict[str, Any]) -> str:
+    """
+    A stable fingerprint of an article's content.
+
+    Only the headline and summary are hashed (case and whitespace
+    normalized), so the same story re-published with a new timestamp or
+    picked up by a second source is recognized as a repeat.
+    """
+    text = "\n".join(
+        " ".join(str(article.get(field, "")).lower().split())
+        for field in ("headline", "summary")
+    )
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def dedupe_articles(articles: Iterable[Dict[str, Any]], seen: Set[str]) -> List[Dict[str, Any]]:
+    """
+    Returns the articles whose content hash is not in `seen`, tagging each
+    with its `content_hash` and adding the hash to `seen`.
+    """
+    fresh = []
+    for article in articles:
+        digest = article.get("content_hash") or content_hash(article)
+        if digest in seen:
+            continue
+        seen.add(digest)
+        fresh.append({**article, "content_hash": digest})
+    return fresh
+
+
+class NewsSource:
+    """A news API endpoint and the number of requests allowed in flight against it."""
+
+    def __init__(self, base_url: str, max_concurrency: int = 4):
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    def __repr__(self) -> str:
+        return f"NewsSource({self.base_url!r}, max_concurrency={self.max_concurrency})"
+
+
+class NewsClient:
+    """Fetches and merges articles for a subject from every configured source."""
+
+    def __init__(
+        self,
+        sources: List[NewsSource],
+        max_connections: int = 32,
+        max_retries: int = 3,
+        backoff_base_s: float = 0.2,
+        backoff_max_s: float = 5.0,
+        timeout_s: float = 10.0,
+    ):
+        self.sources = sources
+        self.max_retries = max_retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self._http = httpx.AsyncClient(
+            timeout=timeout_s,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+
+    async def fetch_articles(
+        self, query: str, limit: int = 10, since: Optional[str] = None, oldest_first: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Queries all sources concurrently and returns the merged articles,
+        newest first (the newest `limit`) or, with `oldest_first`, oldest
+        first (the oldest `limit`), de-duplicated by content, in the same
+        shape as `fetch_news_articles`.
+        """
+        results = await asyncio.gather(
+            *(self._fetch_from(source, query, limit, since, oldest_first) for source in self.sources)
+        )
+        if all(result is None for result in results):
+            return {"status": "error", "error_message": f"All news sources failed for '{query}'."}
+
+        merged = dedupe_articles(
+            (article for result in results if result for article in result), set()
+        )
+        merged.sort(key=lambda article: article.get("timestamp_utc", ""), reverse=not oldest_first)
+        return {"status": "success", "articles": merged[:limit]}
+
+    async def _fetch_from(
+        self, source: NewsSource, query: str, limit: int, since: Optional[str], oldest_first: bool = False
+    ) -> Optional[List[Dict[str, Any]]]:
+        params = {"q": query, "limit": limit}
+        if since:
+            params["since"] = since
+        if oldest_first:
+            params["order"] = "asc"
+        url = f"{source.base_url}/articles"
+        async with source._semaphore:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    response = await self._http.get(url, params=params)
+                    if response.status_code not in RETRYABLE_STATUS_CODES:
+                        response.raise_for_status()
+                        payload = response.json()
+                        if payload.get("status") != "success":
+                            raise ValueError(payload.get("error_message", "unsuccessful response"))
+                        return payload.get("articles", [])
+                    error = f"HTTP {response.status_code}"
+                except httpx.TransportError as e:
+                    error = f"{type(e).__name__}: {e}"
+                except (httpx.HTTPStatusError, ValueError) as e:
+                    # Client errors and malformed payloads will not improve on retry.
+                    logger.error(f"News source {source.base_url} rejected '{query}': {e}")
+                    return None
+                if attempt < self.max_retries:
+                    delay = random.uniform(
+                        0, min(self.backoff_max_s, self.backoff_base_s * 2 ** attempt)
+                    )
+                    logger.warning(
+                        f"News source {source.base_url} failed for '{query}' ({error}); "
+                        f"retrying in {delay:.2f}s."
+                    )
+                    await asyncio.sleep(delay)
+        logger.error(f"News source {source.base_url} failed for '{query}' after {self.max_retries + 1} attempts.")
+        return None
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+
+# httpx pools are bound to the event loop they were first used on.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, NewsClient]" = weakref.WeakKeyDictionary()
+
+
+def configured_sources() -> List[NewsSource]:
+    """News sources from the environment (empty when no news API is configured)."""
+    urls = [url.strip() for url in os.getenv(NEWS_API_URL_ENV, "").split(",") if url.strip()]
+    concurrency = int(os.getenv(NEWS_SOURCE_CONCURRENCY_ENV, "4"))
+    return [NewsSource(url, concurrency) for url in urls]
+
+
+def get_news_client() -> Optional[NewsClient]:
+    """
+    The shared client for the running event loop, or None when no news
+    sources are configured.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        sources = configured_sources()
+        if not sources:
+            return None
+        client = _clients[loop] = NewsClient(sources)
+    return client
@@ -0,0 +1,155 @@
+"""
+A local stand-in for the news API described in `news_client.py`.
+
+The server keeps an in-memory list of articles per subject. Each subject is
+seeded with a few articles the first time it is queried, and more can be
+published at any time with `publish()`, which makes incremental harvests easy
+to exercise. `fail_rate` and `latency_s` inject 503s and slow responses to
+test retries and concurrency limits.
+
+    with StubNewsServer(fail_rate=0.2) as server:
+        os.environ["AGORA_NEWS_API_URL"] = server.url
+        ...
+
+It can also run standalone:
+
+    python -m guilds.intelligence.data_harvester.stub_news_server --port 8765
+"""
+import argparse
+import datetime
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+class StubNewsServer:
+    """Serves `GET /articles?q=&limit=&since=&order=` from an in-memory article store."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed_articles: int = 3,
+        fail_rate: float = 0.0,
+        latency_s: float = 0.0,
+    ):
+        self.seed_articles = seed_articles
+        self.fail_rate = fail_rate
+        self.latency_s = latency_s
+        self.requests_served = 0
+        self._articles: Dict[str, List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def publish(self, subject: str, headline: str, summary: str, source: str = "Stub Wire") -> Dict[str, Any]:
+        """Adds an article for `subject`, timestamped now."""
+        article = {
+            "timestamp_utc": datetime.datetime.utcnow().isoformat(),
+            "source": source,
+            "headline": headline,
+            "summary": summary,
+        }
+        with self._lock:
+            self._articles.setdefault(subject, []).append(article)
+        return article
+
+    def articles_for(
+        self, subject: str, limit: int, since: Optional[str], oldest_first: bool = False
+    ) -> List[Dict[str, Any]]:
+        with self._lock:
+            if subject not in self._articles:
+                self._articles[subject] = [
+                    {
+                        "timestamp_utc": datetime.datetime.utcnow().isoformat(),
+                        "source": "Stub Wire",
+                        "headline": f"{subject} headline #{i + 1}",
+                        "summary": f"Seeded story #{i + 1} about {subject}.",
+                    }
+                    for i in range(self.seed_articles)
+                ]
+            articles = [
+                article for article in self._articles[subject]
+                if since is None or article["timestamp_utc"] > since
+            ]
+        return sorted(articles, key=lambda a: a["timestamp_utc"], reverse=not oldest_first)[:limit]
+
+    def start(self) -> "StubNewsServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StubNewsServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server._lock:
+                    server.requests_served += 1
+                parsed = urlparse(self.path)
+                if parsed.path != "/articles":
+                    return self._reply(404, {"status": "error", "error_message": "Not found."})
+                if server.latency_s:
+                    time.sleep(server.latency_s)
+                if random.random() < server.fail_rate:
+                    return self._reply(503, {"status": "error", "error_message": "Injected failure."})
+                params = parse_qs(parsed.query)
+                subject = params.get("q", [""])[0]
+                if not subject:
+                    return self._reply(400, {"status": "error", "error_message": "Missing 'q'."})
+                limit = int(params.get("limit", ["10"])[0])
+                since = params.get("since", [None])[0]
+                oldest_first = params.get("order", ["desc"])[0] == "asc"
+                self._reply(200, {
+                    "status": "success", "articles": server.articles_for(subject, limit, since, oldest_first),
+                })
+
+            def _reply(self, status: int, payload: Dict[str, Any]) -> None:
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the stub news API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+    stub = StubNewsServer(args.host, args.port, fail_rate=args.fail_rate, latency_s=args.latency)
+    print(f"Stub news API listening on {stub.url} (set AGORA_NEWS_API_URL={stub.url})")
+    try:
+        stub._httpd.serve_forever()
+    except KeyboardInterrupt:
+        stub._httpd.server_close()
@@ -1,5 +1,7 @@
 import datetime
-from typing import Any, Dict
+from typing import Any, Dict, Optional
+
+from .news_client import get_news_client
 
 def fetch_news_articles(query: str, limit: int = 10) -> Dict[str, Any]:
     """
@@ -35,4 +37,37 @@ def fetch_news_articles(query: str, limit: int = 10) -> Dict[str, Any]:
         },
     ]
 
-    return {"status": "success", "articles": mock_articles[:limit]}
\ No newline at end of file
+    return {"status": "success", "articles": mock_articles[:limit]}
+
+async def fetch_news_articles_async(
+    query: str, limit: int = 10, since: Optional[str] = None, oldest_first: bool = False
+) -> Dict[str, Any]:
+    """
+    Fetches recent news articles related to a specific query without blocking
+    the event loop.
+
+    When news sources are configured (see `news_client.py`) they are queried
+    through the shared connection pool; otherwise the mocked
+    `fetch_news_articles` response is returned.
+
+    Args:
+        query (str): The search term (e.g., 'GOOGL').
+        limit (int): The maximum number of articles to return.
+        since (str): Optional ISO timestamp; only newer articles are returned.
+        oldest_first (bool): Return the oldest `limit` articles, oldest first,
+            instead of the newest; used to page forward from a cursor.
+
+    Returns:
+        A dictionary in the same shape as `fetch_news_articles`.
+    """
+    client = get_news_client()
+    if client is None:
+        result = fetch_news_articles(query=query, limit=limit)
+        if since and result.get("status") == "success":
+            result["articles"] = [
+                article for article in result["articles"] if article["timestamp_utc"] > since
+            ]
+        if oldest_first and result.get("status") == "success":
+            result["articles"] = sorted(result["articles"], key=lambda article: article["timestamp_utc"])
+        return result
+    return await client.fetch_articles(query, limit=limit, since=since, oldest_first=oldest_first)
@@ -1,13 +1,24 @@
+import asyncio
 import json
 import logging
-from typing import AsyncGenerator, Any, Dict, List
+import time
+from typing import AsyncGenerator, Any, Dict, List, Optional, Tuple
 
 from google.adk.agents import BaseAgent, LlmAgent
 from google.adk.agents.invocation_context import InvocationContext
 from google.adk.events import Event
 from google.genai import types
 from google.genai.types import GenerationConfig
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
+
+from guilds.common.context import isolated_context
+from guilds.common.llm_cache import cached_llm_run, get_llm_cache
+from ..data_harvester.news_client import content_hash
+from .article_cache import article_insight_key, match_insights
+from .local_sentiment import (
+    TIER_CACHE, TIER_LLM, TIER_LOCAL, TierMetrics, default_classifier, local_summary,
+)
+from .prompt_batching import estimate_tokens, pack_articles, render_articles
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -32,14 +43,48 @@ analyst_llm = LlmAgent(
     {news_content}
     """,
     output_schema=AnalysisResult,
+    # Each prompt is built from `news_content` alone; no session history is sent.
+    include_contents="none",
 )
 
 class InsightMiner(BaseAgent):
+    """
+    Turns a harvested `*_news_raw.json` artifact into `*_insights.json`.
+
+    Insights are cached per article by content hash, so only articles the
+    analyst has not seen before are sent to `analyst_llm`; the new insights
+    are merged with the cached ones in article order. Each entry in the
+    insights artifact also carries the article's `content_hash` and
+    `timestamp_utc`.
+
+    Unseen articles are stripped to their headline and summary and packed
+    into prompts of at most `prompt_token_budget` estimated tokens, which run
+    concurrently, `max_concurrent_prompts` at a time (see
+    `prompt_batching.py`).
+
+    Before that, a local lexicon classifier labels every unseen article and
+    keeps those scored at `local_confidence_threshold` or above, so only
+    ambiguous articles reach the LLM (`None` disables the local tier; see
+    `local_sentiment.py`). Article counts and latency per tier are kept in
+    `tier_metrics` and written to the `insight_tier_stats` state key per run.
+    """
     analyst_llm: LlmAgent
+    prompt_token_budget: int = 8000
+    max_concurrent_prompts: int = 4
+    local_confidence_threshold: Optional[float] = 0.8
+    _tier_metrics: TierMetrics = PrivateAttr(default_factory=TierMetrics)
+
+    @property
+    def tier_metrics(self) -> TierMetrics:
+        return self._tier_metrics
+
     async def _run_async_impl(
         self, ctx: InvocationContext
     ) -> AsyncGenerator[Event, None]:
         final_response_text = ""
+        if ctx.session.state.get("status") == "harvest_no_new_articles":
+            logger.info(f"[{self.name}] No new articles were harvested; skipping insight mining.")
+            return
         try:
             artifact_filename = ctx.session.state.get("last_harvested_file")
             if not artifact_filename or not ctx.artifact_service:
@@ -53,13 +98,105 @@ class InsightMiner(BaseAgent):
                 raise ValueError(f"Failed to load artifact: {artifact_filename}")
             news_content = artifact_part.inline_data.data.decode('utf-8')
             logger.info(f"[{self.name}] Successfully loaded artifact '{artifact_filename}'.")
-            
-            ctx.session.state["news_content"] = news_content
-            
-            async for event in self.analyst_llm.run_async(ctx):
-                if event.is_final_response() and event.content and event.content.parts:
-                    final_response_text = event.content.parts[0].text
-                yield event
+
+            articles = json.loads(news_content).get("articles", [])
+            hashes = [article.get("content_hash") or content_hash(article) for article in articles]
+            cache = get_llm_cache()
+            known: Dict[str, Dict[str, Any]] = {}
+            run_stats = {TIER_CACHE: 0, TIER_LOCAL: 0, TIER_LLM: 0}
+            started = time.perf_counter()
+            if cache is not None:
+                for article_hash in set(hashes):
+                    cached = cache.get(article_insight_key(self.analyst_llm, article_hash))
+                    if cached is not None:
+                        known[article_hash] = json.loads(cached)
+            run_stats[TIER_CACHE] = len(known)
+            self._tier_metrics.record(TIER_CACHE, len(known), started)
+
+            unseen, unseen_hashes = [], []
+            for article, article_hash in zip(articles, hashes):
+                if article_hash not in known and article_hash not in unseen_hashes:
+                    unseen.append(article)
+                    unseen_hashes.append(article_hash)
+            logger.info(
+                f"[{self.name}] {len(articles) - len(unseen)} of {len(articles)} articles "
+                f"already analyzed; mining {len(unseen)}."
+            )
+
+            if unseen and self.local_confidence_threshold is not None:
+                started = time.perf_counter()
+                labels, confidences = default_classifier().classify(unseen)
+                escalated, escalated_hashes = [], []
+                for article, article_hash, label, confidence in zip(unseen, unseen_hashes, labels, confidences):
+                    if label != "Neutral" and confidence >= self.local_confidence_threshold:
+                        known[article_hash] = ArticleInsight(
+                            headline=article.get("headline", ""),
+                            sentiment=label,
+                            summary=local_summary(article),
+                        ).model_dump()
+                    else:
+                        escalated.append(article)
+                        escalated_hashes.append(article_hash)
+                run_stats[TIER_LOCAL] = len(unseen) - len(escalated)
+                self._tier_metrics.record(TIER_LOCAL, run_stats[TIER_LOCAL], started)
+                unseen, unseen_hashes = escalated, escalated_hashes
+
+            unmatched: List[Dict[str, Any]] = []
+            if unseen:
+                started = time.perf_counter()
+                chunks = pack_articles(
+                    [{**article, "content_hash": article_hash}
+                     for article, article_hash in zip(unseen, unseen_hashes)],
+                    self._chunk_token_budget(),
+                )
+                logger.info(
+                    f"[{self.name}] Mining {len(unseen)} articles in {len(chunks)} prompt(s)."
+                )
+                semaphore = asyncio.Semaphore(self.max_concurrent_prompts)
+                chunk_runs = await asyncio.gather(
+                    *(self._mine_chunk(ctx, chunk, semaphore) for chunk in chunks)
+                )
+                run_stats[TIER_LLM] = len(unseen)
+                self._tier_metrics.record(TIER_LLM, len(unseen), started)
+
+                for chunk, (events, result) in zip(chunks, chunk_runs):
+                    for event in events:
+                        yield event
+                    if result is None:
+                        continue
+                    matched = match_insights(chunk, result.insights)
+                    for article, insight in zip(chunk, matched):
+                        if insight is None:
+                            continue
+                        known[article["content_hash"]] = insight.model_dump()
+                        if cache is not None:
+                            cache.put(
+                                article_insight_key(self.analyst_llm, article["content_hash"]),
+                                insight.model_dump_json(), agent=self.analyst_llm.name,
+                            )
+                    # Keep anything the model returned that could not be tied to an article.
+                    matched_ids = {id(insight) for insight in matched if insight is not None}
+                    unmatched.extend(
+                        insight.model_dump() for insight in result.insights
+                        if id(insight) not in matched_ids
+                    )
+            else:
+                yield Event(
+                    author=self.name,
+                    content=types.Content(parts=[types.Part(
+                        text=(
+                            f"Insights for all {len(articles)} articles served without the LLM "
+                            f"({run_stats[TIER_CACHE]} cached, {run_stats[TIER_LOCAL]} classified locally)."
+                        )
+                    )]),
+                )
+
+            insights = [
+                {**known[article_hash], "content_hash": article_hash,
+                 "timestamp_utc": article.get("timestamp_utc")}
+                for article, article_hash in zip(articles, hashes) if article_hash in known
+            ] + unmatched
+            final_response_text = json.dumps({"insights": insights}, indent=2)
 
             new_artifact_name = artifact_filename.replace("_raw.json", "_insights.json")
             new_artifact_part = types.Part.from_bytes(
@@ -71,10 +208,41 @@ class InsightMiner(BaseAgent):
                 filename=new_artifact_name, artifact=new_artifact_part)
             
             ctx.session.state["last_insight_file"] = new_artifact_name
+            ctx.session.state["insight_tier_stats"] = run_stats
+            logger.info(f"[{self.name}] Articles per tier: {run_stats}.")
             logger.info(f"[{self.name}] Saved insights to artifact '{new_artifact_name}'.")
         except Exception as e:
             logger.error(f"[{self.name}] An error occurred during insight mining: {e}")
 
+    def _chunk_token_budget(self) -> int:
+        """The prompt budget left for article JSON once the instruction itself is counted."""
+        instruction = self.analyst_llm.instruction
+        overhead = estimate_tokens(instruction) if isinstance(instruction, str) else 0
+        return max(self.prompt_token_budget - overhead, 1)
+
+    async def _mine_chunk(
+        self, ctx: InvocationContext, chunk: List[Dict[str, Any]], semaphore: asyncio.Semaphore
+    ) -> Tuple[List[Event], Optional[AnalysisResult]]:
+        """
+        Runs the analyst on one chunk in a private copy of the session, so
+        concurrent chunks each see their own `news_content`. A chunk that
+        fails is logged and returns no result; its articles stay uncached
+        and are retried on the next run.
+        """
+        events: List[Event] = []
+        final_response_text = ""
+        async with semaphore:
+            chunk_ctx = isolated_context(ctx, state={"news_content": render_articles(chunk)})
+            try:
+                async for event in cached_llm_run(self.analyst_llm, chunk_ctx):
+                    if event.is_final_response() and event.content and event.content.parts:
+                        final_response_text = event.content.parts[0].text
+                    events.append(event)
+                return events, AnalysisResult.model_validate_json(final_response_text)
+            except Exception as e:
+                logger.error(f"[{self.name}] Prompt chunk of {len(chunk)} articles failed: {e}")
+                return events, None
+
 root_agent = InsightMiner(
     name="insight_miner",
     analyst_llm=analyst_llm,
@@ -0,0 +1,65 @@
+"""
+Per-article insight caching for the InsightMiner.
+
+Insights are stored per article under the article's content hash (see
+`data_harvester.news_client.content_hash`) in the shared LLM response cache,
+so only articles the analyst has never seen are sent to the model.
+"""
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Sequence
+
+from google.adk.agents import LlmAgent
+from pydantic import BaseModel
+
+from guilds.common.llm_cache import CACHE_FORMAT_VERSION
+
+
+def article_insight_key(llm_agent: LlmAgent, article_hash: str) -> str:
+    """
+    Cache key for one article's insight. Changing the analyst's model,
+    instruction template or output schema invalidates every entry.
+    """
+    instruction = llm_agent.instruction if isinstance(llm_agent.instruction, str) else llm_agent.name
+    model = llm_agent.model if isinstance(llm_agent.model, str) else llm_agent.canonical_model.model
+    schema = llm_agent.output_schema.model_json_schema() if llm_agent.output_schema else None
+    material = json.dumps(
+        ["article_insight", CACHE_FORMAT_VERSION, model, instruction, schema, article_hash],
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def match_insights(
+    articles: Sequence[Dict[str, Any]], insights: Sequence[BaseModel]
+) -> List[Optional[BaseModel]]:
+    """
+    Pairs each article with the insight the model produced for it.
+
+    Insights are matched by headline first; if the model reworded headlines
+    but returned exactly one insight per article, the remaining ones are
+    paired by position. Articles left without a match get None and are not
+    cached.
+    """
+    matched: List[Optional[BaseModel]] = [None] * len(articles)
+    by_headline: Dict[str, List[int]] = {}
+    for i, article in enumerate(articles):
+        by_headline.setdefault(_normalize(article.get("headline", "")), []).append(i)
+
+    unmatched = []
+    for insight in insights:
+        slots = by_headline.get(_normalize(insight.headline))
+        if slots:
+            matched[slots.pop(0)] = insight
+        else:
+            unmatched.append(insight)
+
+    if len(insights) == len(articles) and unmatched:
+        free = [i for i, insight in enumerate(matched) if insight is None]
+        for i, insight in zip(free, unmatched):
+            matched[i] = insight
+    return matched
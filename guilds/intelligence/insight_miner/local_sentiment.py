@@ -0,0 +1,150 @@
+"""
+Local sentiment tier for the InsightMiner.
+
+A finance lexicon scored over hashed unigrams and bigrams labels routine
+headlines without an LLM round-trip. Tokens are hashed into a fixed weight
+vector, and a whole batch of articles is scored with one `np.bincount`, so
+the cost is linear in the number of tokens. Only articles whose confidence
+clears the miner's threshold are labeled locally; everything else is
+escalated to `analyst_llm`.
+
+`TierMetrics` counts how many articles each tier (cache, local, llm)
+handled and how long it took, to help tune the threshold.
+"""
+import re
+import time
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+HASH_BUCKETS = 1 << 18
+
+# Term weights; bigrams are written with a single space.
+POSITIVE_TERMS = {
+    "positive": 1.5, "optimistic": 1.5, "upbeat": 1.5, "bullish": 1.5, "upgrade": 1.5,
+    "upgraded": 1.5, "outperform": 1.5, "record": 1.0, "beat": 1.0, "beats": 1.0,
+    "surge": 1.5, "surges": 1.5, "soar": 1.5, "soars": 1.5, "rally": 1.0, "rallies": 1.0,
+    "gain": 1.0, "gains": 1.0, "growth": 1.0, "strong": 1.0, "stronger": 1.0,
+    "profit": 0.75, "profitable": 1.0, "rebound": 1.0, "raises": 1.0, "raised guidance": 2.0,
+    "beat expectations": 2.0, "tops estimates": 2.0, "exceeds": 1.0, "boost": 1.0,
+    "boosts": 1.0, "expansion": 0.75, "improve": 0.75, "improves": 0.75, "improved": 0.75,
+    "buyback": 1.0, "dividend increase": 1.5, "approval": 1.0, "approved": 1.0, "wins": 1.0,
+}
+NEGATIVE_TERMS = {
+    "negative": 1.5, "pessimistic": 1.5, "bearish": 1.5, "downgrade": 1.5, "downgraded": 1.5,
+    "underperform": 1.5, "volatility": 1.0, "volatile": 1.0, "fluctuations": 0.5,
+    "miss": 1.0, "misses": 1.0, "missed expectations": 2.0, "plunge": 1.5, "plunges": 1.5,
+    "slump": 1.5, "slumps": 1.5, "fall": 1.0, "falls": 1.0, "drop": 1.0, "drops": 1.0,
+    "decline": 1.0, "declines": 1.0, "loss": 1.0, "losses": 1.0, "weak": 1.0, "weaker": 1.0,
+    "lawsuit": 1.5, "probe": 1.5, "investigation": 1.5, "recall": 1.5, "layoffs": 1.5,
+    "cuts guidance": 2.0, "lowered guidance": 2.0, "warning": 1.0, "warns": 1.0,
+    "risk": 0.5, "risks": 0.5, "uncertainty": 1.0, "selloff": 1.5, "bankruptcy": 2.0,
+    "default": 1.5, "fraud": 2.0, "halt": 1.0, "concerns": 1.0,
+}
+NEGATORS = {"not", "no", "never", "without", "fails", "failed"}
+
+# Headlines carry more signal than summaries.
+HEADLINE_WEIGHT = 1.5
+SUMMARY_WEIGHT = 1.0
+
+_TOKEN = re.compile(r"[a-z]+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+TIER_CACHE = "cache"
+TIER_LOCAL = "local"
+TIER_LLM = "llm"
+
+
+def _bucket(term: str) -> int:
+    return zlib.crc32(term.encode("utf-8")) % HASH_BUCKETS
+
+
+class LexiconSentimentClassifier:
+    """Batch lexicon scorer over hashed n-grams."""
+
+    def __init__(self, positive: Dict[str, float] = POSITIVE_TERMS, negative: Dict[str, float] = NEGATIVE_TERMS):
+        self.weights = np.zeros(HASH_BUCKETS, dtype=np.float64)
+        for term, weight in positive.items():
+            self.weights[_bucket(term)] += weight
+        for term, weight in negative.items():
+            self.weights[_bucket(term)] -= weight
+
+    def score(self, articles: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """Signed sentiment score per article; positive means bullish."""
+        rows: List[int] = []
+        buckets: List[int] = []
+        scales: List[float] = []
+        for row, article in enumerate(articles):
+            for field, field_weight in (("headline", HEADLINE_WEIGHT), ("summary", SUMMARY_WEIGHT)):
+                tokens = _TOKEN.findall(str(article.get(field, "")).lower())
+                for i, token in enumerate(tokens):
+                    # A negator flips the next two tokens ("not a strong quarter").
+                    negated = any(t in NEGATORS for t in tokens[max(0, i - 2):i])
+                    scale = -field_weight if negated else field_weight
+                    rows.append(row)
+                    buckets.append(_bucket(token))
+                    scales.append(scale)
+                    if i + 1 < len(tokens):
+                        rows.append(row)
+                        buckets.append(_bucket(f"{token} {tokens[i + 1]}"))
+                        scales.append(scale)
+        if not rows:
+            return np.zeros(len(articles))
+        contributions = self.weights[np.asarray(buckets)] * np.asarray(scales)
+        return np.bincount(np.asarray(rows), weights=contributions, minlength=len(articles))
+
+    def classify(self, articles: Sequence[Dict[str, Any]]) -> Tuple[List[str], np.ndarray]:
+        """
+        Labels ('Positive'/'Negative'/'Neutral') and confidences in [0.5, 1).
+        Confidence is the logistic of the absolute score, so an article with
+        no lexicon hits sits at 0.5 and is always escalated.
+        """
+        scores = self.score(articles)
+        confidences = 1.0 / (1.0 + np.exp(-np.abs(scores)))
+        labels = [
+            "Positive" if s > 0 else "Negative" if s < 0 else "Neutral" for s in scores
+        ]
+        return labels, confidences
+
+
+def local_summary(article: Dict[str, Any]) -> str:
+    """The article's own first sentence, standing in for an LLM summary."""
+    summary = " ".join(str(article.get("summary", "")).split())
+    if not summary:
+        return str(article.get("headline", ""))
+    return _SENTENCE_END.split(summary, maxsplit=1)[0]
+
+
+class TierMetrics:
+    """Cumulative article counts and latency per insight tier."""
+
+    def __init__(self):
+        self.counts: Dict[str, int] = {TIER_CACHE: 0, TIER_LOCAL: 0, TIER_LLM: 0}
+        self.seconds: Dict[str, float] = {TIER_CACHE: 0.0, TIER_LOCAL: 0.0, TIER_LLM: 0.0}
+
+    def record(self, tier: str, articles: int, started: float) -> float:
+        elapsed = time.perf_counter() - started
+        self.counts[tier] += articles
+        self.seconds[tier] += elapsed
+        return elapsed
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {
+            tier: {
+                "articles": self.counts[tier],
+                "seconds": self.seconds[tier],
+                "ms_per_article": 1000 * self.seconds[tier] / self.counts[tier] if self.counts[tier] else None,
+            }
+            for tier in self.counts
+        }
+
+
+_default_classifier: Optional[LexiconSentimentClassifier] = None
+
+
+def default_classifier() -> LexiconSentimentClassifier:
+    global _default_classifier
+    if _default_classifier is None:
+        _default_classifier = LexiconSentimentClassifier()
+    return _default_classifier
@@ -0,0 +1,66 @@
+"""
+Token-budgeted prompt batching for the InsightMiner.
+
+Articles are reduced to the fields the analyst needs, serialized without
+whitespace, and packed in order into chunks whose rendered JSON stays under a
+token budget. Token counts are estimated from character length, which is
+close enough for budgeting and needs no tokenizer.
+"""
+import json
+from typing import Any, Dict, List, Sequence
+
+# Rough average for English text with Gemini-style tokenizers.
+CHARS_PER_TOKEN = 4
+
+# Article fields sent to the analyst; everything else stays in the artifact.
+PROMPT_FIELDS = ("headline", "summary")
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def compact_article(article: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: article[field] for field in PROMPT_FIELDS if article.get(field)}
+
+
+def render_articles(articles: Sequence[Dict[str, Any]]) -> str:
+    """The `{news_content}` value for a chunk: compact JSON of the prompt fields only."""
+    return json.dumps(
+        {"articles": [compact_article(article) for article in articles]},
+        separators=(",", ":"), ensure_ascii=False,
+    )
+
+
+def pack_articles(articles: Sequence[Dict[str, Any]], token_budget: int) -> List[List[Dict[str, Any]]]:
+    """
+    Splits `articles` into consecutive chunks whose rendered size stays
+    within `token_budget`. An article too large for the budget on its own
+    gets its summary truncated so that it fits in a chunk by itself.
+    """
+    # Overhead of the '{"articles":[]}' wrapper; each article also costs a comma.
+    wrapper_tokens = estimate_tokens(render_articles([]))
+    chunks: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    used = wrapper_tokens
+    for article in articles:
+        compact = compact_article(article)
+        cost = estimate_tokens(json.dumps(compact, separators=(",", ":"), ensure_ascii=False)) + 1
+        if wrapper_tokens + cost > token_budget:
+            compact = _truncated(compact, token_budget - wrapper_tokens - 1)
+            cost = token_budget - wrapper_tokens
+        if current and used + cost > token_budget:
+            chunks.append(current)
+            current, used = [], wrapper_tokens
+        current.append({**article, **compact})
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _truncated(compact: Dict[str, Any], token_budget: int) -> Dict[str, Any]:
+    overhead = json.dumps({**compact, "summary": ""}, separators=(",", ":"), ensure_ascii=False)
+    max_chars = max(0, (token_budget - estimate_tokens(overhead)) * CHARS_PER_TOKEN - 3)
+    summary = compact.get("summary", "")
+    return {**compact, "summary": summary[:max_chars] + "..."} if len(summary) > max_chars else compact
@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import re
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from guilds.common.context import isolated_context
+from .data_harvester.agent import extract_subjects_from_query
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Keys the news pipeline leaves in the session that must be kept per ticker.
+PER_TICKER_STATE_KEYS = ("status", "last_harvested_file", "last_insight_file")
+
+
+def normalize_tickers(value: Any) -> List[str]:
+    """A `tickers` state value as a list: a string is one ticker (or several, comma or space separated)."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [ticker for ticker in re.split(r"[,\s]+", value.strip()) if ticker]
+    return [str(ticker) for ticker in value]
+
+
+def ticker_state_key(key: str, ticker: str) -> str:
+    """Session-state key holding `key` for one ticker of a fan-out run, e.g. 'last_insight_file:MSFT'."""
+    return f"{key}:{ticker}"
+
+
+class NewsFanOut(BaseAgent):
+    """
+    Runs the news pipeline (harvest -> mine) for a basket of tickers at once.
+
+    Tickers come from the `tickers` session-state key when it is set (a list,
+    or a string for a single ticker), and otherwise from every ticker-like
+    token in the query (see `extract_subjects_from_query`). Each ticker runs in
+    its own copy of the session, so the instruction variables and state the
+    pipeline writes (`news_content`, `last_harvested_file`, ...) never leak
+    between concurrent tickers. At most `max_concurrency` tickers are in
+    flight, overridable per session via the `news_fanout_concurrency` key.
+
+    Artifacts are already named per subject. State written by a ticker is
+    forwarded to the real session under per-ticker keys (see
+    `ticker_state_key`), and the final event records the tickers that
+    succeeded and failed.
+    """
+    # The pipeline to run per ticker. It is not registered as a sub-agent
+    # because it is already parented by the orchestrator.
+    pipeline: BaseAgent
+    max_concurrency: int = 8
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        tickers = self._tickers(ctx)
+        concurrency = max(1, int(ctx.session.state.get("news_fanout_concurrency", self.max_concurrency)))
+        logger.info(
+            f"[{self.name}] Fanning out news pipeline over {len(tickers)} tickers "
+            f"(concurrency {concurrency})."
+        )
+
+        semaphore = asyncio.Semaphore(concurrency)
+        events: asyncio.Queue = asyncio.Queue()
+        results: Dict[str, bool] = {}
+        tasks = [
+            asyncio.create_task(self._run_ticker(ctx, ticker, semaphore, events, results))
+            for ticker in tickers
+        ]
+        try:
+            pending = len(tasks)
+            while pending:
+                event = await events.get()
+                if event is None:
+                    pending -= 1
+                    continue
+                yield event
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        succeeded = [ticker for ticker in tickers if results.get(ticker)]
+        failed = [ticker for ticker in tickers if not results.get(ticker)]
+        final_text = (
+            f"News fan-out finished for {len(tickers)} tickers: "
+            f"{len(succeeded)} succeeded, {len(failed)} failed."
+        )
+        if failed:
+            final_text += f" Failed: {', '.join(failed)}."
+        logger.info(f"[{self.name}] {final_text}")
+        yield Event(
+            author=self.name,
+            content=types.Content(parts=[types.Part(text=final_text)]),
+            actions=EventActions(state_delta={
+                "status": "fanout_success" if not failed else "fanout_partial",
+                "fanout_tickers": tickers,
+                "fanout_failed_tickers": failed,
+            }),
+        )
+
+    def _tickers(self, ctx: InvocationContext) -> List[str]:
+        tickers = normalize_tickers(ctx.session.state.get("tickers"))
+        if not tickers:
+            tickers = extract_subjects_from_query(ctx.user_content.parts[0].text)
+        return list(dict.fromkeys(tickers))
+
+    async def _run_ticker(
+        self,
+        ctx: InvocationContext,
+        ticker: str,
+        semaphore: asyncio.Semaphore,
+        events: asyncio.Queue,
+        results: Dict[str, bool],
+    ) -> None:
+        """Runs the pipeline for one ticker and forwards its events; None marks completion."""
+        try:
+            async with semaphore:
+                ticker_ctx = self._ticker_context(ctx, ticker)
+                async for event in self.pipeline.run_async(ticker_ctx):
+                    self._apply_to_ticker_session(ticker_ctx, event)
+                    await events.put(self._namespaced(event, ticker))
+
+                # InsightMiner writes its result straight into state rather than via an event.
+                state = ticker_ctx.session.state
+                delta = {
+                    ticker_state_key(key, ticker): state[key]
+                    for key in PER_TICKER_STATE_KEYS if key in state
+                }
+                results[ticker] = (
+                    state.get("last_insight_file") is not None
+                    or state.get("status") == "harvest_no_new_articles"
+                )
+                await events.put(Event(
+                    author=self.name,
+                    content=types.Content(parts=[types.Part(
+                        text=f"Finished news pipeline for {ticker}."
+                    )]),
+                    actions=EventActions(state_delta=delta),
+                ))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"[{self.name}] News pipeline failed for {ticker}: {e}")
+            results[ticker] = False
+        finally:
+            events.put_nowait(None)
+
+    def _ticker_context(self, ctx: InvocationContext, ticker: str) -> InvocationContext:
+        """A private copy of the session (see `isolated_context`), pinned to `ticker`."""
+        return isolated_context(
+            ctx,
+            state={"subject": ticker},
+            drop_keys=PER_TICKER_STATE_KEYS + ("news_content",),
+        )
+
+    @staticmethod
+    def _apply_to_ticker_session(ticker_ctx: InvocationContext, event: Event) -> None:
+        # Mirrors what the Runner does for the real session, so later agents in
+        # the pipeline see the state earlier ones wrote.
+        if event.partial:
+            return
+        if event.actions and event.actions.state_delta:
+            ticker_ctx.session.state.update(event.actions.state_delta)
+        ticker_ctx.session.events.append(event)
+
+    @staticmethod
+    def _namespaced(event: Event, ticker: str) -> Event:
+        """
+        The event as forwarded to the real session, with per-ticker keys for
+        the state every ticker shares. Other keys (e.g. the harvester's
+        per-subject cursors) are already ticker-specific and pass through.
+        """
+        delta: Optional[dict] = event.actions.state_delta if event.actions else None
+        if not delta or not any(key in PER_TICKER_STATE_KEYS for key in delta):
+            return event
+        namespaced = event.model_copy(deep=True)
+        namespaced.actions.state_delta = {
+            ticker_state_key(key, ticker) if key in PER_TICKER_STATE_KEYS else key: value
+            for key, value in delta.items()
+        }
+        return namespaced
@@ -10,6 +10,8 @@ from google.genai import types
 from .data_harvester.agent import root_agent as data_harvester_agent
 from .insight_miner.agent import root_agent as insight_miner_agent
 from .fundamental_analyst.agent import root_agent as fundamental_analyst_agent
+from .data_harvester.agent import extract_subjects_from_query
+from .news_fanout import NewsFanOut, normalize_tickers
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,15 +27,23 @@ filing_pipeline = SequentialAgent(
     sub_agents=[fundamental_analyst_agent]
 )
 
+# Runs news_pipeline concurrently for every ticker of a basket.
+news_fanout = NewsFanOut(
+    name="news_fanout",
+    pipeline=news_pipeline,
+)
+
 # [CORRECTED] The orchestrator now follows a standard Pydantic model structure.
 class IntelligenceOrchestrator(BaseAgent):
     """
     A deterministic router that delegates tasks to specialized pipelines
-    based on keywords in the user's query.
+    based on keywords in the user's query. News requests naming more than one
+    ticker (or carrying a `tickers` list in session state) go to the fan-out.
     """
     # Declare sub-agents as Pydantic fields.
     news_pipeline: SequentialAgent
     filing_pipeline: SequentialAgent
+    news_fanout: NewsFanOut
 
     async def _run_async_impl(
         self, ctx: InvocationContext
@@ -41,11 +51,19 @@ class IntelligenceOrchestrator(BaseAgent):
         """
         Inspects the user query and routes to the correct pipeline.
         """
-        user_query = ctx.user_content.parts[0].text.lower()
+        raw_query = ctx.user_content.parts[0].text
+        user_query = raw_query.lower()
         logger.info(f"[{self.name}] Routing query: '{user_query}'")
 
+        is_news_query = any(keyword in user_query for keyword in ["news", "articles", "sentiment"])
+        is_basket = bool(normalize_tickers(ctx.session.state.get("tickers"))) or len(extract_subjects_from_query(raw_query)) > 1
+
         # Deterministic routing logic using the instance attributes.
-        if any(keyword in user_query for keyword in ["news", "articles", "sentiment"]):
+        if is_news_query and is_basket:
+            logger.info(f"[{self.name}] Delegating to news_fanout.")
+            async for event in self.news_fanout.run_async(ctx):
+                yield event
+        elif is_news_query:
             logger.info(f"[{self.name}] Delegating to news_pipeline.")
             async for event in self.news_pipeline.run_async(ctx):
                 yield event
@@ -68,6 +86,7 @@ root_agent = IntelligenceOrchestrator(
     name="intelligence_orchestrator",
     news_pipeline=news_pipeline,
     filing_pipeline=filing_pipeline,
+    news_fanout=news_fanout,
     # The framework still needs to know about the hierarchy for context.
-    sub_agents=[news_pipeline, filing_pipeline]
+    sub_agents=[news_pipeline, filing_pipeline, news_fanout]
 )
\ No newline at end of file
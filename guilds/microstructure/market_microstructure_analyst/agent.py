@@ -1,13 +1,22 @@
 import asyncio
-import json
 import logging
-from typing import AsyncGenerator
+import struct
+from typing import Any, AsyncGenerator, List, Optional, Tuple
 
 from google.adk.agents import BaseAgent
 from google.adk.agents.invocation_context import InvocationContext
+from google.adk.agents.live_request_queue import LiveRequest
 from google.adk.events import Event
 from google.genai.types import Part
 
+from .alerting import EPISODE_OPEN, AlertCoalescer, EpisodeEvent
+from .analyzer import MALFORMED_TICK_ERRORS, Tick, TickAnalyzer
+from .batching import drain_live_requests
+from .sharding import SHARD_MODE_TASKS, ShardedTickRouter
+from .tick_capture import TickCaptureWriter
+from .volume import get_volume_tracker
+from .wire_format import decode_payload, ticker_of
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -15,7 +24,51 @@ class MarketMicrostructureAnalyst(BaseAgent):
     """
     A streaming agent that analyzes real-time Level 2 order book data
     to detect anomalies like wide bid-ask spreads.
+
+    Anomalies come from the streaming detectors named in `anomaly_detectors`
+    (every registered detector by default), each scoring a ticker against its
+    own history rather than a fixed price threshold.
+
+    With `num_shards > 1` the session's tickers are hash-partitioned across
+    shard workers (event-loop tasks or processes, see `shard_mode`) that each
+    own their books, and their alerts are merged back into one event stream.
+
+    With `tick_batch_size > 1` the live queue is drained in micro-batches of up
+    to that many ticks, waiting at most `tick_batch_latency_us` for a batch to
+    fill. Sessions can override both through the `tick_batch_size` and
+    `tick_batch_latency_us` state keys.
+
+    When `capture_dir` is set, every received tick is also appended to a
+    replayable capture there (see `tick_capture.py`).
+
+    Alerts are coalesced into episodes per (ticker, detector) before they are
+    emitted: one event when an episode opens, at most one update every
+    `alert_update_interval_s`, and one when it has been quiet for
+    `alert_cooldown_s`. Opens and updates are further limited to
+    `alert_rate_per_s` of feed time (bursts of `alert_burst`) per live session; see
+    `alerting.py`. Per-tick logging is off unless `tick_log_every` is set,
+    in which case roughly one tick in that many is logged.
+
+    With `track_volume` (the default) every decoded tick also updates the
+    shared traded-volume estimates in `volume.py`, which percent-of-volume
+    execution schedules read.
     """
+    num_shards: int = 1
+    shard_mode: str = SHARD_MODE_TASKS
+    shard_queue_size: int = 1024
+    tick_batch_size: int = 1
+    tick_batch_latency_us: int = 500
+    anomaly_detectors: Optional[List[str]] = None
+    capture_dir: Optional[str] = None
+    alert_cooldown_s: float = 5.0
+    alert_update_interval_s: float = 1.0
+    alert_rate_per_s: float = 50.0
+    alert_burst: int = 100
+    tick_log_every: int = 0
+    track_volume: bool = True
+    # Runner.run_live() scans `agent.tools` for streaming tools; this agent has none.
+    tools: List[Any] = []
+
     # This method MUST be named _run_live_impl to work with runner.run_live()
     async def _run_live_impl(
         self, ctx: InvocationContext
@@ -24,38 +77,188 @@ class MarketMicrostructureAnalyst(BaseAgent):
         Continuously processes incoming data from the live_request_queue.
         """
         logger.info(f"[{self.name}] Live analysis stream started. Waiting for data...")
-        
-        while True:
-            try:
-                live_req = await ctx.live_request_queue.get()
-
-                if live_req.blob:
-                    order_book = json.loads(live_req.blob.data)
-                    
-                    best_bid = order_book["bids"][0]["price"]
-                    best_ask = order_book["asks"][0]["price"]
-                    spread = best_ask - best_bid
-                    
+        if self.num_shards > 1:
+            async for event in self._run_sharded(ctx):
+                yield event
+            return
+
+        # One incremental book per ticker, owned by this live session.
+        analyzer = TickAnalyzer(self.anomaly_detectors)
+        batch_size, batch_latency_us = self._batch_settings(ctx)
+        capture = TickCaptureWriter(self.capture_dir) if self.capture_dir else None
+        coalescer = self._new_coalescer()
+        ticks_seen = 0
+
+        try:
+            while True:
+                # Set before anything can fail, so a close request is honoured even when its batch errors.
+                closed = False
+                episode_events: List[EpisodeEvent] = []
+                try:
+                    live_reqs = await drain_live_requests(
+                        ctx.live_request_queue, batch_size, batch_latency_us
+                    )
+                    ticks, closed = self._decode_batch(live_reqs, capture)
+
+                    if ticks:
+                        alerts = analyzer.process_batch(ticks)
+                        for alert in alerts:
+                            episode_events.extend(coalescer.offer(alert))
+                        # Feed time of the last tick the analyzer applied; raw ticks may be malformed.
+                        if analyzer.timestamp_ns is not None:
+                            episode_events.extend(coalescer.expire(analyzer.timestamp_ns))
+
+                        # Logging every tick dominates the hot path, so it is sampled.
+                        previous, ticks_seen = ticks_seen, ticks_seen + len(ticks)
+                        if self.tick_log_every > 0 and (
+                            ticks_seen // self.tick_log_every != previous // self.tick_log_every
+                        ):
+                            self._log_tick_sample(analyzer, ticks, len(alerts))
+
+                except asyncio.CancelledError:
+                    logger.info(f"[{self.name}] Live stream cancelled. Shutting down.")
+                    break
+                except Exception as e:
+                    logger.error(f"[{self.name}] Error in live stream: {e}")
+
+                if closed:
+                    episode_events.extend(coalescer.flush())
+
+                for episode_event in episode_events:
+                    yield self._alert_event(episode_event)
+
+                if closed:
                     logger.info(
-                        f"[{self.name}] Tick received for {order_book['ticker']}: "
-                        f"Spread = {spread:.2f}"
+                        f"[{self.name}] Live request queue closed after {ticks_seen} ticks "
+                        f"({coalescer.suppressed} alerts coalesced or rate limited)."
+                    )
+                    break
+        finally:
+            if capture is not None:
+                capture.close()
+
+    def _new_coalescer(self) -> AlertCoalescer:
+        return AlertCoalescer(
+            cooldown_s=self.alert_cooldown_s,
+            update_interval_s=self.alert_update_interval_s,
+            rate_per_s=self.alert_rate_per_s,
+            burst=self.alert_burst,
+        )
+
+    def _log_tick_sample(self, analyzer: TickAnalyzer, ticks: List[Tick], alert_count: int) -> None:
+        try:
+            book = analyzer.books[ticker_of(ticks[-1])]
+        except MALFORMED_TICK_ERRORS:
+            book = None
+        if len(ticks) > 1:
+            logger.info(
+                f"[{self.name}] Processed batch of {len(ticks)} ticks ({alert_count} alerts)."
+            )
+        if book is not None and book.is_valid:
+            logger.info(
+                f"[{self.name}] Tick received for {book.ticker}: "
+                f"Spread = {book.spread:.2f}, Microprice = {book.microprice():.4f}, "
+                f"Imbalance = {book.imbalance():+.2f}"
+            )
+
+    def _batch_settings(self, ctx: InvocationContext) -> Tuple[int, int]:
+        """Batch size and latency budget, overridable per session via state."""
+        state = ctx.session.state
+        return (
+            int(state.get("tick_batch_size", self.tick_batch_size)),
+            int(state.get("tick_batch_latency_us", self.tick_batch_latency_us)),
+        )
+
+    def _decode_batch(
+        self, live_reqs: List[LiveRequest], capture: Optional[TickCaptureWriter] = None
+    ) -> Tuple[List[Tick], bool]:
+        """Decodes the blobs of a drained batch; malformed ticks are dropped."""
+        ticks: List[Tick] = []
+        volume = get_volume_tracker() if self.track_volume else None
+        for live_req in live_reqs:
+            if live_req.close:
+                return ticks, True
+            if live_req.blob:
+                if capture is not None:
+                    try:
+                        capture.write_blob(live_req.blob)
+                    except ValueError as e:
+                        logger.error(f"[{self.name}] Not capturing tick: {e}")
+                try:
+                    # The blob's mime type selects binary ticks or the JSON fallback.
+                    tick = decode_payload(live_req.blob.data, live_req.blob.mime_type)
+                except (ValueError, struct.error) as e:
+                    logger.error(f"[{self.name}] Dropping malformed tick: {e}")
+                    continue
+                if volume is not None:
+                    try:
+                        volume.observe(tick)
+                    except MALFORMED_TICK_ERRORS as e:
+                        logger.error(f"[{self.name}] Dropping malformed tick: {e!r}")
+                        continue
+                ticks.append(tick)
+        return ticks, False
+
+    async def _run_sharded(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        router = ShardedTickRouter(
+            num_shards=self.num_shards,
+            mode=self.shard_mode,
+            queue_size=self.shard_queue_size,
+            detectors=self.anomaly_detectors,
+        )
+        await router.start()
+        dispatcher = asyncio.create_task(self._dispatch_to_shards(ctx, router))
+        coalescer = self._new_coalescer()
+        try:
+            # Shards merge out of feed-time order, so quiet episodes are closed
+            # as later alerts arrive and the rest when the stream ends.
+            async for alert in router.alerts():
+                for episode_event in coalescer.offer(alert) + coalescer.expire(alert.timestamp_ns):
+                    yield self._alert_event(episode_event)
+            for episode_event in coalescer.flush():
+                yield self._alert_event(episode_event)
+        except asyncio.CancelledError:
+            logger.info(f"[{self.name}] Live stream cancelled. Shutting down.")
+        finally:
+            dispatcher.cancel()
+            await router.cancel()
+
+    async def _dispatch_to_shards(self, ctx: InvocationContext, router: ShardedTickRouter) -> None:
+        """Feeds the live request queue into the shard router until it closes."""
+        batch_size, batch_latency_us = self._batch_settings(ctx)
+        capture = TickCaptureWriter(self.capture_dir) if self.capture_dir else None
+        try:
+            while True:
+                closed = False
+                try:
+                    live_reqs = await drain_live_requests(
+                        ctx.live_request_queue, batch_size, batch_latency_us
                     )
+                    ticks, closed = self._decode_batch(live_reqs, capture)
+                    for tick in ticks:
+                        # A tick without a usable ticker cannot be routed; drop it, not the session.
+                        try:
+                            await router.submit(tick)
+                        except MALFORMED_TICK_ERRORS as e:
+                            logger.error(f"[{self.name}] Dropping malformed tick: {e!r}")
+                except Exception as e:
+                    logger.error(f"[{self.name}] Error in live stream: {e}")
+                if closed:
+                    logger.info(f"[{self.name}] Live request queue closed.")
+                    break
+        finally:
+            if capture is not None:
+                capture.close()
+            await router.close()
+
+    def _alert_event(self, episode_event: EpisodeEvent) -> Event:
+        if episode_event.phase == EPISODE_OPEN:
+            logger.warning(f"[{self.name}] {episode_event.message}")
+        else:
+            logger.info(f"[{self.name}] {episode_event.message}")
+        return Event(
+            author=self.name,
+            content={"parts": [Part(text=episode_event.message)]}
+        )
 
-                    if spread > 0.15:
-                        alert_message = (
-                            f"ALERT: Wide spread detected for {order_book['ticker']}: "
-                            f"{spread:.2f} at {order_book['timestamp_utc']}"
-                        )
-                        logger.warning(f"[{self.name}] {alert_message}")
-                        yield Event(
-                            author=self.name,
-                            content={"parts": [Part(text=alert_message)]}
-                        )
-
-            except asyncio.CancelledError:
-                logger.info(f"[{self.name}] Live stream cancelled. Shutting down.")
-                break
-            except Exception as e:
-                logger.error(f"[{self.name}] Error in live stream: {e}")
-
-root_agent = MarketMicrostructureAnalyst(name="market_microstructure_analyst")
\ No newline at end of file
+root_agent = MarketMicrostructureAnalyst(name="market_microstructure_analyst")
@@ -0,0 +1,175 @@
+"""
+Alert coalescing and rate limiting for the microstructure guild.
+
+Detectors fire on every qualifying tick, so a sustained wide spread produces
+one alert per tick. `AlertCoalescer` folds those into episodes per
+(ticker, detector): the first alert opens an episode, further alerts update
+it (surfaced at most every `update_interval_s`), and the episode closes once
+no alert has arrived for `cooldown_s`. Episode timing and the token bucket
+below both follow the feed's tick timestamps, never the wall clock, so a
+replayed capture coalesces exactly like the live run.
+
+Opens and updates are also charged against a per-consumer `TokenBucket`;
+when the bucket is empty they are held back rather than queued. An episode
+whose open was held back is announced by its next alert once tokens are
+available again, and its close is only emitted if it was announced.
+"""
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Tuple
+
+from .analyzer import Alert
+from .wire_format import format_timestamp_ns
+
+EPISODE_OPEN = "open"
+EPISODE_UPDATE = "update"
+EPISODE_CLOSE = "close"
+
+
+class TokenBucket:
+    """
+    Allows `rate_per_s` operations per second of feed time, with bursts of up
+    to `burst`. Refills are driven by the timestamps passed to `try_acquire`;
+    a timestamp older than the last one seen refills nothing.
+    """
+    __slots__ = ("rate_per_s", "burst", "tokens", "_last_ns")
+
+    def __init__(self, rate_per_s: float, burst: int):
+        self.rate_per_s = rate_per_s
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self._last_ns: Optional[int] = None
+
+    def try_acquire(self, now_ns: int) -> bool:
+        if self._last_ns is None:
+            self._last_ns = now_ns
+        elif now_ns > self._last_ns:
+            self.tokens = min(self.burst, self.tokens + (now_ns - self._last_ns) / 1e9 * self.rate_per_s)
+            self._last_ns = now_ns
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+class AlertEpisode:
+    """State of one ongoing (ticker, detector) anomaly."""
+    __slots__ = (
+        "ticker", "kind", "opened_ns", "last_ns", "last_emitted_ns",
+        "count", "latest", "announced",
+    )
+
+    def __init__(self, alert: Alert):
+        self.ticker = alert.ticker
+        self.kind = alert.kind
+        self.opened_ns = alert.timestamp_ns
+        self.last_ns = alert.timestamp_ns
+        self.last_emitted_ns = alert.timestamp_ns
+        self.count = 1
+        self.latest = alert
+        self.announced = False
+
+
+class EpisodeEvent(NamedTuple):
+    """An episode transition to surface to consumers."""
+    phase: str
+    ticker: str
+    kind: str
+    message: str
+    count: int
+    alert: Alert
+
+
+class AlertCoalescer:
+    """
+    Turns a stream of per-tick alerts into episode open/update/close events.
+
+    `offer()` takes each alert as it is raised; `expire(now_ns)` closes the
+    episodes that have been quiet for `cooldown_s` as of feed time `now_ns`,
+    and `flush()` closes everything when the stream ends.
+    """
+
+    def __init__(
+        self,
+        cooldown_s: float = 5.0,
+        update_interval_s: float = 1.0,
+        rate_per_s: float = 50.0,
+        burst: int = 100,
+    ):
+        self.cooldown_ns = int(cooldown_s * 1e9)
+        self.update_interval_ns = int(update_interval_s * 1e9)
+        self.bucket = TokenBucket(rate_per_s, burst)
+        # Ordered by last activity, oldest first, so expiry stops at the first live episode.
+        self._episodes: "OrderedDict[Tuple[str, str], AlertEpisode]" = OrderedDict()
+        self.suppressed = 0
+
+    def offer(self, alert: Alert) -> List[EpisodeEvent]:
+        events: List[EpisodeEvent] = []
+        key = (alert.ticker, alert.kind)
+        episode = self._episodes.get(key)
+        if episode is not None and alert.timestamp_ns - episode.last_ns > self.cooldown_ns:
+            del self._episodes[key]
+            self._close(episode, events)
+            episode = None
+
+        if episode is None:
+            episode = self._episodes[key] = AlertEpisode(alert)
+        else:
+            episode.count += 1
+            episode.last_ns = alert.timestamp_ns
+            episode.latest = alert
+            self._episodes.move_to_end(key)
+
+        if not episode.announced:
+            if self.bucket.try_acquire(alert.timestamp_ns):
+                episode.announced = True
+                episode.last_emitted_ns = alert.timestamp_ns
+                events.append(EpisodeEvent(
+                    EPISODE_OPEN, alert.ticker, alert.kind, alert.message, episode.count, alert
+                ))
+            else:
+                self.suppressed += 1
+        elif alert.timestamp_ns - episode.last_emitted_ns >= self.update_interval_ns:
+            if self.bucket.try_acquire(alert.timestamp_ns):
+                episode.last_emitted_ns = alert.timestamp_ns
+                events.append(EpisodeEvent(
+                    EPISODE_UPDATE, alert.ticker, alert.kind,
+                    f"UPDATE: {alert.kind} episode for {alert.ticker} still active, "
+                    f"{episode.count} alerts since {format_timestamp_ns(episode.opened_ns)}. "
+                    f"Latest: {alert.message}",
+                    episode.count, alert,
+                ))
+            else:
+                self.suppressed += 1
+        else:
+            self.suppressed += 1
+        return events
+
+    def expire(self, now_ns: int) -> List[EpisodeEvent]:
+        events: List[EpisodeEvent] = []
+        while self._episodes:
+            key, episode = next(iter(self._episodes.items()))
+            if now_ns - episode.last_ns <= self.cooldown_ns:
+                break
+            del self._episodes[key]
+            self._close(episode, events)
+        return events
+
+    def flush(self) -> List[EpisodeEvent]:
+        events: List[EpisodeEvent] = []
+        for episode in self._episodes.values():
+            self._close(episode, events)
+        self._episodes.clear()
+        return events
+
+    def _close(self, episode: AlertEpisode, events: List[EpisodeEvent]) -> None:
+        # Closes are not rate limited: there is at most one per announced open.
+        if not episode.announced:
+            return
+        duration_s = (episode.last_ns - episode.opened_ns) / 1e9
+        events.append(EpisodeEvent(
+            EPISODE_CLOSE, episode.ticker, episode.kind,
+            f"RESOLVED: {episode.kind} episode for {episode.ticker} ended after "
+            f"{episode.count} alerts over {duration_s:.1f}s "
+            f"(last at {format_timestamp_ns(episode.last_ns)})",
+            episode.count, episode.latest,
+        ))
@@ -0,0 +1,186 @@
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+
+from .detectors import Detector, TickFeatures, build_detectors
+from .order_book import OrderBook
+from .wire_format import PRICE_SCALE, L2Tick, parse_timestamp_ns
+
+logger = logging.getLogger(__name__)
+
+Tick = Union[Dict[str, Any], L2Tick]
+
+# Levels per side used for depth and imbalance features.
+FEATURE_DEPTH_LEVELS = 5
+# What applying a decoded tick with missing or mistyped fields raises.
+MALFORMED_TICK_ERRORS = (KeyError, TypeError, ValueError, IndexError)
+
+
+class Alert(NamedTuple):
+    """An anomaly raised by the analyzer for a single ticker."""
+    ticker: str
+    kind: str
+    message: str
+    timestamp_utc: str
+    timestamp_ns: int = 0
+
+
+class TickAnalyzer:
+    """
+    Owns the order books and anomaly state for a set of tickers and turns
+    incoming snapshots into alerts.
+
+    Each tick is reduced to a handful of book features (spread in bps,
+    imbalance, depth, mid) which are fed to the configured streaming
+    detectors; see `detectors.py`. It has no dependency on the ADK so the
+    same analyzer can run inline in the agent, inside a shard task, or inside
+    a shard worker process.
+
+    `timestamp_ns` is the feed time of the last tick successfully applied,
+    or None before the first one.
+    """
+    __slots__ = ("books", "detectors", "timestamp_ns", "_states", "_features")
+
+    def __init__(self, detectors: Optional[Sequence[str]] = None):
+        self.books: Dict[str, OrderBook] = {}
+        self.timestamp_ns: Optional[int] = None
+        self.detectors: List[Detector] = build_detectors(detectors)
+        # Per-ticker detector states, index-aligned with self.detectors.
+        self._states: Dict[str, List[Any]] = {}
+        self._features = TickFeatures()
+
+    def book_for(self, ticker: str) -> OrderBook:
+        book = self.books.get(ticker)
+        if book is None:
+            book = self.books[ticker] = OrderBook(ticker)
+            self._states[ticker] = [detector.new_state() for detector in self.detectors]
+        return book
+
+    def process(self, tick: Tick) -> List[Alert]:
+        """
+        Applies a decoded tick (a binary `L2Tick` or a JSON snapshot dict) to
+        its book and returns any alerts.
+        """
+        book = self.apply(tick)
+        if not book.is_valid:
+            return []
+        levels = FEATURE_DEPTH_LEVELS
+        bid_volume = float(book.bid_sizes[:min(levels, book.bid_count)].sum())
+        ask_volume = float(book.ask_sizes[:min(levels, book.ask_count)].sum())
+        return self._detect(
+            book.ticker, tick, self.timestamp_ns, book.best_bid, book.best_ask, bid_volume, ask_volume
+        )
+
+    def process_batch(self, ticks: Sequence[Tick]) -> List[Alert]:
+        """
+        Applies a batch of ticks in arrival order and evaluates them together.
+
+        Top-of-book prices and depth are captured per tick while the books are
+        updated, the derived features are computed for the whole batch at
+        once, and the O(1) detectors then run over them in tick order, so
+        alerts come back in the same order as the ticks that raised them.
+        A tick that cannot be applied (say, a JSON snapshot without `bids`)
+        is logged and skipped; the rest of the batch is still evaluated.
+        """
+        if len(ticks) == 1:
+            try:
+                return self.process(ticks[0])
+            except MALFORMED_TICK_ERRORS as e:
+                logger.error(f"Skipping a tick that cannot be applied to a book: {e!r}")
+                return []
+        n = len(ticks)
+        levels = FEATURE_DEPTH_LEVELS
+        raw = np.full((4, n), np.nan)
+        best_bids, best_asks, bid_volumes, ask_volumes = raw
+        tickers: List[Optional[str]] = []
+        timestamps: List[Optional[int]] = []
+        for i, tick in enumerate(ticks):
+            try:
+                book = self.apply(tick)
+            except MALFORMED_TICK_ERRORS as e:
+                logger.error(f"Skipping a tick that cannot be applied to a book: {e!r}")
+                tickers.append(None)
+                timestamps.append(None)
+                continue
+            tickers.append(book.ticker)
+            timestamps.append(self.timestamp_ns)
+            if book.is_valid:
+                best_bids[i] = book.bid_prices[0]
+                best_asks[i] = book.ask_prices[0]
+                bid_volumes[i] = book.bid_sizes[:min(levels, book.bid_count)].sum()
+                ask_volumes[i] = book.ask_sizes[:min(levels, book.ask_count)].sum()
+
+        mids = (best_bids + best_asks) * 0.5
+        spreads = best_asks - best_bids
+        with np.errstate(divide="ignore", invalid="ignore"):
+            spreads_bps = spreads / mids * 10_000.0
+            depths = bid_volumes + ask_volumes
+            imbalances = np.where(depths > 0, (bid_volumes - ask_volumes) / depths, 0.0)
+
+        alerts: List[Alert] = []
+        valid = ~np.isnan(spreads)
+        for i in np.flatnonzero(valid):
+            alerts.extend(self._run_detectors(
+                tickers[i], ticks[i], timestamps[i], float(mids[i]), float(spreads[i]),
+                float(spreads_bps[i]), float(imbalances[i]), float(depths[i]),
+            ))
+        return alerts
+
+    def apply(self, tick: Tick) -> OrderBook:
+        """Applies a decoded tick to its ticker's book and returns the book."""
+        if isinstance(tick, L2Tick):
+            book = self.book_for(tick.ticker)
+            book.apply_fixed_point(
+                tick.bid_prices, tick.bid_sizes, tick.ask_prices, tick.ask_sizes,
+                PRICE_SCALE, tick.timestamp_ns,
+            )
+            self.timestamp_ns = tick.timestamp_ns
+        else:
+            # Parsed first, so a tick with a garbled timestamp is rejected before it touches a book.
+            timestamp_ns = parse_timestamp_ns(tick["timestamp_utc"])
+            book = self.book_for(tick["ticker"])
+            book.apply_snapshot(tick["bids"], tick["asks"], tick["timestamp_utc"])
+            self.timestamp_ns = timestamp_ns
+        return book
+
+    def _detect(
+        self, ticker: str, tick: Tick, timestamp_ns: int, best_bid: float, best_ask: float,
+        bid_volume: float, ask_volume: float,
+    ) -> List[Alert]:
+        mid = (best_bid + best_ask) * 0.5
+        spread = best_ask - best_bid
+        depth = bid_volume + ask_volume
+        return self._run_detectors(
+            ticker, tick, timestamp_ns, mid, spread,
+            spread / mid * 10_000.0 if mid > 0 else float("nan"),
+            (bid_volume - ask_volume) / depth if depth > 0 else 0.0,
+            depth,
+        )
+
+    def _run_detectors(
+        self, ticker: str, tick: Tick, timestamp_ns: int, mid: float, spread: float,
+        spread_bps: float, imbalance: float, depth: float,
+    ) -> List[Alert]:
+        features = self._features
+        features.ticker = ticker
+        features.timestamp_ns = timestamp_ns
+        features._timestamp_utc = None if isinstance(tick, L2Tick) else tick["timestamp_utc"]
+        features.mid = mid
+        features.spread = spread
+        features.spread_bps = spread_bps
+        features.imbalance = imbalance
+        features.depth = depth
+
+        alerts: List[Alert] = []
+        for detector, state in zip(self.detectors, self._states[ticker]):
+            message = detector.update(state, features)
+            if message is not None:
+                alerts.append(Alert(
+                    ticker=ticker,
+                    kind=detector.name,
+                    message=message,
+                    timestamp_utc=features.timestamp_utc,
+                    timestamp_ns=features.timestamp_ns,
+                ))
+        return alerts
@@ -0,0 +1,48 @@
+import asyncio
+from typing import List
+
+from google.adk.agents import LiveRequestQueue
+from google.adk.agents.live_request_queue import LiveRequest
+
+
+async def drain_live_requests(
+    live_request_queue: LiveRequestQueue,
+    max_batch_size: int,
+    max_latency_us: int,
+) -> List[LiveRequest]:
+    """
+    Waits for the next live request, then keeps collecting until the batch
+    holds `max_batch_size` requests, `max_latency_us` microseconds have
+    passed since the first one arrived, or a close request is seen.
+
+    Requests already sitting in the queue are taken without awaiting, so a
+    burst is drained in a single pass; the latency budget only bounds how
+    long we wait for stragglers.
+    """
+    batch = [await live_request_queue.get()]
+    if max_batch_size <= 1 or batch[0].close:
+        return batch
+
+    # LiveRequestQueue wraps an asyncio.Queue; read it directly when we can.
+    backing = getattr(live_request_queue, "_queue", None)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_latency_us / 1_000_000
+
+    while len(batch) < max_batch_size and not batch[-1].close:
+        if backing is not None and not backing.empty():
+            batch.append(backing.get_nowait())
+            continue
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        getter = asyncio.ensure_future(live_request_queue.get())
+        done, _ = await asyncio.wait({getter}, timeout=remaining)
+        if not done:
+            getter.cancel()
+            await asyncio.wait({getter})
+            # The get may have completed just before the cancel landed; keep it.
+            if not getter.cancelled():
+                batch.append(getter.result())
+            break
+        batch.append(getter.result())
+    return batch
@@ -1,35 +1,70 @@
 import asyncio
 import datetime
 import json
+import math
 import random
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Dict, List, Optional, Union
 
-async def mock_l2_feed(ticker: str) -> AsyncGenerator[str, None]:
+from .wire_format import JSON_MIME_TYPE, L2_BINARY_MIME_TYPE, encode_snapshot
+
+def _mock_snapshot(ticker: str, base_price: float = 150.00) -> Dict[str, Any]:
+    """Builds one random order book snapshot around `base_price`."""
+    # Simulate slight price fluctuations
+    bid_price = base_price - random.uniform(0.01, 0.05)
+    ask_price = base_price + random.uniform(0.01, 0.05)
+
+    # Introduce an occasional anomaly (wide spread)
+    if random.random() < 0.1: # 10% chance of an anomaly
+        ask_price += 0.20
+
+    return {
+        "ticker": ticker,
+        "timestamp_utc": datetime.datetime.utcnow().isoformat(),
+        "bids": [
+            {"price": round(bid_price, 2), "size": random.randint(10, 50)},
+            {"price": round(bid_price - 0.01, 2), "size": random.randint(50, 100)},
+        ],
+        "asks": [
+            {"price": round(ask_price, 2), "size": random.randint(10, 50)},
+            {"price": round(ask_price + 0.01, 2), "size": random.randint(50, 100)},
+        ],
+    }
+
+def encode_for(snapshot: Dict[str, Any], mime_type: str) -> Union[str, bytes]:
+    """Serializes a snapshot for the negotiated wire format."""
+    if mime_type == L2_BINARY_MIME_TYPE:
+        return encode_snapshot(snapshot)
+    return json.dumps(snapshot)
+
+async def mock_l2_feed(
+    ticker: str, mime_type: str = JSON_MIME_TYPE, interval: float = 1.0
+) -> AsyncGenerator[Union[str, bytes], None]:
     """
     An asynchronous generator that simulates a real-time Level 2 market data feed.
-    It yields a new JSON-formatted order book snapshot every second.
+    It yields a new order book snapshot every `interval` seconds: a JSON string
+    by default, or packed bytes when `mime_type` is `L2_BINARY_MIME_TYPE`.
     """
-    base_price = 150.00
     while True:
-        # Simulate slight price fluctuations
-        bid_price = base_price - random.uniform(0.01, 0.05)
-        ask_price = base_price + random.uniform(0.01, 0.05)
-        
-        # Introduce an occasional anomaly (wide spread)
-        if random.random() < 0.1: # 10% chance of an anomaly
-            ask_price += 0.20 
+        yield encode_for(_mock_snapshot(ticker), mime_type)
+        await asyncio.sleep(interval) # Wait before the next update
 
-        order_book_snapshot = {
-            "ticker": ticker,
-            "timestamp_utc": datetime.datetime.utcnow().isoformat(),
-            "bids": [
-                {"price": round(bid_price, 2), "size": random.randint(10, 50)},
-                {"price": round(bid_price - 0.01, 2), "size": random.randint(50, 100)},
-            ],
-            "asks": [
-                {"price": round(ask_price, 2), "size": random.randint(10, 50)},
-                {"price": round(ask_price + 0.01, 2), "size": random.randint(50, 100)},
-            ],
-        }
-        yield json.dumps(order_book_snapshot)
-        await asyncio.sleep(1) # Wait 1 second before the next update
\ No newline at end of file
+async def mock_l2_universe_feed(
+    tickers: List[str],
+    interval: float = 1.0,
+    mime_type: str = JSON_MIME_TYPE,
+    base_prices: Optional[Dict[str, float]] = None,
+    volatility: float = 0.0,
+) -> AsyncGenerator[Union[str, bytes], None]:
+    """
+    Simulates a feed for a whole universe of tickers. Each round yields one
+    snapshot per ticker, then waits `interval` seconds. Tickers start at
+    `base_prices` (150.00 by default) and, with a nonzero `volatility`, follow
+    a random walk with that standard deviation of log return per round.
+    """
+    prices = {ticker: (base_prices or {}).get(ticker, 150.00) for ticker in tickers}
+    while True:
+        for ticker in tickers:
+            if volatility:
+                prices[ticker] *= math.exp(random.gauss(0.0, volatility))
+            yield encode_for(_mock_snapshot(ticker, prices[ticker]), mime_type)
+        await asyncio.sleep(interval)
@@ -0,0 +1,281 @@
+"""
+Streaming anomaly detectors for the microstructure guild.
+
+Each detector is stateless itself and keeps its per-ticker state in a small
+slotted object created by `new_state()`, so one detector instance serves
+every ticker of a shard and each tick costs O(1). Register new detectors with
+`@register_detector` and select them by name through `build_detectors()`.
+"""
+import math
+from typing import Dict, List, Optional, Sequence, Type
+
+from .wire_format import format_timestamp_ns
+
+
+class TickFeatures:
+    """
+    Book features for the tick being evaluated. The analyzer reuses a single
+    instance for every tick, so detectors must not hold on to it.
+    """
+    __slots__ = (
+        "ticker", "timestamp_ns", "_timestamp_utc",
+        "mid", "spread", "spread_bps", "imbalance", "depth",
+    )
+
+    def __init__(self):
+        self.ticker = ""
+        self.timestamp_ns = 0
+        self._timestamp_utc: Optional[str] = None
+        self.mid = math.nan
+        self.spread = math.nan
+        self.spread_bps = math.nan
+        self.imbalance = 0.0
+        self.depth = 0.0
+
+    @property
+    def timestamp_utc(self) -> str:
+        if self._timestamp_utc is None:
+            self._timestamp_utc = format_timestamp_ns(self.timestamp_ns)
+        return self._timestamp_utc
+
+
+class EwmaStats:
+    """
+    Exponentially weighted mean and variance of one series.
+
+    The first `warmup` samples use Welford's algorithm so the baseline starts
+    from an unbiased estimate; afterwards the EWMA takes over. Once warmed up,
+    samples are clamped to `clamp` standard deviations before updating so a
+    sustained anomaly does not immediately become the new normal.
+    """
+    __slots__ = ("mean", "var", "count")
+
+    def __init__(self):
+        self.mean = 0.0
+        self.var = 0.0
+        self.count = 0
+
+    def zscore(self, x: float) -> float:
+        std = math.sqrt(self.var)
+        return (x - self.mean) / std if std > 0 else 0.0
+
+    def update(self, x: float, alpha: float, warmup: int, clamp: float) -> None:
+        self.count += 1
+        if self.count <= warmup:
+            delta = x - self.mean
+            self.mean += delta / self.count
+            # Population variance via Welford's running M2 / n.
+            self.var += (delta * (x - self.mean) - self.var) / self.count
+            return
+        std = math.sqrt(self.var)
+        if std > 0:
+            x = min(max(x, self.mean - clamp * std), self.mean + clamp * std)
+        delta = x - self.mean
+        self.mean += alpha * delta
+        self.var = (1.0 - alpha) * (self.var + alpha * delta * delta)
+
+
+class Detector:
+    """Base class for per-tick anomaly detectors."""
+    name = "detector"
+
+    def new_state(self):
+        raise NotImplementedError
+
+    def update(self, state, features: TickFeatures) -> Optional[str]:
+        """Folds one tick into `state` and returns an alert message, or None."""
+        raise NotImplementedError
+
+
+DETECTOR_REGISTRY: Dict[str, Type[Detector]] = {}
+
+
+def register_detector(cls: Type[Detector]) -> Type[Detector]:
+    DETECTOR_REGISTRY[cls.name] = cls
+    return cls
+
+
+def build_detectors(names: Optional[Sequence[str]] = None) -> List[Detector]:
+    """Instantiates the named detectors (all registered ones by default)."""
+    if names is None:
+        names = list(DETECTOR_REGISTRY)
+    unknown = [name for name in names if name not in DETECTOR_REGISTRY]
+    if unknown:
+        raise ValueError(f"Unknown anomaly detectors: {', '.join(unknown)}")
+    return [DETECTOR_REGISTRY[name]() for name in names]
+
+
+class _ZScoreDetector(Detector):
+    """Shared logic for detectors that z-score one feature against its EWMA baseline."""
+    alpha = 0.05
+    warmup = 30
+    z_threshold = 4.0
+    clamp = 2.0
+    # Two-sided detectors alert on |z|; one-sided ones only on z > threshold.
+    two_sided = False
+
+    def new_state(self) -> EwmaStats:
+        return EwmaStats()
+
+    def value(self, features: TickFeatures) -> float:
+        raise NotImplementedError
+
+    def message(self, features: TickFeatures, value: float, z: float) -> str:
+        raise NotImplementedError
+
+    def update(self, state: EwmaStats, features: TickFeatures) -> Optional[str]:
+        x = self.value(features)
+        if math.isnan(x):
+            return None
+        alert = None
+        if state.count >= self.warmup:
+            z = state.zscore(x)
+            if (abs(z) if self.two_sided else z) > self.z_threshold:
+                alert = self.message(features, x, z)
+        state.update(x, self.alpha, self.warmup, self.clamp)
+        return alert
+
+
+@register_detector
+class SpreadZScoreDetector(_ZScoreDetector):
+    """Quoted spread in basis points of mid, relative to the ticker's own history."""
+    name = "wide_spread"
+
+    def value(self, features: TickFeatures) -> float:
+        return features.spread_bps
+
+    def message(self, features: TickFeatures, value: float, z: float) -> str:
+        return (
+            f"ALERT: Wide spread detected for {features.ticker}: {features.spread:.2f} "
+            f"({value:.1f} bps, z={z:.1f}) at {features.timestamp_utc}"
+        )
+
+
+@register_detector
+class ImbalanceDetector(_ZScoreDetector):
+    """Order-book imbalance far outside its usual range."""
+    name = "book_imbalance"
+    two_sided = True
+    # Ignore statistically unusual but economically small imbalances.
+    min_abs_imbalance = 0.5
+
+    def value(self, features: TickFeatures) -> float:
+        return features.imbalance
+
+    def update(self, state: EwmaStats, features: TickFeatures) -> Optional[str]:
+        alert = super().update(state, features)
+        if alert and abs(features.imbalance) < self.min_abs_imbalance:
+            return None
+        return alert
+
+    def message(self, features: TickFeatures, value: float, z: float) -> str:
+        side = "bid" if value > 0 else "ask"
+        return (
+            f"ALERT: Order book imbalance for {features.ticker}: {value:+.2f} "
+            f"toward the {side} (z={z:.1f}) at {features.timestamp_utc}"
+        )
+
+
+@register_detector
+class DepthCollapseDetector(Detector):
+    """Visible depth falling to a fraction of its recent average."""
+    name = "depth_collapse"
+    alpha = 0.05
+    warmup = 30
+    collapse_ratio = 0.25
+
+    def new_state(self) -> EwmaStats:
+        return EwmaStats()
+
+    def update(self, state: EwmaStats, features: TickFeatures) -> Optional[str]:
+        depth = features.depth
+        baseline = state.mean
+        alert = None
+        if state.count >= self.warmup and baseline > 0 and depth < self.collapse_ratio * baseline:
+            alert = (
+                f"ALERT: Depth collapse for {features.ticker}: {depth:,.0f} shares vs "
+                f"{baseline:,.0f} average at {features.timestamp_utc}"
+            )
+        # Depth is a level, not a noisy statistic; track it without clamping.
+        state.update(depth, self.alpha, self.warmup, math.inf)
+        return alert
+
+
+class _JumpState:
+    __slots__ = ("last_mid", "returns")
+
+    def __init__(self):
+        self.last_mid = math.nan
+        self.returns = EwmaStats()
+
+
+@register_detector
+class PriceJumpDetector(Detector):
+    """Mid-price log returns that are large relative to recent volatility."""
+    name = "price_jump"
+    alpha = 0.05
+    warmup = 30
+    z_threshold = 6.0
+    clamp = 3.0
+    # Volatility floor (in log-return units) so a perfectly flat mid cannot alert on one tick.
+    min_sigma = 1e-5
+
+    def new_state(self) -> _JumpState:
+        return _JumpState()
+
+    def update(self, state: _JumpState, features: TickFeatures) -> Optional[str]:
+        mid = features.mid
+        last_mid = state.last_mid
+        state.last_mid = mid
+        if math.isnan(mid) or math.isnan(last_mid) or last_mid <= 0 or mid <= 0:
+            return None
+        r = math.log(mid / last_mid)
+        stats = state.returns
+        alert = None
+        if stats.count >= self.warmup:
+            sigma = max(math.sqrt(stats.var), self.min_sigma)
+            z = (r - stats.mean) / sigma
+            if abs(z) > self.z_threshold:
+                alert = (
+                    f"ALERT: Price jump for {features.ticker}: mid {last_mid:.2f} -> {mid:.2f} "
+                    f"({r * 10_000:+.1f} bps, z={z:.1f}) at {features.timestamp_utc}"
+                )
+        stats.update(r, self.alpha, self.warmup, self.clamp)
+        return alert
+
+
+class _RateState:
+    __slots__ = ("last_ns", "rate")
+
+    def __init__(self):
+        self.last_ns = 0
+        self.rate = 0.0
+
+
+@register_detector
+class QuoteStuffingDetector(Detector):
+    """
+    Book updates per second for a ticker, tracked as an exponentially decayed
+    event rate with time constant `window_s`.
+    """
+    name = "quote_stuffing"
+    window_s = 1.0
+    max_updates_per_s = 500.0
+
+    def new_state(self) -> _RateState:
+        return _RateState()
+
+    def update(self, state: _RateState, features: TickFeatures) -> Optional[str]:
+        now = features.timestamp_ns
+        if state.last_ns:
+            elapsed = max(now - state.last_ns, 0) / 1e9
+            state.rate *= math.exp(-elapsed / self.window_s)
+        state.rate += 1.0 / self.window_s
+        state.last_ns = now
+        if state.rate > self.max_updates_per_s:
+            return (
+                f"ALERT: Quote stuffing suspected for {features.ticker}: "
+                f"{state.rate:,.0f} updates/s at {features.timestamp_utc}"
+            )
+        return None
+
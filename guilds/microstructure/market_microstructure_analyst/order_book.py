@@ -0,0 +1,239 @@
+from typing import Any, Iterable, Optional
+
+import numpy as np
+
+from .wire_format import format_timestamp_ns
+
+# Number of price levels kept per side. Levels beyond this are dropped.
+DEFAULT_MAX_LEVELS = 32
+
+BID = 0
+ASK = 1
+
+
+class OrderBook:
+    """
+    An incremental Level 2 order book for a single ticker.
+
+    Price levels are stored in preallocated, contiguous NumPy buffers
+    (bids sorted descending, asks ascending) and every update is applied
+    in place, so the per-tick path never builds a dict tree. All analytics
+    run in O(levels) over views of those buffers.
+    """
+    __slots__ = (
+        "ticker", "max_levels", "timestamp_ns", "_timestamp_utc",
+        "bid_prices", "bid_sizes", "ask_prices", "ask_sizes",
+        "bid_count", "ask_count", "_bid_cum", "_ask_cum",
+    )
+
+    def __init__(self, ticker: str, max_levels: int = DEFAULT_MAX_LEVELS):
+        self.ticker = ticker
+        self.max_levels = max_levels
+        self.timestamp_ns: Optional[int] = None
+        self._timestamp_utc: Optional[str] = None
+        self.bid_prices = np.zeros(max_levels, dtype=np.float64)
+        self.bid_sizes = np.zeros(max_levels, dtype=np.float64)
+        self.ask_prices = np.zeros(max_levels, dtype=np.float64)
+        self.ask_sizes = np.zeros(max_levels, dtype=np.float64)
+        self.bid_count = 0
+        self.ask_count = 0
+        # Scratch buffers for cumulative depth, reused on every call.
+        self._bid_cum = np.zeros(max_levels, dtype=np.float64)
+        self._ask_cum = np.zeros(max_levels, dtype=np.float64)
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+    def apply_snapshot(
+        self,
+        bids: Iterable[Any],
+        asks: Iterable[Any],
+        timestamp_utc: Optional[str] = None,
+    ) -> None:
+        """
+        Replaces the book with a full snapshot.
+
+        Levels may be `{"price": p, "size": s}` dicts (the JSON feed format)
+        or `(price, size)` pairs, and must already be sorted best-first.
+        """
+        self.bid_count = self._fill_side(bids, self.bid_prices, self.bid_sizes)
+        self.ask_count = self._fill_side(asks, self.ask_prices, self.ask_sizes)
+        self.timestamp_ns = None
+        self._timestamp_utc = timestamp_utc
+
+    def apply_arrays(
+        self,
+        bid_prices: np.ndarray,
+        bid_sizes: np.ndarray,
+        ask_prices: np.ndarray,
+        ask_sizes: np.ndarray,
+        timestamp_utc: Optional[str] = None,
+    ) -> None:
+        """Replaces the book from already-columnar level arrays (best-first)."""
+        nb = min(len(bid_prices), self.max_levels)
+        na = min(len(ask_prices), self.max_levels)
+        self.bid_prices[:nb] = bid_prices[:nb]
+        self.bid_sizes[:nb] = bid_sizes[:nb]
+        self.ask_prices[:na] = ask_prices[:na]
+        self.ask_sizes[:na] = ask_sizes[:na]
+        self.bid_count = nb
+        self.ask_count = na
+        self.timestamp_ns = None
+        self._timestamp_utc = timestamp_utc
+
+    def apply_fixed_point(
+        self,
+        bid_prices: np.ndarray,
+        bid_sizes: np.ndarray,
+        ask_prices: np.ndarray,
+        ask_sizes: np.ndarray,
+        price_scale: int,
+        timestamp_ns: Optional[int] = None,
+    ) -> None:
+        """
+        Replaces the book from integer fixed-point level arrays, such as the
+        zero-copy views of a binary wire tick, scaling prices straight into
+        the book's buffers.
+        """
+        nb = min(len(bid_prices), self.max_levels)
+        na = min(len(ask_prices), self.max_levels)
+        inverse_scale = 1.0 / price_scale
+        np.multiply(bid_prices[:nb], inverse_scale, out=self.bid_prices[:nb])
+        np.multiply(ask_prices[:na], inverse_scale, out=self.ask_prices[:na])
+        self.bid_sizes[:nb] = bid_sizes[:nb]
+        self.ask_sizes[:na] = ask_sizes[:na]
+        self.bid_count = nb
+        self.ask_count = na
+        # The ISO timestamp is only rendered if something (an alert) asks for it.
+        self.timestamp_ns = timestamp_ns
+        self._timestamp_utc = None
+
+    def update_level(self, side: int, price: float, size: float) -> None:
+        """
+        Applies a single L2 delta in place: sets the size at `price`, inserting
+        the level if it is new and removing it when `size` is zero.
+        """
+        if side == BID:
+            prices, sizes, n = self.bid_prices, self.bid_sizes, self.bid_count
+            # Bids are stored descending; search the reversed view.
+            i = n - int(np.searchsorted(prices[:n][::-1], price, side="right"))
+        else:
+            prices, sizes, n = self.ask_prices, self.ask_sizes, self.ask_count
+            i = int(np.searchsorted(prices[:n], price, side="left"))
+
+        if i < n and prices[i] == price:
+            if size > 0:
+                sizes[i] = size
+                return
+            prices[i:n - 1] = prices[i + 1:n]
+            sizes[i:n - 1] = sizes[i + 1:n]
+            n -= 1
+        elif size > 0 and i < self.max_levels:
+            end = min(n, self.max_levels - 1)
+            prices[i + 1:end + 1] = prices[i:end]
+            sizes[i + 1:end + 1] = sizes[i:end]
+            prices[i] = price
+            sizes[i] = size
+            n = end + 1
+
+        if side == BID:
+            self.bid_count = n
+        else:
+            self.ask_count = n
+
+    def _fill_side(self, levels: Iterable[Any], prices: np.ndarray, sizes: np.ndarray) -> int:
+        n = 0
+        for level in levels:
+            if n >= self.max_levels:
+                break
+            if isinstance(level, dict):
+                prices[n] = level["price"]
+                sizes[n] = level["size"]
+            else:
+                prices[n], sizes[n] = level
+            n += 1
+        return n
+
+    # ------------------------------------------------------------------
+    # Analytics
+    # ------------------------------------------------------------------
+    @property
+    def timestamp_utc(self) -> Optional[str]:
+        if self._timestamp_utc is None and self.timestamp_ns is not None:
+            self._timestamp_utc = format_timestamp_ns(self.timestamp_ns)
+        return self._timestamp_utc
+
+    @property
+    def is_valid(self) -> bool:
+        """True when both sides have at least one level."""
+        return self.bid_count > 0 and self.ask_count > 0
+
+    @property
+    def best_bid(self) -> float:
+        return float(self.bid_prices[0]) if self.bid_count else float("nan")
+
+    @property
+    def best_ask(self) -> float:
+        return float(self.ask_prices[0]) if self.ask_count else float("nan")
+
+    @property
+    def spread(self) -> float:
+        return self.best_ask - self.best_bid
+
+    @property
+    def mid(self) -> float:
+        return (self.best_ask + self.best_bid) / 2.0
+
+    def spread_bps(self) -> float:
+        """The quoted spread in basis points of the mid price."""
+        mid = self.mid
+        return (self.spread / mid) * 10_000.0 if mid > 0 else float("nan")
+
+    def microprice(self) -> float:
+        """Top-of-book mid weighted by the opposite side's size."""
+        if not self.is_valid:
+            return float("nan")
+        bid_size = self.bid_sizes[0]
+        ask_size = self.ask_sizes[0]
+        total = bid_size + ask_size
+        if total <= 0:
+            return self.mid
+        return float((self.bid_prices[0] * ask_size + self.ask_prices[0] * bid_size) / total)
+
+    def depth_weighted_mid(self, levels: Optional[int] = None) -> float:
+        """Average of the size-weighted bid and ask prices over the top `levels`."""
+        nb, na = self._depth(levels)
+        bid_volume = self.bid_sizes[:nb].sum()
+        ask_volume = self.ask_sizes[:na].sum()
+        if bid_volume <= 0 or ask_volume <= 0:
+            return float("nan")
+        bid_vwap = np.dot(self.bid_prices[:nb], self.bid_sizes[:nb]) / bid_volume
+        ask_vwap = np.dot(self.ask_prices[:na], self.ask_sizes[:na]) / ask_volume
+        return float((bid_vwap + ask_vwap) / 2.0)
+
+    def cumulative_depth(self, side: int, levels: Optional[int] = None) -> np.ndarray:
+        """
+        Running size totals for one side, best level first.
+
+        The returned array is a view of an internal scratch buffer and is only
+        valid until the next call; copy it if it must outlive the tick.
+        """
+        nb, na = self._depth(levels)
+        if side == BID:
+            return np.cumsum(self.bid_sizes[:nb], out=self._bid_cum[:nb])
+        return np.cumsum(self.ask_sizes[:na], out=self._ask_cum[:na])
+
+    def imbalance(self, levels: Optional[int] = None) -> float:
+        """(bid volume - ask volume) / total volume over the top `levels`, in [-1, 1]."""
+        nb, na = self._depth(levels)
+        bid_volume = self.bid_sizes[:nb].sum()
+        ask_volume = self.ask_sizes[:na].sum()
+        total = bid_volume + ask_volume
+        if total <= 0:
+            return 0.0
+        return float((bid_volume - ask_volume) / total)
+
+    def _depth(self, levels: Optional[int]):
+        if levels is None:
+            return self.bid_count, self.ask_count
+        return min(levels, self.bid_count), min(levels, self.ask_count)
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import multiprocessing as mp
+import queue
+import threading
+import zlib
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Union
+
+from .analyzer import Alert, TickAnalyzer
+from .wire_format import L2Tick, ticker_of
+
+logger = logging.getLogger(__name__)
+
+SHARD_MODE_TASKS = "tasks"
+SHARD_MODE_PROCESSES = "processes"
+
+# Upper bound on the number of ticks shipped to a worker process in one message.
+_PROCESS_CHUNK_SIZE = 256
+_STOP = None
+
+
+def shard_for(ticker: str, num_shards: int) -> int:
+    """Stable hash partitioning of a ticker onto one of `num_shards` shards."""
+    return zlib.crc32(ticker.encode("utf-8")) % num_shards
+
+
+class ShardedTickRouter:
+    """
+    Hash-partitions ticks across N shards and merges their alerts back into
+    a single ordered-per-ticker stream.
+
+    Every shard owns its own `TickAnalyzer` (books and detector state) and a
+    bounded inbox, so a slow shard applies backpressure to `submit()` for its
+    own tickers only. Shards run either as tasks on the caller's event loop
+    (`mode="tasks"`) or as worker processes (`mode="processes"`) so analysis
+    throughput scales with cores.
+    """
+
+    def __init__(
+        self,
+        num_shards: int,
+        mode: str = SHARD_MODE_TASKS,
+        queue_size: int = 1024,
+        detectors: Optional[Sequence[str]] = None,
+    ):
+        if num_shards < 1:
+            raise ValueError("num_shards must be at least 1.")
+        if mode not in (SHARD_MODE_TASKS, SHARD_MODE_PROCESSES):
+            raise ValueError(f"Unknown shard mode: '{mode}'.")
+        self.num_shards = num_shards
+        self.mode = mode
+        self.queue_size = queue_size
+        self.detectors = list(detectors) if detectors is not None else None
+        self._inboxes: List[asyncio.Queue] = []
+        self._alerts: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._processes: List[mp.Process] = []
+        self._threads: List[threading.Thread] = []
+        self._remaining = 0
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._alerts = asyncio.Queue(maxsize=self.queue_size)
+        self._inboxes = [asyncio.Queue(maxsize=self.queue_size) for _ in range(self.num_shards)]
+        self._remaining = self.num_shards
+        for shard_id, inbox in enumerate(self._inboxes):
+            if self.mode == SHARD_MODE_TASKS:
+                worker = self._run_task_shard(shard_id, inbox)
+            else:
+                worker = self._run_process_shard(shard_id, inbox, loop)
+            self._tasks.append(asyncio.create_task(worker, name=f"shard-{shard_id}"))
+        logger.info(f"Started {self.num_shards} microstructure shards ({self.mode}).")
+
+    async def submit(self, tick: Union[Dict[str, Any], L2Tick]) -> None:
+        """Routes a decoded tick to its shard, waiting if that shard is full."""
+        await self._inboxes[shard_for(ticker_of(tick), self.num_shards)].put(tick)
+
+    async def close(self) -> None:
+        """Signals every shard to drain its inbox and stop."""
+        for inbox in self._inboxes:
+            await inbox.put(_STOP)
+
+    async def alerts(self) -> AsyncIterator[Alert]:
+        """Yields merged alerts until every shard has stopped."""
+        while True:
+            alert = await self._alerts.get()
+            if alert is _STOP:
+                return
+            yield alert
+
+    async def cancel(self) -> None:
+        """Tears shards down immediately, dropping any queued ticks."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+            process.join(timeout=1)
+
+    async def _shard_finished(self) -> None:
+        self._remaining -= 1
+        if self._remaining == 0:
+            await self._alerts.put(_STOP)
+
+    # ------------------------------------------------------------------
+    # In-loop shards
+    # ------------------------------------------------------------------
+    async def _run_task_shard(self, shard_id: int, inbox: asyncio.Queue) -> None:
+        analyzer = TickAnalyzer(self.detectors)
+        try:
+            while True:
+                tick = await inbox.get()
+                if tick is _STOP:
+                    break
+                try:
+                    alerts = analyzer.process(tick)
+                except Exception as e:
+                    logger.error(f"[shard-{shard_id}] Failed to process tick: {e}")
+                    continue
+                for alert in alerts:
+                    await self._alerts.put(alert)
+        finally:
+            await self._shard_finished()
+
+    # ------------------------------------------------------------------
+    # Out-of-process shards
+    # ------------------------------------------------------------------
+    async def _run_process_shard(
+        self, shard_id: int, inbox: asyncio.Queue, loop: asyncio.AbstractEventLoop
+    ) -> None:
+        # Fork avoids re-importing the ADK in every worker; fall back where unavailable.
+        ctx = mp.get_context("fork" if "fork" in mp.get_all_start_methods() else "spawn")
+        # Bounded in both directions so a slow worker or slow consumer pushes back.
+        to_worker = ctx.Queue(maxsize=4)
+        from_worker = ctx.Queue(maxsize=4)
+        process = ctx.Process(
+            target=_process_shard_main,
+            args=(shard_id, self.detectors, to_worker, from_worker),
+            daemon=True,
+        )
+        process.start()
+        self._processes.append(process)
+
+        reader = threading.Thread(
+            target=self._forward_worker_alerts, args=(process, from_worker, loop), daemon=True
+        )
+        reader.start()
+        self._threads.append(reader)
+
+        stopping = False
+        try:
+            while not stopping:
+                # Ship whatever is queued in one message to amortize pickling and IPC.
+                chunk = [await inbox.get()]
+                while len(chunk) < _PROCESS_CHUNK_SIZE and not inbox.empty():
+                    chunk.append(inbox.get_nowait())
+                if chunk[-1] is _STOP:
+                    chunk.pop()
+                    stopping = True
+                if chunk:
+                    await loop.run_in_executor(None, to_worker.put, chunk)
+            await loop.run_in_executor(None, to_worker.put, _STOP)
+            await loop.run_in_executor(None, reader.join)
+            await loop.run_in_executor(None, process.join)
+        finally:
+            await self._shard_finished()
+
+    def _forward_worker_alerts(
+        self, process: mp.Process, from_worker: mp.Queue, loop: asyncio.AbstractEventLoop
+    ) -> None:
+        while True:
+            try:
+                alerts = from_worker.get(timeout=1.0)
+            except queue.Empty:
+                if not process.is_alive():
+                    return
+                continue
+            if alerts is _STOP:
+                return
+            for alert in alerts:
+                asyncio.run_coroutine_threadsafe(self._alerts.put(alert), loop).result()
+
+
+def _process_shard_main(
+    shard_id: int,
+    detectors: Optional[List[str]],
+    to_worker: mp.Queue,
+    from_worker: mp.Queue,
+) -> None:
+    """Entry point of a shard worker process."""
+    analyzer = TickAnalyzer(detectors)
+    while True:
+        chunk = to_worker.get()
+        if chunk is _STOP:
+            break
+        alerts: List[Alert] = []
+        for tick in chunk:
+            try:
+                alerts.extend(analyzer.process(tick))
+            except Exception as e:
+                logger.error(f"[shard-{shard_id}] Failed to process tick: {e}")
+        if alerts:
+            from_worker.put(alerts)
+    from_worker.put(_STOP)
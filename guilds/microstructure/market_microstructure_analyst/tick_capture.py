@@ -0,0 +1,213 @@
+"""
+Append-only capture of L2 ticks and memory-mapped replay.
+
+A capture directory holds numbered segment files (`ticks-000001.seg`, ...).
+Each segment starts with an 8-byte magic followed by records of
+
+    payload_len:u32  capture_ns:i64  mime_code:u8  payload[payload_len]
+
+where the payload is the blob exactly as it arrived (binary tick or JSON).
+Replay memory-maps the segments and walks them without reading whole files
+into memory, so days of ticks can be pushed through a `LiveRequestQueue` as
+fast as the consumer allows or at a chosen multiple of real time.
+"""
+import asyncio
+import logging
+import mmap
+import os
+import struct
+import time
+from typing import AsyncIterator, Iterator, List, Optional, Tuple, Union
+
+from google.adk.agents import LiveRequestQueue
+from google.genai.types import Blob
+
+from .wire_format import JSON_MIME_TYPE, L2_BINARY_MIME_TYPE
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_MAGIC = b"AGL2CAP1"
+SEGMENT_PREFIX = "ticks-"
+SEGMENT_SUFFIX = ".seg"
+DEFAULT_SEGMENT_BYTES = 256 * 1024 * 1024
+
+_RECORD = struct.Struct("<IqB")
+_MIME_CODES = {JSON_MIME_TYPE: 0, L2_BINARY_MIME_TYPE: 1}
+_MIME_TYPES = {code: mime for mime, code in _MIME_CODES.items()}
+
+Record = Tuple[int, str, memoryview]
+
+
+class TickCaptureWriter:
+    """
+    Appends ticks to rolling segment files in `directory`.
+
+    A new segment is started when the current one would exceed
+    `segment_bytes`. Writes are buffered appends, so a crash loses at most
+    the unflushed tail; replay ignores a torn final record.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = DEFAULT_SEGMENT_BYTES):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        os.makedirs(directory, exist_ok=True)
+        existing = list_segments(directory)
+        self._next_index = _segment_index(existing[-1]) + 1 if existing else 1
+        self._file = None
+        self._size = 0
+        self.records_written = 0
+
+    def write(self, payload: bytes, mime_type: str, capture_ns: Optional[int] = None) -> None:
+        """Appends one tick payload. `capture_ns` defaults to the current wall clock."""
+        mime_code = _MIME_CODES.get(mime_type)
+        if mime_code is None:
+            raise ValueError(f"Cannot capture ticks with mime type '{mime_type}'.")
+        record_size = _RECORD.size + len(payload)
+        if self._file is None or self._size + record_size > self.segment_bytes:
+            self._roll()
+        if capture_ns is None:
+            capture_ns = time.time_ns()
+        self._file.write(_RECORD.pack(len(payload), capture_ns, mime_code))
+        self._file.write(payload)
+        self._size += record_size
+        self.records_written += 1
+
+    def write_blob(self, blob: Blob) -> None:
+        self.write(blob.data, blob.mime_type)
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "TickCaptureWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _roll(self) -> None:
+        self.close()
+        path = os.path.join(
+            self.directory, f"{SEGMENT_PREFIX}{self._next_index:06d}{SEGMENT_SUFFIX}"
+        )
+        self._next_index += 1
+        self._file = open(path, "ab", buffering=1024 * 1024)
+        self._file.write(SEGMENT_MAGIC)
+        self._size = len(SEGMENT_MAGIC)
+        logger.info(f"Tick capture writing to segment '{path}'.")
+
+
+async def capture_feed(
+    feed: AsyncIterator[Union[str, bytes]],
+    writer: TickCaptureWriter,
+    mime_type: str,
+    limit: Optional[int] = None,
+) -> int:
+    """Records payloads from a feed such as `mock_l2_feed` and returns the count."""
+    count = 0
+    async for payload in feed:
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        writer.write(payload, mime_type)
+        count += 1
+        if limit is not None and count >= limit:
+            break
+    writer.flush()
+    return count
+
+
+def list_segments(directory: str) -> List[str]:
+    """Segment paths in `directory`, in capture order."""
+    names = [
+        name for name in os.listdir(directory)
+        if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+    ]
+    return [os.path.join(directory, name) for name in sorted(names, key=_segment_index)]
+
+
+def iter_records(directory: str) -> Iterator[Record]:
+    """
+    Yields `(capture_ns, mime_type, payload)` for every captured tick.
+
+    Payloads are zero-copy views into the memory-mapped segment and are only
+    guaranteed valid until the iterator moves on; copy them with `bytes()` to
+    keep them longer.
+    """
+    for path in list_segments(directory):
+        if os.path.getsize(path) <= len(SEGMENT_MAGIC):
+            continue
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if mapped[:len(SEGMENT_MAGIC)] != SEGMENT_MAGIC:
+                raise ValueError(f"'{path}' is not a tick capture segment.")
+            view = memoryview(mapped)
+            offset = len(SEGMENT_MAGIC)
+            end = len(mapped)
+            while offset + _RECORD.size <= end:
+                length, capture_ns, mime_code = _RECORD.unpack_from(mapped, offset)
+                start = offset + _RECORD.size
+                if start + length > end:
+                    logger.warning(f"Ignoring torn record at the end of '{path}'.")
+                    break
+                yield capture_ns, _MIME_TYPES[mime_code], view[start:start + length]
+                offset = start + length
+            view.release()
+        finally:
+            try:
+                mapped.close()
+            except BufferError:
+                # A caller still holds a payload view; the mapping is freed with it.
+                pass
+
+
+async def replay_into_queue(
+    directory: str,
+    live_request_queue: LiveRequestQueue,
+    speed: Optional[float] = None,
+    close_when_done: bool = True,
+    max_pending: int = 10_000,
+) -> int:
+    """
+    Pushes a capture into `live_request_queue` and returns the tick count.
+
+    With `speed=None` ticks are sent as fast as the consumer drains them,
+    keeping at most `max_pending` ticks queued at once. Otherwise the
+    original inter-arrival gaps are replayed divided by `speed` (2.0 plays
+    back twice as fast as it was captured).
+    """
+    loop = asyncio.get_running_loop()
+    # LiveRequestQueue is unbounded, so watch its backing queue for backpressure.
+    backing = getattr(live_request_queue, "_queue", None)
+    sent = 0
+    first_capture_ns = None
+    start = loop.time()
+    for capture_ns, mime_type, payload in iter_records(directory):
+        if speed is None:
+            while backing is not None and backing.qsize() >= max_pending:
+                await asyncio.sleep(0.001)
+            if sent % 1024 == 0:
+                await asyncio.sleep(0)
+        else:
+            if first_capture_ns is None:
+                first_capture_ns = capture_ns
+            due = start + (capture_ns - first_capture_ns) / 1e9 / speed
+            delay = due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        live_request_queue.send_realtime(Blob(data=bytes(payload), mime_type=mime_type))
+        sent += 1
+    if close_when_done:
+        live_request_queue.close()
+    logger.info(f"Replayed {sent} ticks from '{directory}'.")
+    return sent
+
+
+def _segment_index(path: str) -> int:
+    name = os.path.basename(path)
+    return int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
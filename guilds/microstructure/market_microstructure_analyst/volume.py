@@ -0,0 +1,90 @@
+"""
+Live traded-volume estimates from Level 2 ticks.
+
+The L2 feed carries book snapshots, not trade prints, so traded volume is
+estimated from how the touch changes between consecutive ticks of a ticker:
+size that disappears from an unchanged best level, or a whole best level
+that the price moves through (the bid falling, the ask rising), is counted
+as traded. Size added to the book, or a best price that improves, counts
+nothing. This is the usual depletion estimate; it overstates volume when
+liquidity is cancelled rather than taken.
+
+`MarketMicrostructureAnalyst` feeds every tick it decodes into the shared
+tracker from `get_volume_tracker()`, which the execution guild's slicing
+engine reads for live volume.
+"""
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+from .wire_format import PRICE_SCALE, L2Tick
+
+# (best bid, bid size, best ask, ask size); NaN prices for an empty side.
+Touch = Tuple[float, float, float, float]
+
+_NAN = float("nan")
+
+
+def touch_of(tick: Union[Dict[str, Any], L2Tick]) -> Touch:
+    if isinstance(tick, L2Tick):
+        bid = (tick.bid_prices[0] / PRICE_SCALE, float(tick.bid_sizes[0])) if tick.bid_prices.size else (_NAN, 0.0)
+        ask = (tick.ask_prices[0] / PRICE_SCALE, float(tick.ask_sizes[0])) if tick.ask_prices.size else (_NAN, 0.0)
+    else:
+        bids, asks = tick.get("bids"), tick.get("asks")
+        bid = (bids[0]["price"], float(bids[0]["size"])) if bids else (_NAN, 0.0)
+        ask = (asks[0]["price"], float(asks[0]["size"])) if asks else (_NAN, 0.0)
+    return bid + ask
+
+
+def depleted_volume(previous: Touch, current: Touch) -> float:
+    """Volume traded between two touches of the same ticker, by depletion of the best levels."""
+    prev_bid, prev_bid_size, prev_ask, prev_ask_size = previous
+    bid, bid_size, ask, ask_size = current
+    traded = 0.0
+    if bid == prev_bid:
+        traded += max(prev_bid_size - bid_size, 0.0)
+    elif bid < prev_bid:
+        traded += prev_bid_size
+    if ask == prev_ask:
+        traded += max(prev_ask_size - ask_size, 0.0)
+    elif ask > prev_ask:
+        traded += prev_ask_size
+    return traded
+
+
+class VolumeTracker:
+    """Cumulative estimated traded volume per ticker since the tracker started."""
+
+    def __init__(self):
+        self._touch: Dict[str, Touch] = {}
+        self._volume: Dict[str, float] = {}
+
+    def observe(self, tick: Union[Dict[str, Any], L2Tick]) -> None:
+        ticker = tick.ticker if isinstance(tick, L2Tick) else tick.get("ticker")
+        touch = touch_of(tick)
+        previous = self._touch.get(ticker)
+        self._touch[ticker] = touch
+        if previous is None:
+            self._volume[ticker] = 0.0
+        else:
+            self._volume[ticker] += depleted_volume(previous, touch)
+
+    def observe_many(self, ticks: Iterable[Union[Dict[str, Any], L2Tick]]) -> None:
+        for tick in ticks:
+            self.observe(tick)
+
+    def cumulative_volume(self, ticker: str) -> Optional[float]:
+        """Estimated shares traded since the first tick seen for `ticker`, or None if none was seen."""
+        return self._volume.get(ticker)
+
+
+_tracker: Optional[VolumeTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def get_volume_tracker() -> VolumeTracker:
+    """The process-wide volume tracker."""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = VolumeTracker()
+        return _tracker
@@ -0,0 +1,153 @@
+"""
+Compact binary encoding for Level 2 ticks.
+
+Layout (little-endian), one record per blob:
+
+    header   version:u8  n_bids:u8  n_asks:u8  pad:u8  timestamp_ns:i64  ticker:16s
+    prices   i64[n_bids + n_asks]   fixed point, PRICE_SCALE units per 1.00
+    sizes    i64[n_bids + n_asks]
+
+Bids come first in each column, best level first. Prices and sizes are stored
+column-wise so `decode_tick` can expose them as zero-copy NumPy views over the
+received buffer. JSON (`application/json`) remains the fallback encoding.
+"""
+import datetime
+import json
+import struct
+from typing import Any, Dict, Iterable, Tuple, Union
+
+import numpy as np
+
+JSON_MIME_TYPE = "application/json"
+L2_BINARY_MIME_TYPE = "application/x-agora-l2"
+
+WIRE_VERSION = 1
+PRICE_SCALE = 1_000_000
+TICKER_BYTES = 16
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+_HEADER = struct.Struct("<BBBxq16s")
+_TICKER_OFFSET = _HEADER.size - TICKER_BYTES
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+class L2Tick:
+    """
+    A decoded binary tick. The level arrays are read-only views into the
+    original buffer; nothing is copied until the book applies them.
+    """
+    __slots__ = ("ticker", "timestamp_ns", "bid_prices", "bid_sizes", "ask_prices", "ask_sizes", "_raw")
+
+    def __init__(self, raw: Buffer):
+        version, n_bids, n_asks, timestamp_ns, ticker = _HEADER.unpack_from(raw)
+        if version != WIRE_VERSION:
+            raise ValueError(f"Unsupported L2 wire version: {version}")
+        n = n_bids + n_asks
+        prices = np.frombuffer(raw, dtype="<i8", count=n, offset=_HEADER.size)
+        sizes = np.frombuffer(raw, dtype="<i8", count=n, offset=_HEADER.size + 8 * n)
+        self.ticker = ticker.rstrip(b"\0").decode("ascii")
+        self.timestamp_ns = timestamp_ns
+        self.bid_prices = prices[:n_bids]
+        self.ask_prices = prices[n_bids:]
+        self.bid_sizes = sizes[:n_bids]
+        self.ask_sizes = sizes[n_bids:]
+        self._raw = raw
+
+    @property
+    def timestamp_utc(self) -> str:
+        return format_timestamp_ns(self.timestamp_ns)
+
+    def __reduce__(self):
+        # Ship the compact encoding across process boundaries, not the views.
+        return (decode_tick, (bytes(self._raw),))
+
+
+def decode_tick(data: Buffer) -> L2Tick:
+    return L2Tick(data)
+
+
+def decode_payload(data: Buffer, mime_type: str) -> Union[Dict[str, Any], L2Tick]:
+    """
+    Decodes a live blob according to its mime type. Binary ticks decode to a
+    zero-copy `L2Tick`; anything else is treated as a JSON snapshot dict.
+    """
+    if mime_type == L2_BINARY_MIME_TYPE:
+        return L2Tick(data)
+    return json.loads(data)
+
+
+def ticker_of(tick: Union[Dict[str, Any], L2Tick]) -> str:
+    return tick.ticker if isinstance(tick, L2Tick) else tick["ticker"]
+
+
+def timestamp_ns_of(tick: Union[Dict[str, Any], L2Tick]) -> int:
+    if isinstance(tick, L2Tick):
+        return tick.timestamp_ns
+    return parse_timestamp_ns(tick["timestamp_utc"])
+
+
+def peek_ticker(data: Buffer) -> str:
+    """Reads only the ticker field of an encoded tick."""
+    raw = bytes(memoryview(data)[_TICKER_OFFSET:_TICKER_OFFSET + TICKER_BYTES])
+    return raw.rstrip(b"\0").decode("ascii")
+
+
+def encode_tick(
+    ticker: str,
+    bids: Iterable[Any],
+    asks: Iterable[Any],
+    timestamp_ns: int,
+) -> bytes:
+    """
+    Encodes one tick. Levels may be `{"price": p, "size": s}` dicts or
+    `(price, size)` pairs, best level first.
+    """
+    bid_levels = [_as_pair(level) for level in bids]
+    ask_levels = [_as_pair(level) for level in asks]
+    levels = bid_levels + ask_levels
+    ticker_raw = ticker.encode("ascii")
+    if len(ticker_raw) > TICKER_BYTES:
+        raise ValueError(f"Ticker '{ticker}' exceeds {TICKER_BYTES} bytes.")
+    if len(bid_levels) > 255 or len(ask_levels) > 255:
+        raise ValueError("At most 255 levels per side can be encoded.")
+
+    n = len(levels)
+    buf = bytearray(_HEADER.size + 16 * n)
+    _HEADER.pack_into(buf, 0, WIRE_VERSION, len(bid_levels), len(ask_levels), timestamp_ns, ticker_raw)
+    if n:
+        prices, sizes = zip(*levels)
+        price_col = np.frombuffer(buf, dtype="<i8", count=n, offset=_HEADER.size)
+        size_col = np.frombuffer(buf, dtype="<i8", count=n, offset=_HEADER.size + 8 * n)
+        np.rint(np.asarray(prices, dtype=np.float64) * PRICE_SCALE, out=price_col, casting="unsafe")
+        size_col[:] = sizes
+    return bytes(buf)
+
+
+def encode_snapshot(snapshot: Dict[str, Any]) -> bytes:
+    """Encodes a JSON-shaped snapshot dict, as produced by the mock feed."""
+    return encode_tick(
+        snapshot["ticker"],
+        snapshot["bids"],
+        snapshot["asks"],
+        parse_timestamp_ns(snapshot["timestamp_utc"]),
+    )
+
+
+def parse_timestamp_ns(timestamp_utc: str) -> int:
+    moment = datetime.datetime.fromisoformat(timestamp_utc)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=datetime.timezone.utc)
+    return (moment - _EPOCH) // datetime.timedelta(microseconds=1) * 1_000
+
+
+def format_timestamp_ns(timestamp_ns: int) -> str:
+    seconds, ns = divmod(timestamp_ns, 1_000_000_000)
+    moment = datetime.datetime.fromtimestamp(seconds, tz=datetime.timezone.utc)
+    return moment.replace(tzinfo=None, microsecond=ns // 1_000).isoformat()
+
+
+def _as_pair(level: Any) -> Tuple[float, int]:
+    if isinstance(level, dict):
+        return level["price"], level["size"]
+    return level
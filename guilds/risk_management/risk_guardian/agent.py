@@ -1,22 +1,44 @@
+import datetime
 import json
 import logging
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Dict, List, Optional
 
 from google.adk.agents import BaseAgent
 from google.adk.agents.invocation_context import InvocationContext
 from google.adk.events import Event
 from google.genai import types
 
-from .tools import get_current_price, check_position_size, check_sector_exposure
+from .sizing import size_orders
+from .tools import ensure_names, get_current_price, get_risk_engine
 from .trade_order import TradeOrder
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class RiskGuardian(BaseAgent):
+    """
+    Checks an audited trade proposal against the portfolio's risk limits and
+    turns it into a `TradeOrder`. All rules (position size, gross and net
+    exposure, name and sector concentration, cash floor, VaR and expected
+    shortfall) are evaluated together by the shared `RiskEngine`. Orders are
+    sized from the proposal's confidence, the name's volatility and the
+    remaining limit headroom (see `sizing.py`). Prices are the engine's live
+    marks when a `RiskMonitor` is streaming, so a check reads the
+    precomputed book rather than re-pricing it.
+
+    When the session state holds a `proposal_files` list, the proposals are
+    assessed as one basket instead: each is paired with its
+    `*_trade_audit.json` verdict, and the approved ones are checked jointly
+    against the book in a single `RiskEngine.check_basket` call.
+    """
     async def _run_async_impl(
         self, ctx: InvocationContext
     ) -> AsyncGenerator[Event, None]:
+        if ctx.session.state.get("proposal_files"):
+            async for event in self._run_basket(ctx):
+                yield event
+            return
+
         logger.info(f"[{self.name}] Commencing risk assessment.")
         try:
             # Step 1: Check the audit verdict.
@@ -41,16 +63,21 @@ class RiskGuardian(BaseAgent):
 
             ticker = proposal["ticker"]
             current_price = get_current_price(ticker)
-            # For simplicity, we'll trade a fixed notional value.
-            notional_value = 50_000.00
-            quantity = int(notional_value / current_price)
-            
-            checks = [
-                check_position_size(notional_value),
-                check_sector_exposure(ticker, notional_value)
-            ]
+            engine = get_risk_engine()
+            ensure_names(engine, [ticker])
+            sizing = size_orders(
+                engine, [ticker], [proposal["action"]],
+                [proposal.get("confidence_score", 0.0)], [current_price],
+            )
+            quantity = int(sizing["quantity"][0])
+            notional_value = float(sizing["notional_value_usd"][0])
 
-            failed_checks = [c["reason"] for c in checks if not c["pass"]]
+            signed_quantity = quantity if proposal["action"].upper() == "BUY" else -quantity
+            check = engine.check_trade(ticker, signed_quantity, current_price)
+            failed_checks = check["violations"]
+            if not failed_checks and quantity == 0:
+                failed_checks = ["Sized to zero shares: no confidence or limit headroom for this trade."]
+            ctx.session.state["last_risk_metrics"] = check["metrics"]
 
             # Step 3: Create a TradeOrder or reject the proposal.
             if failed_checks:
@@ -61,15 +88,11 @@ class RiskGuardian(BaseAgent):
                     ticker=ticker,
                     action=proposal["action"],
                     quantity=quantity,
-                    notional_value_usd=notional_value
+                    notional_value_usd=notional_value,
+                    arrival_price=current_price,
+                    decision_utc=_now_utc(),
                 )
-                order_json = order.model_dump_json(indent=2)
-                order_filename = f"{ticker}_trade_order.json"
-                artifact_part = types.Part.from_bytes(
-                    data=order_json.encode("utf-8"), mime_type="application/json")
-                version = ctx.artifact_service.save_artifact(
-                    app_name=ctx.app_name, user_id=ctx.user_id, session_id=ctx.session.id,
-                    filename=order_filename, artifact=artifact_part)
+                order_filename, version = self._save_order(ctx, order)
                 
                 # Store the order filename in session state for execution agent.
                 ctx.session.state["last_order_file"] = order_filename
@@ -83,5 +106,114 @@ class RiskGuardian(BaseAgent):
         
         yield Event(author=self.name, content=types.Content(parts=[types.Part(text=final_text)]))
 
+    async def _run_basket(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        proposal_files: List[str] = list(ctx.session.state.get("proposal_files"))
+        logger.info(f"[{self.name}] Commencing basket risk assessment of {len(proposal_files)} proposal(s).")
+        try:
+            # Step 1: Load every proposal with its audit verdict; vetoed or unaudited ones never reach the engine.
+            results: List[Dict[str, Any]] = []
+            candidates = []
+            for proposal_filename in proposal_files:
+                proposal = self._load_json(ctx, proposal_filename)
+                audit = self._load_json(ctx, proposal_filename.replace("_trade_proposal.json", "_trade_audit.json"))
+                result = {"proposal_file": proposal_filename, "ticker": proposal["ticker"], "action": proposal["action"]}
+                results.append(result)
+                decision = (audit or {}).get("decision")
+                if decision in (None, "VETO"):
+                    result.update({
+                        "pass": False,
+                        "violations": ["Trade was VETOED by AuditorAgent." if decision else "No audit verdict found."],
+                    })
+                    continue
+                result.update({
+                    "price": get_current_price(proposal["ticker"]),
+                    "confidence_score": proposal.get("confidence_score", 0.0),
+                })
+                candidates.append(result)
+
+            # Step 2: Size the approved proposals together, then check them jointly, in order.
+            engine = get_risk_engine()
+            ensure_names(engine, [c["ticker"] for c in candidates])
+            sizing = size_orders(
+                engine, [c["ticker"] for c in candidates], [c["action"] for c in candidates],
+                [c["confidence_score"] for c in candidates], [c["price"] for c in candidates],
+            )
+            for candidate, quantity, notional_value in zip(candidates, sizing["quantity"], sizing["notional_value_usd"]):
+                candidate.update({"quantity": int(quantity), "notional_value_usd": float(notional_value)})
+                if not quantity:
+                    candidate.update({
+                        "pass": False,
+                        "violations": ["Sized to zero shares: no confidence or limit headroom for this trade."],
+                    })
+            candidates = [c for c in candidates if c["quantity"]]
+            basket = engine.check_basket(
+                [c["ticker"] for c in candidates],
+                [c["quantity"] if c["action"].upper() == "BUY" else -c["quantity"] for c in candidates],
+                [c["price"] for c in candidates],
+            )
+            for candidate, check in zip(candidates, basket["orders"]):
+                candidate.update({key: check[key] for key in ("pass", "violations", "metrics")})
+            ctx.session.state["last_risk_metrics"] = basket["aggregate"]["metrics"]
+
+            # Step 3: Create a TradeOrder for each passing proposal, plus a basket report.
+            order_files = []
+            decided_utc = _now_utc()
+            for candidate in candidates:
+                if candidate["pass"]:
+                    order = TradeOrder(
+                        ticker=candidate["ticker"], action=candidate["action"],
+                        quantity=candidate["quantity"], notional_value_usd=candidate["notional_value_usd"],
+                        arrival_price=candidate["price"], decision_utc=decided_utc,
+                    )
+                    candidate["order_file"], _ = self._save_order(ctx, order, basket_index=len(order_files) + 1)
+                    order_files.append(candidate["order_file"])
+            report = {"orders": results, "aggregate": basket["aggregate"], "sizing_scale": float(sizing["scale"])}
+            report_part = types.Part.from_bytes(
+                data=json.dumps(report, indent=2).encode("utf-8"), mime_type="application/json")
+            ctx.artifact_service.save_artifact(
+                app_name=ctx.app_name, user_id=ctx.user_id, session_id=ctx.session.id,
+                filename="basket_risk_report.json", artifact=report_part)
+            ctx.session.state["order_files"] = order_files
+            ctx.session.state["last_risk_report_file"] = "basket_risk_report.json"
+
+            rejected = [r for r in results if not r["pass"]]
+            final_text = (
+                f"Basket risk assessment complete: {len(order_files)} of {len(results)} proposal(s) passed. "
+                f"Post-trade gross exposure {basket['aggregate']['metrics']['gross_exposure_ratio']:.2%} of NAV."
+            )
+            if rejected:
+                final_text += " Rejected: " + "; ".join(
+                    f"{r['ticker']} ({' '.join(r['violations'])})" for r in rejected
+                )
+            logger.info(f"[{self.name}] {final_text}")
+
+        except Exception as e:
+            final_text = f"Risk-Guardian failed. Error: {e}"
+            logger.error(f"[{self.name}] {final_text}", exc_info=True)
+
+        yield Event(author=self.name, content=types.Content(parts=[types.Part(text=final_text)]))
+
+    @staticmethod
+    def _load_json(ctx: InvocationContext, filename: str) -> Optional[Dict[str, Any]]:
+        artifact = ctx.artifact_service.load_artifact(
+            app_name=ctx.app_name, user_id=ctx.user_id,
+            session_id=ctx.session.id, filename=filename)
+        return json.loads(artifact.inline_data.data.decode('utf-8')) if artifact else None
+
+    @staticmethod
+    def _save_order(ctx: InvocationContext, order: TradeOrder, basket_index: Optional[int] = None):
+        # Basket orders are numbered, so two orders in one ticker never share an artifact.
+        suffix = f"_{basket_index:03d}" if basket_index is not None else ""
+        order_filename = f"{order.ticker}_trade_order{suffix}.json"
+        artifact_part = types.Part.from_bytes(
+            data=order.model_dump_json(indent=2).encode("utf-8"), mime_type="application/json")
+        version = ctx.artifact_service.save_artifact(
+            app_name=ctx.app_name, user_id=ctx.user_id, session_id=ctx.session.id,
+            filename=order_filename, artifact=artifact_part)
+        return order_filename, version
+
+def _now_utc() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None).isoformat()
+
 # This line is important for the agent to be discoverable.
 root_agent = RiskGuardian(name="risk_guardian")
\ No newline at end of file
@@ -1,21 +1,24 @@
-# A simplified, mock representation of our current portfolio and risk limits.
-# In a real system, this would be a live connection to a portfolio management database.
+# Seed data for a new portfolio store (see portfolio_store.py): the starting
+# book and risk limits. Live positions and cash are read from the store.
 
 MOCK_PORTFOLIO = {
     "cash_usd": 500_000.00,
-    "total_value_usd": 1_000_000.00,
     "positions": {
-        "GOOGL": {"shares": 100, "notional_usd": 17_500.00, "sector": "TECHNOLOGY"},
-        "JPM":   {"shares": 200, "notional_usd": 39_000.00, "sector": "FINANCIALS"}
+        "GOOGL": {"shares": 100, "sector": "TECHNOLOGY"},
+        "AAPL":  {"shares": 400, "sector": "TECHNOLOGY"},
+        "JPM":   {"shares": 200, "sector": "FINANCIALS"},
+        "BAC":   {"shares": 2_000, "sector": "FINANCIALS"},
+        "XOM":   {"shares": 800, "sector": "ENERGY"},
     },
-    "sector_exposure_percent": {
-        "TECHNOLOGY": 0.45,  # 45%
-        "FINANCIALS": 0.30,  # 30%
-        "OTHER": 0.25,       # 25%
-    }
 }
 
 RISK_LIMITS = {
     "max_position_size_usd": 100_000.00,
-    "max_sector_exposure_percent": 0.60, # 60%
-}
\ No newline at end of file
+    "max_sector_exposure_percent": 0.60,  # 60% of NAV
+    "max_gross_exposure_ratio": 1.50,     # gross exposure / NAV
+    "max_net_exposure_ratio": 1.00,       # |net exposure| / NAV
+    "max_name_concentration": 0.25,       # largest single name / NAV
+    "min_cash_usd": 50_000.00,
+    "max_var_percent": 0.05,              # one-day 99% VaR / NAV
+    "max_es_percent": 0.065,              # one-day 99% expected shortfall / NAV
+}
@@ -0,0 +1,322 @@
+"""
+Durable portfolio state: positions, cash, risk limits and applied fills.
+
+`PortfolioStore` keeps the book in a local SQLite file in WAL mode, so
+readers never wait on the writer and several worker processes can share
+one file. Positions are keyed (and so indexed) by ticker, with a second
+index by sector. Fills are keyed by execution id, which makes recording a
+fill idempotent: a re-delivered confirmation changes nothing.
+
+Reads go through an in-process read-through cache: the whole book, single
+positions and per-sector positions are each loaded once, by indexed
+lookups, and then served from memory. The cache is dropped when this
+process records fills, and when another connection commits (detected with
+`PRAGMA data_version`, one cheap check per read). `FillBatcher` groups the
+fills from `ExecutionAgent` confirmations that arrive close together into
+one write transaction.
+
+A new store is seeded from `MOCK_PORTFOLIO` and `RISK_LIMITS`. The shared
+store and batcher are configured from the environment:
+
+    AGORA_PORTFOLIO_DB_PATH       SQLite file (default .agora_cache/portfolio.sqlite)
+    AGORA_FILL_BATCH_SIZE         most fills per write transaction (default 64)
+    AGORA_FILL_BATCH_LATENCY_MS   longest a fill waits for its batch to fill (default 5)
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .portfolio_state import MOCK_PORTFOLIO, RISK_LIMITS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(".agora_cache", "portfolio.sqlite")
+DEFAULT_FILL_BATCH_SIZE = 64
+DEFAULT_FILL_BATCH_LATENCY_MS = 5.0
+# Sector recorded for a first fill in a name nobody has classified.
+UNKNOWN_SECTOR = "OTHER"
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS positions ("
+    " ticker TEXT PRIMARY KEY, sector TEXT NOT NULL, shares REAL NOT NULL, updated_at REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS positions_sector ON positions (sector)",
+    "CREATE TABLE IF NOT EXISTS account (key TEXT PRIMARY KEY, value REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS risk_limits (name TEXT PRIMARY KEY, value REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS fills ("
+    " execution_id TEXT PRIMARY KEY, ticker TEXT NOT NULL, action TEXT NOT NULL,"
+    " quantity REAL NOT NULL, price REAL NOT NULL, timestamp_utc TEXT, recorded_at REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS fills_ticker ON fills (ticker, timestamp_utc)",
+)
+
+
+class PortfolioStore:
+    """A thread-safe SQLite portfolio book with a read-through cache; see the module docstring."""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        self.metrics: Dict[str, int] = {
+            "cache_hits": 0, "cache_loads": 0, "fills_applied": 0, "fills_duplicate": 0, "write_batches": 0,
+        }
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # WAL with NORMAL sync is durable across process crashes, and only a power loss can drop the last commits.
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._db.execute(statement)
+        self._seed()
+        self._cache: Dict[Tuple[str, str], Any] = {}
+        self._data_version = self._read_data_version()
+        # Commits by other connections seen so far; state derived from the book is stale when it moves.
+        self.external_changes = 0
+
+    def _seed(self) -> None:
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                if self._db.execute("SELECT 1 FROM account WHERE key = 'cash_usd'").fetchone() is None:
+                    now = time.time()
+                    self._db.execute(
+                        "INSERT INTO account (key, value) VALUES ('cash_usd', ?)", (MOCK_PORTFOLIO["cash_usd"],)
+                    )
+                    self._db.executemany(
+                        "INSERT INTO positions (ticker, sector, shares, updated_at) VALUES (?, ?, ?, ?)",
+                        [(t, p["sector"], p["shares"], now) for t, p in MOCK_PORTFOLIO["positions"].items()],
+                    )
+                    self._db.executemany(
+                        "INSERT OR IGNORE INTO risk_limits (name, value) VALUES (?, ?)", RISK_LIMITS.items()
+                    )
+                    logger.info(f"Seeded portfolio store at {self.path} from the mock portfolio.")
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    # ---- reads -----------------------------------------------------------
+
+    def book(self) -> Dict[str, Any]:
+        """Cash and every position, shaped like `MOCK_PORTFOLIO`. Treat the result as read-only."""
+        def load():
+            return {
+                "cash_usd": self._db.execute("SELECT value FROM account WHERE key = 'cash_usd'").fetchone()[0],
+                "positions": {
+                    ticker: {"shares": shares, "sector": sector}
+                    for ticker, sector, shares in self._db.execute(
+                        "SELECT ticker, sector, shares FROM positions ORDER BY ticker"
+                    )
+                },
+            }
+        return self._cached(("book", ""), load)
+
+    def position(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """`{"shares", "sector"}` for `ticker`, or None if it was never held."""
+        def load():
+            row = self._db.execute("SELECT shares, sector FROM positions WHERE ticker = ?", (ticker,)).fetchone()
+            return {"shares": row[0], "sector": row[1]} if row else None
+        return self._cached(("position", ticker), load)
+
+    def sector_positions(self, sector: str) -> Dict[str, float]:
+        """Shares per ticker in `sector`, via the sector index."""
+        def load():
+            return dict(self._db.execute("SELECT ticker, shares FROM positions WHERE sector = ?", (sector,)).fetchall())
+        return self._cached(("sector", sector), load)
+
+    def limits(self) -> Dict[str, float]:
+        return self._cached(("limits", ""), lambda: dict(self._db.execute("SELECT name, value FROM risk_limits").fetchall()))
+
+    def fills(self, ticker: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """The most recent fills in `ticker`, newest first (not cached)."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT execution_id, action, quantity, price, timestamp_utc FROM fills"
+                " WHERE ticker = ? ORDER BY timestamp_utc DESC LIMIT ?", (ticker, limit),
+            ).fetchall()
+        return [
+            {"execution_id": e, "ticker": ticker, "action": a, "quantity": q, "price": p, "timestamp_utc": ts}
+            for e, a, q, p, ts in rows
+        ]
+
+    def refresh(self) -> int:
+        """Drops the cache if another connection committed since the last read; returns `external_changes`."""
+        with self._lock:
+            self._refresh_locked()
+            return self.external_changes
+
+    def _refresh_locked(self) -> None:
+        version = self._read_data_version()
+        if version != self._data_version:
+            self._data_version = version
+            self._cache.clear()
+            self.external_changes += 1
+
+    def _cached(self, key: Tuple[str, str], load):
+        with self._lock:
+            self._refresh_locked()
+            if key in self._cache:
+                self.metrics["cache_hits"] += 1
+            else:
+                self.metrics["cache_loads"] += 1
+                self._cache[key] = load()
+            return self._cache[key]
+
+    def _read_data_version(self) -> int:
+        # Changes only when another connection commits.
+        return self._db.execute("PRAGMA data_version").fetchone()[0]
+
+    # ---- writes ----------------------------------------------------------
+
+    def record_fills(self, fills: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Applies fills to positions and cash in one transaction. Each fill has
+        `execution_id`, `ticker`, `action` (BUY/SELL), `quantity` and `price`,
+        and optionally `sector` and `timestamp_utc`. Fills whose execution id
+        was already recorded are skipped; returns the fills that were applied.
+        """
+        fills = list(fills)
+        applied = []
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for fill in fills:
+                    inserted = self._db.execute(
+                        "INSERT OR IGNORE INTO fills"
+                        " (execution_id, ticker, action, quantity, price, timestamp_utc, recorded_at)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (fill["execution_id"], fill["ticker"], fill["action"].upper(), fill["quantity"],
+                         fill["price"], fill.get("timestamp_utc"), now),
+                    ).rowcount
+                    if not inserted:
+                        continue
+                    signed = fill["quantity"] if fill["action"].upper() == "BUY" else -fill["quantity"]
+                    self._db.execute(
+                        "INSERT INTO positions (ticker, sector, shares, updated_at) VALUES (?, ?, ?, ?)"
+                        " ON CONFLICT (ticker) DO UPDATE SET shares = shares + excluded.shares,"
+                        " updated_at = excluded.updated_at",
+                        (fill["ticker"], fill.get("sector") or UNKNOWN_SECTOR, signed, now),
+                    )
+                    self._db.execute(
+                        "UPDATE account SET value = value - ? WHERE key = 'cash_usd'", (signed * fill["price"],)
+                    )
+                    applied.append(fill)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self.metrics["write_batches"] += 1
+            self.metrics["fills_applied"] += len(applied)
+            self.metrics["fills_duplicate"] += len(fills) - len(applied)
+            if applied:
+                self._cache.clear()
+        return applied
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.metrics)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class FillBatcher:
+    """
+    Groups fills into `PortfolioStore.record_fills` transactions. A batch is
+    written once it holds `max_batch` fills or `max_latency_ms` after its
+    first fill arrived, whichever comes first; the write runs in a thread so
+    the event loop keeps serving. `on_applied`, when given, is called with
+    the applied fills back on the event loop thread once the write returns
+    and before any of the batch's `record()` calls do, so a caller can fold
+    them into state the loop owns without locking it against the writer.
+    """
+
+    def __init__(
+        self,
+        store: PortfolioStore,
+        max_batch: int = DEFAULT_FILL_BATCH_SIZE,
+        max_latency_ms: float = DEFAULT_FILL_BATCH_LATENCY_MS,
+        on_applied: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    ):
+        self.store = store
+        self.max_batch = max_batch
+        self.max_latency_ms = max_latency_ms
+        self.on_applied = on_applied
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def record(self, fill: Dict[str, Any]) -> bool:
+        """Queues `fill` and returns once its batch is committed: True if applied, False if a duplicate."""
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+        self._pending.append((fill, done))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_latency_ms / 1000.0, self._flush)
+        return await done
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._write(batch))
+
+    async def _write(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        try:
+            applied = await asyncio.to_thread(self.store.record_fills, [fill for fill, _ in batch])
+        except Exception as e:
+            for _, done in batch:
+                if not done.done():
+                    done.set_exception(e)
+            return
+        if applied and self.on_applied is not None:
+            try:
+                self.on_applied(applied)
+            except Exception as e:
+                # The fills are committed either way, so their callers still see them as applied.
+                logger.error(f"Fill batch committed but on_applied failed: {e}", exc_info=True)
+        applied_ids = {fill["execution_id"] for fill in applied}
+        for fill, done in batch:
+            if not done.done():
+                done.set_result(fill["execution_id"] in applied_ids)
+                # A repeated id inside one batch is only applied once.
+                applied_ids.discard(fill["execution_id"])
+
+
+_store: Optional[PortfolioStore] = None
+_batcher: Optional[FillBatcher] = None
+_store_lock = threading.Lock()
+
+
+def get_portfolio_store() -> PortfolioStore:
+    """The process-wide portfolio store configured from the environment."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PortfolioStore(os.getenv("AGORA_PORTFOLIO_DB_PATH", DEFAULT_DB_PATH))
+        return _store
+
+
+def get_fill_batcher(
+    on_applied: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+) -> FillBatcher:
+    """The process-wide fill batcher writing to `get_portfolio_store()`, with `on_applied` if given on first use."""
+    global _batcher
+    store = get_portfolio_store()
+    with _store_lock:
+        if _batcher is None:
+            _batcher = FillBatcher(
+                store,
+                max_batch=int(os.getenv("AGORA_FILL_BATCH_SIZE", DEFAULT_FILL_BATCH_SIZE)),
+                max_latency_ms=float(os.getenv("AGORA_FILL_BATCH_LATENCY_MS", DEFAULT_FILL_BATCH_LATENCY_MS)),
+                on_applied=on_applied,
+            )
+        return _batcher
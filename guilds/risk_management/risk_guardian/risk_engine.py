@@ -0,0 +1,487 @@
+"""
+Vectorized portfolio risk engine.
+
+Positions, prices, sectors and limits are held as NumPy arrays. `evaluate()`
+computes every rule for the current book in one pass, and caches the
+aggregates the rules are built from: gross and net exposure, gross exposure
+per sector, and the covariance-weighted exposure vector (Sigma w) behind
+the parametric VaR. `check_trade()` then prices a hypothetical trade
+against those aggregates in O(1) for exposure and VaR and O(N) for
+concentration, so a pre-trade check stays well under a millisecond on
+books of thousands of names. `mark_many()` revalues a set of changed
+symbols in O(changed x pending): the Sigma w update a mark implies is
+deferred, up to MAX_PENDING_MARKS names, and applied on demand to just the
+entries a check reads, so exposure, VaR, P&L and limit headroom
+(`snapshot()`) stay current under a live price feed. `check_basket()` checks many orders jointly,
+each against the book plus the passing orders before it, in vectorized
+passes over the basket, and `max_scale()` finds how far a basket can be
+scaled before any rule binds. `apply_trade()` folds a fill into the aggregates
+incrementally, and `set_book()` reloads positions, cash and limits in place,
+keeping the marks and the NAV that P&L is measured from.
+
+VaR and expected shortfall are one-period, parametric (normal) figures in
+dollars at `var_confidence`, using the covariance of the supplied returns
+matrix.
+"""
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Rules evaluated for every check, in report order. Each is "value must not
+# exceed limit"; the cash floor is stored negated to fit the same test.
+RULES = (
+    "position_size_usd",
+    "gross_exposure_ratio",
+    "net_exposure_ratio",
+    "name_concentration",
+    "sector_exposure",
+    "min_cash_usd",
+    "var_percent",
+    "es_percent",
+)
+LIMIT_KEYS = {
+    "position_size_usd": "max_position_size_usd",
+    "gross_exposure_ratio": "max_gross_exposure_ratio",
+    "net_exposure_ratio": "max_net_exposure_ratio",
+    "name_concentration": "max_name_concentration",
+    "sector_exposure": "max_sector_exposure_percent",
+    "min_cash_usd": "min_cash_usd",
+    "var_percent": "max_var_percent",
+    "es_percent": "max_es_percent",
+}
+# Points per refinement step when solving for the largest feasible basket scale.
+SCALE_GRID = 33
+# Marked names whose Sigma w update may be deferred before it is folded in.
+MAX_PENDING_MARKS = 64
+
+
+class RiskEngine:
+    """Array-backed book with cached risk aggregates; see the module docstring."""
+
+    def __init__(
+        self,
+        tickers: Sequence[str],
+        shares: Sequence[float],
+        prices: Sequence[float],
+        sectors: Sequence[str],
+        cash_usd: float,
+        limits: Dict[str, float],
+        returns: Optional[np.ndarray] = None,
+        var_confidence: float = 0.99,
+    ):
+        self.tickers: List[str] = list(tickers)
+        self.index: Dict[str, int] = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.shares = np.asarray(shares, dtype=np.float64).copy()
+        self.prices = np.asarray(prices, dtype=np.float64).copy()
+        self.sector_names: List[str] = sorted(set(sectors))
+        sector_ids = {name: i for i, name in enumerate(self.sector_names)}
+        self.sector_of = np.array([sector_ids[s] for s in sectors], dtype=np.int64)
+        self.cash_usd = float(cash_usd)
+        self.limits = self._limit_values(limits)
+        self.covariance = (
+            np.atleast_2d(np.cov(returns, rowvar=False)) if returns is not None and len(self.tickers)
+            else np.zeros((len(self.tickers), len(self.tickers)))
+        )
+        self.var_confidence = var_confidence
+        z = NormalDist().inv_cdf(var_confidence)
+        self._var_z = z
+        self._es_z = NormalDist().pdf(z) / (1.0 - var_confidence)
+        self.evaluate()
+        self.initial_nav = self.nav
+
+    # ---- full pass -------------------------------------------------------
+
+    def evaluate(self) -> Dict[str, Any]:
+        """Recomputes every cached aggregate from the arrays and reports the current book."""
+        self.notional = self.shares * self.prices
+        self.abs_notional = np.abs(self.notional)
+        self.gross = float(self.abs_notional.sum())
+        self.net = float(self.notional.sum())
+        self.sector_gross = np.bincount(
+            self.sector_of, weights=self.abs_notional, minlength=len(self.sector_names)
+        )
+        self._cov_exposure = self.covariance @ self.notional
+        self._pending: Dict[int, float] = {}
+        self.variance = float(self.notional @ self._cov_exposure)
+        return self._report(self._rule_values(
+            self.abs_notional.max(initial=0.0), self.gross, self.net, self.sector_gross.max(initial=0.0),
+            self.cash_usd, self.variance, self.nav,
+        ))
+
+    @property
+    def nav(self) -> float:
+        return self.cash_usd + self.net
+
+    @property
+    def cov_exposure(self) -> np.ndarray:
+        """The covariance-weighted exposure Sigma w, with every deferred mark folded in."""
+        self._fold_pending()
+        return self._cov_exposure
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Rule values, violations and headroom for the current book, read from
+        the cached aggregates (only the largest position is an O(N) scan).
+        Headroom is each limit minus its value, so negative means breached;
+        `pnl_usd` is the change in NAV since the engine was built.
+        """
+        values = self._rule_values(
+            self.abs_notional.max(initial=0.0), self.gross, self.net, self.sector_gross.max(initial=0.0),
+            self.cash_usd, self.variance, self.nav,
+        )
+        largest = self.tickers[int(np.argmax(self.abs_notional))] if self.tickers else None
+        report = self._report(values, **({"ticker": largest} if largest else {}))
+        report.update({
+            "headroom": dict(zip(RULES, (self.limits - values).tolist())),
+            "nav_usd": self.nav,
+            "pnl_usd": self.nav - self.initial_nav,
+            "gross_usd": self.gross,
+            "net_usd": self.net,
+            "cash_usd": self.cash_usd,
+            "sector_exposure": dict(zip(self.sector_names, (self.sector_gross / self.nav).tolist())),
+        })
+        return report
+
+    # ---- pre-trade -------------------------------------------------------
+
+    def check_trade(self, ticker: str, quantity: float, price: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Post-trade rule values and violations for buying `quantity` shares
+        of `ticker` (negative to sell). The ticker must already be known to
+        the engine; see `add_names`.
+        """
+        k = self.index[ticker]
+        price = self.prices[k] if price is None else price
+        delta = quantity * price
+        old = self.notional[k]
+        new = old + delta
+        gross = self.gross - abs(old) + abs(new)
+        sector = self.sector_of[k]
+        sector_gross = self.sector_gross[sector] - abs(old) + abs(new)
+        other_sectors = np.delete(self.sector_gross, sector).max(initial=0.0)
+        # Largest other name: temporarily blank the traded one.
+        self.abs_notional[k] = 0.0
+        largest_other = self.abs_notional.max(initial=0.0)
+        self.abs_notional[k] = abs(old)
+        variance = self.variance + 2.0 * delta * self._exposure_at(np.array([k]))[0] + delta * delta * self.covariance[k, k]
+        values = self._rule_values(
+            max(abs(new), largest_other), gross, self.net + delta, max(sector_gross, other_sectors),
+            self.cash_usd - delta, variance, self.nav, position=abs(new),
+        )
+        return self._report(values, ticker=ticker, sector=self.sector_names[sector])
+
+    def check_basket(
+        self, tickers: Sequence[str], quantities: Sequence[float], prices: Optional[Sequence[float]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Checks a basket of orders jointly and in sequence: order i is judged
+        against the book plus every earlier order in the basket that passed,
+        so orders that only breach a limit together are caught.
+
+        Post-trade rule values for every prefix of the basket come from one
+        vectorized pass over cumulative per-name deltas. When an order fails
+        it is dropped and only the orders after it are re-evaluated, so the
+        number of passes is one plus the number of rejections. Returns a
+        result per order (as `check_trade`) and the aggregate exposure after
+        all passing orders.
+        """
+        order_index = np.array([self.index[t] for t in tickers], dtype=np.int64)
+        price = self.prices[order_index] if prices is None else np.asarray(prices, dtype=np.float64)
+        delta = np.asarray(quantities, dtype=np.float64) * price
+        names, slot = np.unique(order_index, return_inverse=True)
+        untouched = self.abs_notional.copy()
+        untouched[names] = 0.0
+        book = {
+            "notional": self.notional[names].copy(), "cov_exposure": self._exposure_at(names),
+            "gross": self.gross, "net": self.net, "cash": self.cash_usd,
+            "sector_gross": self.sector_gross.copy(), "variance": self.variance,
+            "largest_untouched": untouched.max(initial=0.0),
+        }
+        covariance = self.covariance[np.ix_(names, names)]
+        name_sector = np.zeros((names.size, len(self.sector_names)))
+        name_sector[np.arange(names.size), self.sector_of[names]] = 1.0
+
+        values = np.empty((delta.size, len(RULES)))
+        accepted = np.ones(delta.size, dtype=bool)
+        start = 0
+        while start < delta.size:
+            rows = self._basket_values(book, covariance, name_sector, slot[start:], delta[start:])
+            breaching = ~(rows["values"] <= self.limits).all(axis=1)
+            if not breaching.any():
+                values[start:] = rows["values"]
+                self._carry_book(book, rows, delta.size - 1 - start, covariance)
+                break
+            # Drop the first failing order; the book moves past the orders before it.
+            end = start + int(np.argmax(breaching))
+            values[start:end + 1] = rows["values"][:end + 1 - start]
+            accepted[end] = False
+            if end > start:
+                self._carry_book(book, rows, end - 1 - start, covariance)
+            start = end + 1
+
+        orders = [
+            self._report(values[i], ticker=self.tickers[k], sector=self.sector_names[self.sector_of[k]])
+            for i, k in enumerate(order_index)
+        ]
+        aggregate = self._report(self._rule_values(
+            max(np.abs(book["notional"]).max(initial=0.0), book["largest_untouched"]),
+            book["gross"], book["net"], book["sector_gross"].max(initial=0.0), book["cash"],
+            book["variance"], self.nav,
+        ))
+        aggregate.update({
+            "orders_passed": int(accepted.sum()),
+            "orders_failed": int((~accepted).sum()),
+            "traded_notional_usd": float(np.abs(delta[accepted]).sum()),
+            "sector_exposure": dict(zip(self.sector_names, (book["sector_gross"] / self.nav).tolist())),
+        })
+        return {"orders": orders, "aggregate": aggregate}
+
+    def max_scale(self, tickers: Sequence[str], notionals: Sequence[float], tolerance: float = 1e-4) -> float:
+        """
+        Largest alpha in [0, 1] such that trading alpha * `notionals` (signed
+        dollars per order) keeps every rule within its limit, the position
+        limit applying to the traded names as in `check_trade`; 0.0 when even
+        the current book breaches. Every rule value is convex in alpha, so the
+        feasible alphas form an interval from 0, whose end is found by
+        refining a vectorized grid until it is narrower than `tolerance`.
+        """
+        order_index = np.array([self.index[t] for t in tickers], dtype=np.int64)
+        names, slot = np.unique(order_index, return_inverse=True)
+        direction = np.bincount(slot, weights=np.asarray(notionals, dtype=np.float64), minlength=names.size)
+        base = self.notional[names]
+        untouched = self.abs_notional.copy()
+        untouched[names] = 0.0
+        largest_untouched = untouched.max(initial=0.0)
+        name_sector = np.zeros((names.size, len(self.sector_names)))
+        name_sector[np.arange(names.size), self.sector_of[names]] = 1.0
+        linear = 2.0 * direction @ self._exposure_at(names)
+        quadratic = direction @ self.covariance[np.ix_(names, names)] @ direction
+        flow = direction.sum()
+
+        def feasible(alpha: np.ndarray) -> np.ndarray:
+            after_abs = np.abs(base + alpha[:, None] * direction)
+            abs_change = after_abs - np.abs(base)
+            values = self._rule_values(
+                np.maximum(after_abs.max(axis=1, initial=0.0), largest_untouched),
+                self.gross + abs_change.sum(axis=1), self.net + alpha * flow,
+                (self.sector_gross + abs_change @ name_sector).max(axis=1), self.cash_usd - alpha * flow,
+                self.variance + alpha * linear + alpha * alpha * quadratic, self.nav,
+                position=after_abs.max(axis=1, initial=0.0),
+            )
+            return (values <= self.limits).all(axis=1)
+
+        low, high = 0.0, 1.0
+        if not feasible(np.array([low]))[0]:
+            return 0.0
+        while high - low > tolerance:
+            grid = np.linspace(low, high, SCALE_GRID)
+            ok = feasible(grid)
+            if ok.all():
+                return high
+            last = int(np.argmin(ok)) - 1
+            low, high = grid[last], grid[last + 1]
+        return low
+
+    @staticmethod
+    def _carry_book(book: Dict[str, Any], rows: Dict[str, np.ndarray], i: int, covariance: np.ndarray) -> None:
+        """Advances a basket's working book to the state after row `i` of `rows`."""
+        book["notional"] = book["notional"] + rows["cumulative"][i]
+        book["cov_exposure"] = book["cov_exposure"] + covariance @ rows["cumulative"][i]
+        for key in ("gross", "net", "cash", "variance", "sector_gross"):
+            book[key] = rows[key][i]
+
+    def _basket_values(
+        self, book: Dict[str, Any], covariance: np.ndarray, name_sector: np.ndarray,
+        slot: np.ndarray, delta: np.ndarray,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Post-trade aggregates and rule values after each prefix of a basket
+        applied to `book`, in O(n * (n + u)) for n orders on u names.
+        """
+        n_orders = delta.size
+        rows = np.arange(n_orders)
+        per_name = np.zeros((n_orders, name_sector.shape[0]))
+        per_name[rows, slot] = delta
+        cumulative = np.cumsum(per_name, axis=0)
+        after_abs = np.abs(book["notional"] + cumulative)
+        abs_change = after_abs - np.abs(book["notional"])
+        sector_gross = book["sector_gross"] + abs_change @ name_sector
+        # delta_i * (Sigma c_{i-1})_{slot_i}, with c_{i-1} the cumulative delta before order i.
+        pair_cov = covariance[np.ix_(slot, slot)] * delta
+        earlier = np.tril(pair_cov, -1).sum(axis=1)
+        variance = book["variance"] + np.cumsum(
+            delta * (2.0 * (book["cov_exposure"][slot] + earlier) + delta * covariance[slot, slot])
+        )
+        flow = np.cumsum(delta)
+        result = {
+            "cumulative": cumulative,
+            "gross": book["gross"] + abs_change.sum(axis=1),
+            "net": book["net"] + flow,
+            "cash": book["cash"] - flow,
+            "sector_gross": sector_gross,
+            "variance": variance,
+        }
+        result["values"] = self._rule_values(
+            np.maximum(after_abs.max(axis=1, initial=0.0), book["largest_untouched"]),
+            result["gross"], result["net"], sector_gross.max(axis=1), result["cash"], variance, self.nav,
+            position=after_abs[rows, slot],
+        )
+        return result
+
+    # ---- book updates ----------------------------------------------------
+
+    def apply_trade(self, ticker: str, quantity: float, price: float) -> None:
+        """
+        Books a fill, updating the cached aggregates in O(N). Cash moves at
+        the fill `price` and the position stays valued at its mark, so the
+        aggregates keep equaling shares x prices and the difference between
+        fill and mark shows up in NAV (and P&L) at once.
+        """
+        k = self.index[ticker]
+        self.shares[k] += quantity
+        self.cash_usd -= quantity * price
+        self._set_notionals(np.array([k]), np.array([self.shares[k] * self.prices[k]]))
+
+    def set_book(self, shares: Sequence[float], cash_usd: float, limits: Optional[Dict[str, float]] = None) -> None:
+        """
+        Replaces the shares of every name (in `tickers` order), the cash and
+        optionally the limits, as when the stored book changed underneath the
+        engine, and re-evaluates. Prices, covariance and `initial_nav` stay.
+        """
+        self.shares = np.asarray(shares, dtype=np.float64).copy()
+        self.cash_usd = float(cash_usd)
+        if limits is not None:
+            self.limits = self._limit_values(limits)
+        self.evaluate()
+
+    def mark(self, ticker: str, price: float) -> None:
+        """Revalues one position at a new price; see `mark_many`."""
+        self.mark_many([ticker], [price])
+
+    def mark_many(self, tickers: Sequence[str], prices: Sequence[float]) -> None:
+        """
+        Revalues the positions in `tickers` at `prices` (the last price wins
+        for a repeated ticker), updating the cached aggregates in
+        O(changed x pending) rather than O(N).
+        """
+        order_index = np.array([self.index[t] for t in tickers], dtype=np.int64)
+        k, last = np.unique(order_index[::-1], return_index=True)
+        price = np.asarray(prices, dtype=np.float64)[::-1][last]
+        self.prices[k] = price
+        self._set_notionals(k, self.shares[k] * price)
+
+    def add_names(
+        self, tickers: Sequence[str], prices: Sequence[float], sectors: Sequence[str],
+        covariance_rows: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Adds flat positions for new names. `covariance_rows` is the (k, N + k)
+        block of the covariance between the new names and every name,
+        existing names first; without it the new names carry no VaR.
+        """
+        new = [t for t in tickers if t not in self.index]
+        if not new:
+            return
+        keep = [i for i, t in enumerate(tickers) if t not in self.index]
+        n, k = len(self.tickers), len(keep)
+        for sector in sectors:
+            if sector not in self.sector_names:
+                self.sector_names.append(sector)
+        sector_ids = {name: i for i, name in enumerate(self.sector_names)}
+        self.tickers.extend(new)
+        self.index.update({t: n + i for i, t in enumerate(new)})
+        self.shares = np.concatenate([self.shares, np.zeros(k)])
+        self.prices = np.concatenate([self.prices, np.asarray(prices, dtype=np.float64)[keep]])
+        self.sector_of = np.concatenate([self.sector_of, [sector_ids[sectors[i]] for i in keep]])
+        grown = np.zeros((n + k, n + k))
+        grown[:n, :n] = self.covariance
+        if covariance_rows is not None:
+            block = np.asarray(covariance_rows, dtype=np.float64)[keep]
+            grown[n:, :] = block
+            grown[:, n:] = block.T
+        self.covariance = grown
+        self.evaluate()
+
+    def _set_notionals(self, k: np.ndarray, new: np.ndarray) -> None:
+        """Sets the notional of distinct names `k`, keeping every aggregate current."""
+        old = self.notional[k]
+        delta = new - old
+        abs_change = np.abs(new) - np.abs(old)
+        self.variance += 2.0 * delta @ self._exposure_at(k) + delta @ self.covariance[np.ix_(k, k)] @ delta
+        self.notional[k] = new
+        self.abs_notional[k] = np.abs(new)
+        self.gross += abs_change.sum()
+        self.net += delta.sum()
+        np.add.at(self.sector_gross, self.sector_of[k], abs_change)
+        for i, d in zip(k.tolist(), delta.tolist()):
+            self._pending[i] = self._pending.get(i, 0.0) + d
+        if len(self._pending) > MAX_PENDING_MARKS:
+            self._fold_pending()
+
+    def _pending_arrays(self):
+        return (
+            np.fromiter(self._pending, dtype=np.int64, count=len(self._pending)),
+            np.fromiter(self._pending.values(), dtype=np.float64, count=len(self._pending)),
+        )
+
+    def _fold_pending(self) -> None:
+        """Applies the deferred Sigma w updates, in O(N x pending)."""
+        if self._pending:
+            pending, delta = self._pending_arrays()
+            # Sigma is symmetric; gathering rows is much cheaper than columns.
+            self._cov_exposure += delta @ self.covariance[pending]
+            self._pending.clear()
+
+    def _exposure_at(self, k: np.ndarray) -> np.ndarray:
+        """Entries `k` of Sigma w including deferred marks, in O(len(k) x pending)."""
+        exposure = self._cov_exposure[k]
+        if self._pending:
+            pending, delta = self._pending_arrays()
+            exposure = exposure + self.covariance[np.ix_(k, pending)] @ delta
+        return exposure
+
+    # ---- reporting -------------------------------------------------------
+
+    @staticmethod
+    def _limit_values(limits: Dict[str, float]) -> np.ndarray:
+        # Missing limits never bind.
+        values = np.array([limits.get(LIMIT_KEYS[rule], np.inf) for rule in RULES], dtype=np.float64)
+        values[RULES.index("min_cash_usd")] = -limits.get(LIMIT_KEYS["min_cash_usd"], -np.inf)
+        return values
+
+    def _rule_values(self, largest_position, gross, net, largest_sector, cash, variance, nav, position=None) -> np.ndarray:
+        """Rule values in RULES order; array arguments give one row per scenario."""
+        sigma = np.sqrt(np.maximum(variance, 0.0))
+        nav = nav if nav > 0 else np.nan
+        largest_position, gross, net, largest_sector, cash, sigma = np.broadcast_arrays(
+            largest_position, gross, net, largest_sector, cash, sigma
+        )
+        return np.stack([
+            largest_position if position is None else np.broadcast_to(position, largest_position.shape),
+            gross / nav,
+            np.abs(net) / nav,
+            largest_position / nav,
+            largest_sector / nav,
+            -cash,
+            self._var_z * sigma / nav,
+            self._es_z * sigma / nav,
+        ], axis=-1).astype(np.float64)
+
+    def _report(self, values: np.ndarray, **context: Any) -> Dict[str, Any]:
+        # NaN (non-positive NAV) counts as a breach.
+        breaches = ~(values <= self.limits)
+        metrics = dict(zip(RULES, values.tolist()))
+        metrics["min_cash_usd"] = -metrics["min_cash_usd"]
+        violations = [self._describe(rule, metrics[rule], context) for rule in np.array(RULES)[breaches]]
+        return {"pass": not violations, "violations": violations, "metrics": metrics, **context}
+
+    def _describe(self, rule: str, value: float, context: Dict[str, Any]) -> str:
+        limit = self.limits[RULES.index(rule)]
+        if rule == "position_size_usd":
+            return f"Position in {context.get('ticker', 'the largest name')} of ${value:,.2f} exceeds max position limit of ${limit:,.2f}."
+        if rule == "min_cash_usd":
+            return f"Cash would fall to ${value:,.2f}, below the minimum of ${-limit:,.2f}."
+        if rule == "sector_exposure" and "sector" in context:
+            return f"Largest sector exposure after the trade ({context['sector']} traded) would be {value:.2%}, exceeding the limit of {limit:.2%}."
+        return f"{rule.replace('_', ' ').capitalize()} of {value:.2%} exceeds the limit of {limit:.2%}."
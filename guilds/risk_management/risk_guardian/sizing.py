@@ -0,0 +1,72 @@
+"""
+Position sizing for trade proposals.
+
+Each proposal gets a target notional from its confidence and the name's
+volatility: at full confidence a position carries `RISK_BUDGET` of NAV in
+one-period volatility, and the target shrinks linearly with confidence. The
+target is then cut, in closed form, to the per-name limits (position size
+and name concentration, counting the shares already held). Finally the
+whole basket is scaled by the largest common factor that keeps the
+portfolio-level rules (gross and net exposure, sector exposure, cash floor,
+VaR and ES) within their limits, as found by `RiskEngine.max_scale`, so the
+binding limit is used up rather than exceeded or left idle.
+
+Orders on the same name are capped independently; the basket check that
+follows sizing still sees them together.
+"""
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from .risk_engine import RULES, RiskEngine
+
+# One-period volatility of a full-confidence position, as a fraction of NAV.
+RISK_BUDGET = 0.0015
+
+
+def size_orders(
+    engine: RiskEngine,
+    tickers: Sequence[str],
+    actions: Sequence[str],
+    confidence: Sequence[float],
+    prices: Optional[Sequence[float]] = None,
+    risk_budget: float = RISK_BUDGET,
+) -> Dict[str, np.ndarray]:
+    """
+    Share quantities for a basket of proposals, all names already known to
+    `engine`. Returns arrays per order: `quantity` (unsigned whole shares),
+    `target_notional_usd` (from confidence and volatility),
+    `cap_notional_usd` (per-name limit headroom) and `notional_value_usd`,
+    plus the common `scale` applied for the portfolio-level limits.
+    """
+    order_index = np.array([engine.index[t] for t in tickers], dtype=np.int64)
+    price = engine.prices[order_index] if prices is None else np.asarray(prices, dtype=np.float64)
+    side = np.where(np.char.upper(np.asarray(actions, dtype=str)) == "BUY", 1.0, -1.0)
+    weight = np.clip(np.asarray(confidence, dtype=np.float64), 0.0, 1.0)
+    nav = engine.nav
+
+    # Volatility target; names without return history are left to the limits alone.
+    sigma = np.sqrt(np.maximum(np.diag(engine.covariance)[order_index], 0.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        target = np.where(sigma > 0, weight * risk_budget * nav / sigma, np.where(weight > 0, np.inf, 0.0))
+
+    # |old + side * x| <= bound  <=>  x <= bound - side * old, for x >= 0.
+    held = side * engine.notional[order_index]
+    bound = min(
+        engine.limits[RULES.index("position_size_usd")],
+        engine.limits[RULES.index("name_concentration")] * nav,
+    )
+    cap = np.maximum(bound - held, 0.0)
+    notional = np.minimum(target, cap)
+    # With no binding target or limit at all there is nothing to size against.
+    notional = np.where(np.isfinite(notional), notional, 0.0)
+
+    scale = engine.max_scale(tickers, side * notional) if len(tickers) else 0.0
+    quantity = np.floor(scale * notional / price).astype(np.int64)
+    return {
+        "quantity": quantity,
+        "target_notional_usd": target,
+        "cap_notional_usd": cap,
+        "notional_value_usd": quantity * price,
+        "scale": np.float64(scale),
+    }
@@ -1,32 +1,167 @@
-from typing import Dict
-from .portfolio_state import MOCK_PORTFOLIO, RISK_LIMITS
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .portfolio_store import PortfolioStore, get_fill_batcher, get_portfolio_store
+from .risk_engine import RiskEngine
+
+# Mock market data; a real system would call live market data and reference-data APIs.
+MOCK_PRICES = {
+    "MSFT": 350.00, "GOOGL": 175.00, "NVDA": 900.00, "AAPL": 230.00,
+    "JPM": 195.00, "BAC": 40.00, "XOM": 110.00,
+}
+SECTOR_MAP = {
+    "MSFT": "TECHNOLOGY", "GOOGL": "TECHNOLOGY", "NVDA": "TECHNOLOGY", "AAPL": "TECHNOLOGY",
+    "JPM": "FINANCIALS", "BAC": "FINANCIALS", "XOM": "ENERGY",
+}
+# Days of returns history used for the covariance.
+RETURNS_LOOKBACK = 250
+
+
+def get_reference_price(ticker: str) -> float:
+    """Mocks fetching a reference price for a ticker the risk engine has not marked yet."""
+    # In a real system, this would call a market data API.
+    return MOCK_PRICES.get(ticker, 200.00) # Default price for simplicity
+
 
 def get_current_price(ticker: str) -> float:
-    """Mocks fetching the current market price for a ticker."""
-    # In a real system, this would call a live market data API.
-    price_map = {"MSFT": 350.00, "GOOGL": 175.00, "NVDA": 900.00}
-    return price_map.get(ticker, 200.00) # Default price for simplicity
-
-def check_position_size(notional_value: float) -> Dict:
-    """Checks if a proposed trade's value exceeds the max position size."""
-    print(f"TOOL EXECUTING: check_position_size(notional_value={notional_value})")
-    limit = RISK_LIMITS["max_position_size_usd"]
-    if notional_value > limit:
-        return {"pass": False, "reason": f"Trade value ${notional_value:,.2f} exceeds max position limit of ${limit:,.2f}."}
-    return {"pass": True}
-
-def check_sector_exposure(ticker: str, notional_value: float) -> Dict:
-    """Checks if adding the proposed trade would breach sector concentration limits."""
-    print(f"TOOL EXECUTING: check_sector_exposure(ticker={ticker})")
-    # Mock sector lookup
-    sector_map = {"MSFT": "TECHNOLOGY", "GOOGL": "TECHNOLOGY", "NVDA": "TECHNOLOGY"}
-    sector = sector_map.get(ticker, "OTHER")
-    
-    current_sector_value = MOCK_PORTFOLIO["sector_exposure_percent"].get(sector, 0.0) * MOCK_PORTFOLIO["total_value_usd"]
-    new_total_value = MOCK_PORTFOLIO["total_value_usd"] + notional_value
-    new_sector_exposure = (current_sector_value + notional_value) / new_total_value
-    
-    limit = RISK_LIMITS["max_sector_exposure_percent"]
-    if new_sector_exposure > limit:
-        return {"pass": False, "reason": f"Proposed trade increases {sector} exposure to {new_sector_exposure:.2%} which exceeds the limit of {limit:.2%}"}
-    return {"pass": True}
\ No newline at end of file
+    """The latest mark for a ticker: the live price last applied by the risk monitor, if any."""
+    engine = _engine
+    if engine is not None and ticker in engine.index:
+        return float(engine.prices[engine.index[ticker]])
+    return get_reference_price(ticker)
+
+
+def get_sector(ticker: str) -> str:
+    return SECTOR_MAP.get(ticker, "OTHER")
+
+
+def fetch_returns_matrix(tickers: Sequence[str], periods: int = RETURNS_LOOKBACK) -> np.ndarray:
+    """
+    Mocks a (periods, len(tickers)) matrix of daily returns: a shared market
+    factor plus a sector factor and noise, seeded by name so calls agree.
+    """
+    market = np.random.default_rng(0).normal(0.0, 0.01, periods)
+    columns = []
+    for ticker in tickers:
+        sector = np.random.default_rng(zlib.crc32(get_sector(ticker).encode("utf-8"))).normal(0.0, 0.006, periods)
+        own = np.random.default_rng(zlib.crc32(ticker.encode("utf-8"))).normal(0.0, 0.012, periods)
+        columns.append(market + sector + own)
+    return np.column_stack(columns) if columns else np.empty((periods, 0))
+
+
+def covariance_rows(new_tickers: Sequence[str], tickers: Sequence[str], periods: int = RETURNS_LOOKBACK) -> np.ndarray:
+    """Covariance of `new_tickers` against `tickers` followed by `new_tickers`, as `RiskEngine.add_names` expects."""
+    returns = fetch_returns_matrix(list(tickers) + list(new_tickers), periods)
+    centered = returns - returns.mean(axis=0)
+    return centered[:, len(tickers):].T @ centered / (periods - 1)
+
+
+def build_risk_engine(store: Optional[PortfolioStore] = None, marks: Optional[Dict[str, float]] = None) -> RiskEngine:
+    """A `RiskEngine` over the stored book and limits, priced at `marks` where given, else reference prices."""
+    book = (store or get_portfolio_store()).book()
+    limits = (store or get_portfolio_store()).limits()
+    tickers = list(book["positions"])
+    marks = marks or {}
+    return RiskEngine(
+        tickers=tickers,
+        shares=[book["positions"][t]["shares"] for t in tickers],
+        prices=[marks.get(t) or get_reference_price(t) for t in tickers],
+        sectors=[book["positions"][t]["sector"] for t in tickers],
+        cash_usd=book["cash_usd"],
+        limits=limits,
+        returns=fetch_returns_matrix(tickers),
+    )
+
+
+def reload_risk_engine(engine: RiskEngine, store: Optional[PortfolioStore] = None) -> None:
+    """Reloads positions, cash and limits from the store into `engine` in place, keeping its marks and initial NAV."""
+    store = store or get_portfolio_store()
+    book = store.book()
+    positions = book["positions"]
+    new = [t for t in positions if t not in engine.index]
+    if new:
+        engine.add_names(
+            new, [get_reference_price(t) for t in new], [positions[t]["sector"] for t in new],
+            covariance_rows(new, engine.tickers),
+        )
+    engine.set_book(
+        [positions[t]["shares"] if t in positions else 0.0 for t in engine.tickers], book["cash_usd"], store.limits(),
+    )
+
+
+def ensure_names(engine: RiskEngine, tickers: Sequence[str]) -> None:
+    """Registers any of `tickers` the engine has not seen, with price, sector and covariance."""
+    new = [t for t in dict.fromkeys(tickers) if t not in engine.index]
+    if new:
+        engine.add_names(
+            new, [get_current_price(t) for t in new], [get_sector(t) for t in new],
+            covariance_rows(new, engine.tickers),
+        )
+
+
+_engine: Optional[RiskEngine] = None
+_engine_changes = -1
+_engine_lock = threading.Lock()
+
+
+def get_risk_engine() -> RiskEngine:
+    """
+    The process-wide risk engine. It is built from the portfolio store on
+    first use and reloaded in place (see `reload_risk_engine`) when another
+    process has committed to the store since, so holders of the engine,
+    like `RiskMonitor`, keep marking the live object; fills recorded here
+    are booked into it by `record_fill` once their write commits. The
+    engine is not thread-safe: use it from the event loop thread only.
+    """
+    with _engine_lock:
+        return _current_engine_locked()
+
+
+def _current_engine_locked() -> RiskEngine:
+    global _engine, _engine_changes
+    store = get_portfolio_store()
+    changes = store.refresh()
+    if _engine is None:
+        _engine = build_risk_engine(store)
+    elif changes != _engine_changes:
+        reload_risk_engine(_engine, store)
+    _engine_changes = changes
+    return _engine
+
+
+def _book_fills(applied: List[Dict[str, Any]]) -> None:
+    """
+    Books fills the store has just committed into the risk engine. It runs
+    on the event loop thread, like every other user of the engine, and only
+    after the write, so the engine sees each fill exactly once: an engine
+    not built yet, or one that another process's commit makes stale, is
+    (re)loaded from the store and reads the fills; otherwise they are
+    applied to it incrementally.
+    """
+    with _engine_lock:
+        if _engine is None:
+            return
+        if get_portfolio_store().refresh() != _engine_changes:
+            _current_engine_locked()
+            return
+        for fill in applied:
+            ensure_names(_engine, [fill["ticker"]])
+            quantity = fill["quantity"] if fill["action"].upper() == "BUY" else -fill["quantity"]
+            _engine.apply_trade(fill["ticker"], quantity, fill["price"])
+
+
+async def record_fill(
+    ticker: str, action: str, quantity: float, price: float, execution_id: str, timestamp_utc: Optional[str] = None,
+) -> bool:
+    """
+    Durably records an executed fill (batched with other fills arriving at
+    the same time) and books it into the risk engine. Returns False, and
+    changes nothing, when `execution_id` was already recorded.
+    """
+    return await get_fill_batcher(on_applied=_book_fills).record({
+        "execution_id": execution_id, "ticker": ticker, "action": action, "quantity": quantity,
+        "price": price, "sector": get_sector(ticker), "timestamp_utc": timestamp_utc,
+    })
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseModel, Field
 
 class TradeOrder(BaseModel):
@@ -8,4 +10,6 @@ class TradeOrder(BaseModel):
     action: str = Field(description="BUY or SELL")
     quantity: int = Field(description="Number of shares")
     order_type: str = Field(description="e.g., MARKET, LIMIT", default="MARKET")
-    notional_value_usd: float 
\ No newline at end of file
+    notional_value_usd: float
+    arrival_price: Optional[float] = Field(description="Market price when the order was decided", default=None)
+    decision_utc: Optional[str] = Field(description="When the order was decided, ISO 8601 UTC", default=None)
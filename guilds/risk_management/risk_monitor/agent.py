@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import struct
+from typing import Any, AsyncGenerator, Dict, List, Optional, Set, Tuple, Union
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.agents.live_request_queue import LiveRequest
+from google.adk.events import Event
+from google.genai.types import Part
+
+from guilds.microstructure.market_microstructure_analyst.analyzer import MALFORMED_TICK_ERRORS
+from guilds.microstructure.market_microstructure_analyst.batching import drain_live_requests
+from guilds.microstructure.market_microstructure_analyst.wire_format import PRICE_SCALE, L2Tick, decode_payload
+from ..risk_guardian.risk_engine import RULES, RiskEngine
+from ..risk_guardian.tools import get_risk_engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def mark_price(tick: Union[Dict[str, Any], L2Tick]) -> Optional[float]:
+    """Mid of a tick's best bid and ask; the one best price when a side is empty."""
+    if isinstance(tick, L2Tick):
+        best = [side[0] / PRICE_SCALE for side in (tick.bid_prices, tick.ask_prices) if side.size]
+    else:
+        best = [side[0]["price"] for side in (tick.get("bids", []), tick.get("asks", [])) if side]
+    return sum(best) / len(best) if best else None
+
+
+class RiskMonitor(BaseAgent):
+    """
+    A streaming agent that keeps the shared `RiskEngine` marked to market
+    from live Level 2 ticks, in the microstructure guild's wire formats.
+
+    Ticks are drained in micro-batches; each batch is reduced to the last
+    mid price per ticker the engine knows and applied with
+    `RiskEngine.mark_many`, which updates exposure, VaR and P&L in
+    O(changed symbols). After every batch the engine's `snapshot()` (rule
+    values, limit headroom, NAV and P&L) is published to the `risk_snapshot`
+    state key, and an event is emitted whenever a limit starts or stops
+    being breached. `RiskGuardian` reads the same engine, so its pre-trade
+    checks price against the live marks without recomputing the book.
+    """
+    tick_batch_size: int = 64
+    tick_batch_latency_us: int = 2000
+    # Runner.run_live() scans `agent.tools` for streaming tools; this agent has none.
+    tools: List[Any] = []
+
+    # This method MUST be named _run_live_impl to work with runner.run_live()
+    async def _run_live_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        logger.info(f"[{self.name}] Live risk monitor started. Waiting for prices...")
+        engine = get_risk_engine()
+        breached: Set[str] = set()
+        ticks_seen = 0
+
+        while True:
+            try:
+                live_reqs = await drain_live_requests(
+                    ctx.live_request_queue, self.tick_batch_size, self.tick_batch_latency_us
+                )
+                # Also picks up fills other processes committed to the portfolio store.
+                engine = get_risk_engine()
+                marks, count, closed = self._decode_marks(live_reqs, engine)
+                ticks_seen += count
+                if marks:
+                    engine.mark_many(list(marks), list(marks.values()))
+                    snapshot = engine.snapshot()
+                    ctx.session.state["risk_snapshot"] = snapshot
+                    for text in self._limit_changes(snapshot, breached):
+                        yield self._alert_event(text)
+
+                if closed:
+                    logger.info(
+                        f"[{self.name}] Live request queue closed after {ticks_seen} ticks. "
+                        f"NAV ${engine.nav:,.2f}, P&L ${engine.nav - engine.initial_nav:,.2f}."
+                    )
+                    break
+
+            except asyncio.CancelledError:
+                logger.info(f"[{self.name}] Live stream cancelled. Shutting down.")
+                break
+            except Exception as e:
+                logger.error(f"[{self.name}] Error in live stream: {e}")
+
+    def _decode_marks(
+        self, live_reqs: List[LiveRequest], engine: RiskEngine
+    ) -> Tuple[Dict[str, float], int, bool]:
+        """Last mark per known ticker in a drained batch, the number of ticks, and whether the queue closed."""
+        marks: Dict[str, float] = {}
+        count = 0
+        for live_req in live_reqs:
+            if live_req.close:
+                return marks, count, True
+            if not live_req.blob:
+                continue
+            try:
+                tick = decode_payload(live_req.blob.data, live_req.blob.mime_type)
+            except (ValueError, struct.error) as e:
+                logger.error(f"[{self.name}] Dropping malformed tick: {e}")
+                continue
+            count += 1
+            try:
+                ticker = tick.ticker if isinstance(tick, L2Tick) else tick.get("ticker")
+                # Names the engine does not carry have no exposure to mark.
+                if ticker not in engine.index:
+                    continue
+                price = mark_price(tick)
+            except MALFORMED_TICK_ERRORS as e:
+                logger.error(f"[{self.name}] Dropping malformed tick: {e!r}")
+                continue
+            if price is not None and price > 0:
+                marks[ticker] = price
+        return marks, count, False
+
+    @staticmethod
+    def _limit_changes(snapshot: Dict[str, Any], breached: Set[str]) -> List[str]:
+        """Messages for limits that started or stopped being breached; updates `breached`."""
+        now = [rule for rule in RULES if not snapshot["headroom"][rule] >= 0]
+        descriptions = dict(zip(now, snapshot["violations"]))
+        messages = [f"RISK LIMIT BREACHED on live marks: {descriptions[rule]}" for rule in now if rule not in breached]
+        messages += [
+            f"Risk limit back within bounds: {rule.replace('_', ' ')} "
+            f"(headroom {snapshot['headroom'][rule]:,.4g})."
+            for rule in RULES if rule in breached and rule not in now
+        ]
+        breached.clear()
+        breached.update(now)
+        return messages
+
+    def _alert_event(self, text: str) -> Event:
+        if text.startswith("RISK LIMIT BREACHED"):
+            logger.warning(f"[{self.name}] {text}")
+        else:
+            logger.info(f"[{self.name}] {text}")
+        return Event(author=self.name, content={"parts": [Part(text=text)]})
+
+root_agent = RiskMonitor(name="risk_monitor")
@@ -7,6 +7,7 @@ from google.adk.agents.invocation_context import InvocationContext
 from google.adk.events import Event
 from google.genai import types
 
+from guilds.common.llm_cache import cached_llm_run
 from .trade_critique import TradeCritique
 
 logging.basicConfig(level=logging.INFO)
@@ -28,6 +29,8 @@ critic_llm = LlmAgent(
     {proposal_content}
     """,
     output_schema=TradeCritique,
+    # The proposal in the template is the whole prompt; earlier agents' messages are not sent.
+    include_contents="none",
 )
 
 class DevilsAdvocate(BaseAgent):
@@ -49,7 +52,7 @@ class DevilsAdvocate(BaseAgent):
             ctx.session.state["proposal_content"] = proposal_content
             
             final_response_text = ""
-            async for event in self.critic_llm.run_async(ctx):
+            async for event in cached_llm_run(self.critic_llm, ctx):
                 if event.is_final_response() and event.content:
                     final_response_text = event.content.parts[0].text
                 yield event
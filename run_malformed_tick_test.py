@@ -0,0 +1,114 @@
+"""
+Regression test: malformed ticks must not swallow a batch's close request.
+
+A bad tick is queued between good ones and the queue is closed straight
+away, so the good ticks, the bad tick and the close all arrive in one
+micro-batch. The agent should log and drop the bad tick, keep the good ones,
+and log that the queue closed. A case fails when the agent never logs the
+close, logs an error for the whole batch instead of the one tick, or is
+still running after `TIMEOUT_S`.
+
+Usage:
+    python run_malformed_tick_test.py
+"""
+import asyncio
+import datetime
+import json
+import logging
+
+from google.adk.agents import LiveRequestQueue
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai.types import Blob
+
+from guilds.microstructure.market_microstructure_analyst.agent import MarketMicrostructureAnalyst
+from guilds.risk_management.risk_guardian.portfolio_store import get_portfolio_store
+from guilds.risk_management.risk_monitor.agent import RiskMonitor
+
+JSON_MIME_TYPE = "application/json"
+TIMEOUT_S = 10.0
+# A held name, so the risk monitor marks it rather than skipping it.
+TICKER = next(iter(get_portfolio_store().book()["positions"]))
+
+
+def json_tick(ticker: str, bid: float, ask: float) -> dict:
+    return {
+        "ticker": ticker,
+        "timestamp_utc": datetime.datetime.utcnow().isoformat(),
+        "bids": [{"price": bid, "size": 100}],
+        "asks": [{"price": ask, "size": 100}],
+    }
+
+
+# Each decodes as JSON but cannot be applied to a book.
+MALFORMED_TICKS = {
+    "bid without a price": {**json_tick(TICKER, 100.0, 100.1), "bids": [{"size": 100}]},
+    "tick without a ticker": {k: v for k, v in json_tick(TICKER, 100.0, 100.1).items() if k != "ticker"},
+    "garbled timestamp": {**json_tick(TICKER, 100.0, 100.1), "timestamp_utc": "not-a-time"},
+}
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+async def run_case(agent, label: str, bad_tick: dict) -> bool:
+    runner = Runner(agent=agent, app_name="agora_malformed", session_service=InMemorySessionService())
+    session = runner.session_service.create_session(
+        app_name="agora_malformed", user_id="test_user", session_id=label.replace(" ", "_"),
+    )
+    live_request_queue = LiveRequestQueue()
+    for tick in (json_tick(TICKER, 100.0, 100.1), bad_tick, json_tick(TICKER, 100.0, 100.1)):
+        live_request_queue.send_realtime(Blob(data=json.dumps(tick).encode("utf-8"), mime_type=JSON_MIME_TYPE))
+    live_request_queue.close()
+
+    async def consume():
+        async for _ in runner.run_live(
+            session=session, live_request_queue=live_request_queue,
+            run_config=RunConfig(streaming_mode=StreamingMode.BIDI),
+        ):
+            pass
+
+    handler = RecordingHandler()
+    logging.getLogger("guilds").addHandler(handler)
+    try:
+        await asyncio.wait_for(consume(), TIMEOUT_S)
+    except asyncio.TimeoutError:
+        print(f"[FAIL] {agent.name}, {label}: session still running after {TIMEOUT_S:.0f}s.")
+        return False
+    finally:
+        logging.getLogger("guilds").removeHandler(handler)
+    if any("Error in live stream" in message for message in handler.messages):
+        print(f"[FAIL] {agent.name}, {label}: the bad tick failed its whole batch.")
+        return False
+    if not any("Live request queue closed" in message for message in handler.messages):
+        print(f"[FAIL] {agent.name}, {label}: the close request was lost.")
+        return False
+    print(f"[PASS] {agent.name}, {label}: bad tick dropped, session closed.")
+    return True
+
+
+async def main():
+    print("--- AGORA: Malformed Tick Regression Test ---")
+    agents = [
+        MarketMicrostructureAnalyst(name="analyst_inline", tick_batch_size=64),
+        MarketMicrostructureAnalyst(name="analyst_sharded", tick_batch_size=64, num_shards=2),
+        RiskMonitor(name="risk_monitor", tick_batch_size=64),
+    ]
+    results = [
+        await run_case(agent, label, bad_tick)
+        for agent in agents for label, bad_tick in MALFORMED_TICKS.items()
+    ]
+    print(f"\n--- {sum(results)}/{len(results)} cases passed ---")
+    if not all(results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""
+Functional test for the live risk monitor (`RiskMonitor`).
+
+This script streams simulated Level 2 ticks for the portfolio's names (plus a
+few it does not hold) into the risk monitor, which marks the shared risk
+engine to market as prices move. It runs two concurrent tasks:
+1.  `produce_market_data`: Sends binary-encoded ticks for every ticker twenty
+    times a second, each price following a random walk from its reference
+    price.
+2.  `consume_agent_events`: Prints any limit breach or recovery alerts.
+
+After the run it prints the latest `risk_snapshot` from the session state
+(NAV, P&L and limit headroom) and a pre-trade check, which reads the same
+live-marked engine instead of re-pricing the book.
+
+Usage:
+    python run_risk_monitor_test.py
+"""
+import asyncio
+
+from google.adk.agents import LiveRequestQueue
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai.types import Blob
+
+from guilds.microstructure.market_microstructure_analyst.data_feed import mock_l2_universe_feed
+from guilds.microstructure.market_microstructure_analyst.wire_format import L2_BINARY_MIME_TYPE
+from guilds.risk_management.risk_guardian.portfolio_store import get_portfolio_store
+from guilds.risk_management.risk_guardian.tools import MOCK_PRICES, get_risk_engine
+from guilds.risk_management.risk_monitor.agent import root_agent
+
+TICKERS = list(dict.fromkeys(list(get_portfolio_store().book()["positions"]) + ["MSFT", "NVDA", "TSLA"]))
+
+
+async def consume_agent_events(live_events):
+    """Async task to listen for and print events from the agent."""
+    print("[CONSUMER] Started listening for risk alerts.")
+    async for event in live_events:
+        if event.content and event.content.parts and event.content.parts[0].text:
+            print(f"\n>>> RISK ALERT RECEIVED: {event.content.parts[0].text}\n")
+    print("[CONSUMER] Event stream closed.")
+
+
+async def produce_market_data(live_request_queue):
+    """Async task to generate and send market data to the agent."""
+    print(f"[PRODUCER] Streaming prices for {', '.join(TICKERS)}.")
+    feed = mock_l2_universe_feed(
+        TICKERS, interval=0.05, mime_type=L2_BINARY_MIME_TYPE,
+        base_prices=MOCK_PRICES, volatility=0.002,
+    )
+    async for payload in feed:
+        live_request_queue.send_realtime(Blob(data=payload, mime_type=L2_BINARY_MIME_TYPE))
+
+
+async def main():
+    print("--- AGORA: Live Risk Monitor Test ---")
+
+    runner = Runner(
+        agent=root_agent,
+        app_name="agora_risk_monitor",
+        session_service=InMemorySessionService(),
+    )
+    session = runner.session_service.create_session(
+        app_name="agora_risk_monitor", user_id="test_user", session_id="risk_monitor_1"
+    )
+
+    live_request_queue = LiveRequestQueue()
+    live_events = runner.run_live(
+        session=session,
+        live_request_queue=live_request_queue,
+        run_config=RunConfig(streaming_mode=StreamingMode.BIDI),
+    )
+
+    consumer_task = asyncio.create_task(consume_agent_events(live_events))
+    producer_task = asyncio.create_task(produce_market_data(live_request_queue))
+
+    run_duration = 5
+    print(f"\n[RUNNER] Running live risk monitor for {run_duration} seconds...")
+    await asyncio.sleep(run_duration)
+
+    print("\n[RUNNER] Stopping simulation...")
+    producer_task.cancel()
+    live_request_queue.close()
+    await asyncio.gather(consumer_task, producer_task, return_exceptions=True)
+
+    snapshot = session.state.get("risk_snapshot")
+    if snapshot:
+        print(f"\n[RESULT] NAV ${snapshot['nav_usd']:,.2f}, P&L ${snapshot['pnl_usd']:,.2f}")
+        for rule, headroom in snapshot["headroom"].items():
+            print(f"  {rule:<22} value {snapshot['metrics'][rule]:>14,.4f}   headroom {headroom:>14,.4f}")
+        check = get_risk_engine().check_trade("GOOGL", 100)
+        print(f"[RESULT] Pre-trade check on live marks, BUY 100 GOOGL: pass={check['pass']} {check['violations']}")
+    else:
+        print("\n[RESULT] No risk snapshot was published.")
+
+    print("\n--- Test Complete ---")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -6,8 +6,10 @@ to process a continuous stream of information and generate alerts for anomalies.
 
 It orchestrates two concurrent asynchronous tasks:
 1.  `produce_market_data`: Simulates a Level 2 order book feed, sending new
-    JSON data to the agent every second. It occasionally introduces a wide
-    bid-ask spread to trigger an alert.
+    binary-encoded ticks to the agent ten times a second. It occasionally
+    introduces a wide bid-ask spread to trigger an alert. The agent's detectors
+    learn each ticker's normal spread first, so alerts start after a short
+    warm-up of about 30 ticks.
 2.  `consume_agent_events`: Listens for events coming from the agent and prints
     any alerts to the console.
 
@@ -18,7 +20,6 @@ Usage:
     python run_streaming_test.py
 """
 import asyncio
-import json
 
 from google.adk.agents import LiveRequestQueue
 from google.adk.agents.run_config import RunConfig, StreamingMode
@@ -29,6 +30,10 @@ from google.genai.types import Blob
 # Import the agent and the mock data feed
 from guilds.microstructure.market_microstructure_analyst.agent import root_agent
 from guilds.microstructure.market_microstructure_analyst.data_feed import mock_l2_feed
+from guilds.microstructure.market_microstructure_analyst.wire_format import L2_BINARY_MIME_TYPE
+
+# Switch to "application/json" to exercise the JSON fallback path.
+WIRE_MIME_TYPE = L2_BINARY_MIME_TYPE
 
 
 async def consume_agent_events(live_events):
@@ -43,10 +48,10 @@ async def consume_agent_events(live_events):
 async def produce_market_data(live_request_queue):
     """Async task to generate and send market data to the agent."""
     print("[PRODUCER] Started generating real-time market data.")
-    async for order_book_json in mock_l2_feed(ticker="AGORA"):
-        data_blob = Blob(
-            data=order_book_json.encode("utf-8"), mime_type="application/json"
-        )
+    async for payload in mock_l2_feed(ticker="AGORA", mime_type=WIRE_MIME_TYPE, interval=0.1):
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        data_blob = Blob(data=payload, mime_type=WIRE_MIME_TYPE)
         live_request_queue.send_realtime(data_blob)
     print("[PRODUCER] Data feed stopped.")
 
@@ -0,0 +1,61 @@
+"""
+Transaction cost analysis report over the execution log.
+
+Every execution by the `ExecutionAgent` is recorded, with its arrival price,
+fills and latencies, in the columnar execution log (`.agora_cache/tca` by
+default). This script loads the whole log and prints, per group:
+
+1.  **Slippage:** quantity-weighted mean and distribution, in bps against the
+    arrival price.
+2.  **Implementation shortfall:** execution plus opportunity cost, in USD and
+    in bps of the arrival notional.
+3.  **Latency:** decision-to-send and send-to-fill distributions (ms).
+
+Run the agent with different `tca_tag`s before and after a change to the
+execution path, then compare the two tags to see whether it helped or hurt.
+
+Usage:
+    python run_tca_report.py --by algo
+    python run_tca_report.py --by tag --baseline default --candidate new-gateway
+"""
+import argparse
+import json
+import os
+
+from guilds.execution.execution_agent.execution_log import DEFAULT_DIR, ExecutionLog
+from guilds.execution.execution_agent.tca import compare, tca_report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default=os.getenv("AGORA_TCA_DIR", DEFAULT_DIR), help="Execution log directory.")
+    parser.add_argument("--by", default="algo", help="Orders column to group by (algo, tag, ticker, status).")
+    parser.add_argument("--baseline", help="Group to compare against, e.g. a tag.")
+    parser.add_argument("--candidate", help="Group compared with the baseline.")
+    parser.add_argument("--compact", action="store_true", help="Merge the log's segments before reading.")
+    parser.add_argument("--output", help="Also write the report as JSON to this file.")
+    return parser.parse_args(argv)
+
+
+def main(args):
+    execution_log = ExecutionLog(args.dir)
+    if args.compact:
+        execution_log.compact()
+    orders, fills = execution_log.load()
+    print(f"--- AGORA: TCA over {len(orders['order_id'])} orders and {len(fills['fill_id'])} fills ---")
+    report = {"groups": tca_report(orders, fills, by=args.by)}
+    if args.baseline and args.candidate:
+        report["comparison"] = {
+            "baseline": args.baseline,
+            "candidate": args.candidate,
+            "candidate_minus_baseline": compare(report["groups"], args.baseline, args.candidate),
+        }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to '{args.output}'.")
+
+
+if __name__ == "__main__":
+    main(parse_args())